@@ -4,7 +4,33 @@ from dotenv import load_dotenv
 
 load_dotenv(Path(__file__).resolve().parent.parent.parent / ".env")
 
+# sqlite (single node, DATABASE_PATH) or postgres (DATABASE_URL, pooled; several app nodes can share it)
+DB_BACKEND = os.getenv("DB_BACKEND", "sqlite").strip().lower()
+DATABASE_URL = os.getenv("DATABASE_URL", "")
+DB_POOL_MIN_SIZE = int(os.getenv("DB_POOL_MIN_SIZE", "1"))
+DB_POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))  # seconds to wait for a free connection
+# Background jobs (followups, re-scrapes, GC, ...). Set false on all but one node of a multi-node setup.
+SCHEDULER_ENABLED = os.getenv("SCHEDULER_ENABLED", "true").lower() == "true"
 DATABASE_PATH = os.getenv("DATABASE_PATH", str(Path(__file__).resolve().parent.parent / "data" / "orders.db"))
+# Cold storage for old orders / messages (moved there by the daily archive job)
+ARCHIVE_DATABASE_PATH = os.getenv("ARCHIVE_DATABASE_PATH") or str(Path(DATABASE_PATH).with_name("orders_archive.db"))
+# Collected/cancelled orders and inbound messages older than this many days are archived (0 = never)
+ORDER_ARCHIVE_DAYS = int(os.getenv("ORDER_ARCHIVE_DAYS", "180"))
+MESSAGE_ARCHIVE_DAYS = int(os.getenv("MESSAGE_ARCHIVE_DAYS", "365"))
+# WAL checkpoints: TRUNCATE once the WAL has been idle this long, PASSIVE earlier if it's this big
+DB_CHECKPOINT_INTERVAL = int(os.getenv("DB_CHECKPOINT_INTERVAL", "60"))
+DB_QUIET_SECONDS = int(os.getenv("DB_QUIET_SECONDS", "30"))
+DB_WAL_MAX_BYTES = int(os.getenv("DB_WAL_MAX_BYTES", str(64 * 1024 * 1024)))  # 64MB
+# Daily ANALYZE/optimize + incremental vacuum (hour of day, max pages freed per run)
+DB_MAINTENANCE_HOUR = int(os.getenv("DB_MAINTENANCE_HOUR", "5"))
+DB_VACUUM_MAX_PAGES = int(os.getenv("DB_VACUUM_MAX_PAGES", "10000"))
+# Online backups (gzipped, integrity-checked snapshots; newest BACKUP_KEEP per database kept)
+BACKUP_DIR = os.getenv("BACKUP_DIR") or str(Path(DATABASE_PATH).parent / "backups")
+BACKUP_KEEP = int(os.getenv("BACKUP_KEEP", "14"))
+BACKUP_HOUR = int(os.getenv("BACKUP_HOUR", "2"))
+BACKUP_PAGES_PER_STEP = int(os.getenv("BACKUP_PAGES_PER_STEP", "1024"))
+BACKUP_STEP_PAUSE_MS = int(os.getenv("BACKUP_STEP_PAUSE_MS", "20"))
 
 # Twilio
 TWILIO_ACCOUNT_SID = os.getenv("TWILIO_ACCOUNT_SID", "")
@@ -42,15 +68,39 @@ UPLOAD_DIR = os.getenv(
 )
 UPLOAD_MAX_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", str(6 * 1024 * 1024)))  # 6MB
 UPLOAD_BASE_PATH = os.getenv("UPLOAD_BASE_PATH", "/api/media")
+# Worker processes for Pillow decode/resize/encode (uploads, Places photos)
+IMAGE_POOL_WORKERS = int(os.getenv("IMAGE_POOL_WORKERS", "2"))
+# On-demand resized copies (/api/media/...?w=&fmt=): content-addressed, LRU-bounded by size
+MEDIA_CACHE_DIR = os.getenv("MEDIA_CACHE_DIR") or str(Path(UPLOAD_DIR).parent / "media_cache")
+MEDIA_CACHE_MAX_BYTES = int(os.getenv("MEDIA_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))  # 512MB
+MEDIA_CACHE_MAX_AGE = int(os.getenv("MEDIA_CACHE_MAX_AGE", str(30 * 24 * 3600)))  # Cache-Control seconds
+# Unreferenced stored images younger than this are kept by the media GC job
+MEDIA_GC_GRACE_HOURS = float(os.getenv("MEDIA_GC_GRACE_HOURS", "24"))
+# Rendered promotional flyers (cached per restaurant, plus batch bundles)
+FLYER_DIR = os.getenv("FLYER_DIR") or str(Path(UPLOAD_DIR).parent / "flyers")
 
 # Super admin - set this in .env to secure it
 SUPER_ADMIN_TOKEN = os.getenv("SUPER_ADMIN_TOKEN", "superadmin-change-me")
+# Seconds the superadmin dashboard totals are cached in process
+SUPERADMIN_STATS_TTL = int(os.getenv("SUPERADMIN_STATS_TTL", "10"))
 
 # Production: directory containing built frontend (index.html + assets). Empty = don't serve static.
 STATIC_DIR = os.getenv("STATIC_DIR", "").strip()
 
 # Google Places (server-side only)
 GOOGLE_PLACES_API_KEY = os.getenv("GOOGLE_PLACES_API_KEY", "")
+# Response cache TTLs (seconds) per call type. photoUri links are short-lived, keep that one low.
+PLACES_CACHE_TTL_SEARCH = int(os.getenv("PLACES_CACHE_TTL_SEARCH") or 24 * 3600)
+PLACES_CACHE_TTL_DETAILS = int(os.getenv("PLACES_CACHE_TTL_DETAILS") or 7 * 24 * 3600)
+PLACES_CACHE_TTL_PHOTO = int(os.getenv("PLACES_CACHE_TTL_PHOTO") or 50 * 60)
+
+# Scraping: warm Playwright browser pool (each slot is one Chromium process, ~150-300MB)
+BROWSER_POOL_SIZE = int(os.getenv("BROWSER_POOL_SIZE", "2"))
+BROWSER_POOL_MAX_PAGES = int(os.getenv("BROWSER_POOL_MAX_PAGES", "40"))
+BROWSER_POOL_IDLE_SECONDS = int(os.getenv("BROWSER_POOL_IDLE_SECONDS", "300"))
+# Nightly re-scrape of all Deliveroo / Just Eat menus (server local time)
+MENU_RESCRAPE_NIGHTLY = os.getenv("MENU_RESCRAPE_NIGHTLY", "true").lower() in ("1", "true", "yes")
+MENU_RESCRAPE_HOUR = int(os.getenv("MENU_RESCRAPE_HOUR", "3"))
 
 # Stripe
 STRIPE_SECRET_KEY = os.getenv("STRIPE_SECRET_KEY", "")
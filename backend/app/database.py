@@ -1,8 +1,20 @@
 import sqlite3
 from contextlib import contextmanager
 from . import config
+from .dialect import dialect_for
+
+# SQL that differs between backends goes through this (see dialect.py).
+sql = dialect_for(config.DB_BACKEND)
+
+
+def is_sqlite() -> bool:
+    return sql.name == "sqlite"
+
 
 def get_connection():
+    if not is_sqlite():
+        from . import db_postgres
+        return db_postgres.connect()
     conn = sqlite3.connect(config.DATABASE_PATH)
     conn.row_factory = sqlite3.Row
     conn.execute("PRAGMA journal_mode=WAL")
@@ -21,9 +33,27 @@ def get_db():
     finally:
         conn.close()
 
+
+def _columns(db, table: str) -> list[str]:
+    if is_sqlite():
+        return [r["name"] for r in db.execute(f"PRAGMA table_info({table})").fetchall()]
+    return [
+        r["column_name"] for r in db.execute(
+            "SELECT column_name FROM information_schema.columns WHERE table_schema = current_schema() AND table_name = ?",
+            (table,),
+        ).fetchall()
+    ]
+
+
 def init_db():
     with get_db() as db:
-        db.executescript("""
+        # New databases free pages incrementally (services/db_maintenance.py). The connection
+        # is already in WAL mode, so the setting only sticks after a VACUUM - instant while the
+        # file is empty. Existing databases are converted by a superadmin full vacuum.
+        if is_sqlite() and not db.execute("SELECT 1 FROM sqlite_master LIMIT 1").fetchone():
+            db.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            db.execute("VACUUM")
+        db.executescript(sql.ddl("""
             CREATE TABLE IF NOT EXISTS restaurants (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 name TEXT NOT NULL,
@@ -232,22 +262,59 @@ def init_db():
             );
 
             CREATE INDEX IF NOT EXISTS idx_credit_log_restaurant ON credit_log(restaurant_id);
-        """)
+
+            CREATE TABLE IF NOT EXISTS places_cache (
+                cache_key TEXT PRIMARY KEY,      -- sha256 of call type + request body + field mask
+                call_type TEXT NOT NULL,         -- search|details|photo
+                fetched_at INTEGER NOT NULL,     -- unix seconds
+                json TEXT NOT NULL
+            );
+
+            CREATE INDEX IF NOT EXISTS idx_places_cache_fetched ON places_cache(fetched_at);
+
+            CREATE TABLE IF NOT EXISTS places_api_usage (
+                day TEXT NOT NULL,               -- YYYY-MM-DD (UTC)
+                call_type TEXT NOT NULL,
+                api_calls INTEGER NOT NULL DEFAULT 0,
+                cache_hits INTEGER NOT NULL DEFAULT 0,
+                stale_hits INTEGER NOT NULL DEFAULT 0,
+                errors INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (day, call_type)
+            );
+
+            CREATE TABLE IF NOT EXISTS menu_import_state (
+                restaurant_id INTEGER NOT NULL,
+                source TEXT NOT NULL,            -- deliveroo|justeat
+                menu_hash TEXT NOT NULL,         -- sha256 of the normalized scraped menu
+                item_count INTEGER NOT NULL DEFAULT 0,
+                imported_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (restaurant_id, source),
+                FOREIGN KEY (restaurant_id) REFERENCES restaurants(id)
+            );
+
+            CREATE TABLE IF NOT EXISTS media_variants (
+                url TEXT PRIMARY KEY,            -- public /api/media/... URL of the stored image
+                width INTEGER NOT NULL,
+                height INTEGER NOT NULL,
+                variants_json TEXT NOT NULL,     -- [{file, width, height, format, bytes}]
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            );
+        """))
 
         # Lightweight migrations for existing SQLite files.
-        order_columns = [r["name"] for r in db.execute("PRAGMA table_info(orders)").fetchall()]
+        order_columns = _columns(db, "orders")
         if "owner_action_token" not in order_columns:
             db.execute("ALTER TABLE orders ADD COLUMN owner_action_token TEXT")
         if "owner_note" not in order_columns:
             db.execute("ALTER TABLE orders ADD COLUMN owner_note TEXT")
         if "updated_at" not in order_columns:
             # SQLite doesn't allow adding a column with a non-constant default (like CURRENT_TIMESTAMP).
-            db.execute("ALTER TABLE orders ADD COLUMN updated_at TIMESTAMP")
+            db.execute(sql.ddl("ALTER TABLE orders ADD COLUMN updated_at TIMESTAMP"))
             db.execute(
                 "UPDATE orders SET updated_at = COALESCE(updated_at, created_at, CURRENT_TIMESTAMP)"
             )
 
-        restaurant_columns = [r["name"] for r in db.execute("PRAGMA table_info(restaurants)").fetchall()]
+        restaurant_columns = _columns(db, "restaurants")
         if "logo_url" not in restaurant_columns:
             db.execute("ALTER TABLE restaurants ADD COLUMN logo_url TEXT")
         if "banner_url" not in restaurant_columns:
@@ -270,19 +337,189 @@ def init_db():
             db.execute("ALTER TABLE restaurants ADD COLUMN notification_channel TEXT DEFAULT 'whatsapp'")
 
         if "credits" not in restaurant_columns:
-            db.execute("ALTER TABLE restaurants ADD COLUMN credits REAL DEFAULT 10.0")
+            db.execute(sql.ddl("ALTER TABLE restaurants ADD COLUMN credits REAL DEFAULT 10.0"))
             db.execute("UPDATE restaurants SET credits = 10.0 WHERE credits IS NULL")
+        if "menu_version" not in restaurant_columns:
+            db.execute("ALTER TABLE restaurants ADD COLUMN menu_version INTEGER DEFAULT 0")
+
+        menu_item_columns = _columns(db, "menu_items")
+        if "removed_by_import" not in menu_item_columns:
+            # Set when a rescrape no longer lists the dish; only those rows are restored on reappearance.
+            db.execute("ALTER TABLE menu_items ADD COLUMN removed_by_import INTEGER DEFAULT 0")
 
         if "sms_optin" not in order_columns:
             db.execute("ALTER TABLE orders ADD COLUMN sms_optin INTEGER DEFAULT 0")
         if "followup_sent" not in order_columns:
             db.execute("ALTER TABLE orders ADD COLUMN followup_sent INTEGER DEFAULT 0")
 
+        # First-class columns for outbound message metadata (previously only in meta_json).
+        message_columns = _columns(db, "inbound_messages")
+        added_message_columns = False
+        for col, col_type in (("provider_sid", "TEXT"), ("content_sid", "TEXT"), ("error_code", "INTEGER"), ("restaurant_id", "INTEGER")):
+            if col not in message_columns:
+                db.execute(f"ALTER TABLE inbound_messages ADD COLUMN {col} {col_type}")
+                added_message_columns = True
+        if added_message_columns and is_sqlite():  # backfill of existing SQLite files
+            db.execute(
+                """UPDATE inbound_messages SET
+                       provider_sid = COALESCE(provider_sid, json_extract(meta_json, '$.sid'),
+                                               json_extract(meta_json, '$.message_sid')),
+                       content_sid = COALESCE(content_sid, json_extract(meta_json, '$.content_sid')),
+                       error_code = COALESCE(error_code, json_extract(meta_json, '$.error_code'))
+                   WHERE json_valid(meta_json)"""
+            )
+            db.execute(
+                """UPDATE inbound_messages
+                   SET restaurant_id = (SELECT o.restaurant_id FROM orders o WHERE o.order_number = inbound_messages.order_number)
+                   WHERE restaurant_id IS NULL AND order_number IS NOT NULL AND order_number != ''"""
+            )
+
         # Indexes that depend on migrated columns must be created after migrations.
         db.execute("CREATE INDEX IF NOT EXISTS idx_restaurants_google_place_id ON restaurants(google_place_id)")
+        db.execute(
+            "CREATE INDEX IF NOT EXISTS idx_inbound_messages_content_sid "
+            "ON inbound_messages(to_addr, content_sid, created_at) WHERE content_sid IS NOT NULL"
+        )
+        db.execute(
+            "CREATE INDEX IF NOT EXISTS idx_inbound_messages_provider_sid "
+            "ON inbound_messages(provider_sid) WHERE provider_sid IS NOT NULL"
+        )
+        db.execute(
+            "CREATE INDEX IF NOT EXISTS idx_inbound_messages_restaurant "
+            "ON inbound_messages(restaurant_id, id) WHERE restaurant_id IS NOT NULL"
+        )
+
+        # Content-addressed media (services/media_store.py) and which rows reference which URL.
+        db.executescript(sql.ddl("""
+            CREATE TABLE IF NOT EXISTS media_blobs (
+                hash TEXT PRIMARY KEY,           -- sha256 of the stored bytes
+                url TEXT NOT NULL UNIQUE,
+                kind TEXT,                       -- menu|logo|banner|gallery (first upload)
+                bytes INTEGER NOT NULL,
+                width INTEGER,
+                height INTEGER,
+                format TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            );
+
+            CREATE TABLE IF NOT EXISTS media_refs (
+                owner_type TEXT NOT NULL,        -- restaurant|menu_item|gallery
+                owner_id INTEGER NOT NULL,
+                field TEXT NOT NULL,
+                url TEXT NOT NULL,
+                PRIMARY KEY (owner_type, owner_id, field)
+            );
+            CREATE INDEX IF NOT EXISTS idx_media_refs_url ON media_refs(url);
+        """))
+        media_ref_columns = [
+            ("restaurants", "restaurant", "logo_url"),
+            ("restaurants", "restaurant", "banner_url"),
+            ("menu_items", "menu_item", "image_url"),
+            ("gallery_images", "gallery", "image_url"),
+        ]
+        for table in dict.fromkeys(t for t, _, _ in media_ref_columns):
+            cols = [(owner, col) for t, owner, col in media_ref_columns if t == table]
+            owner = cols[0][0]
+            upserts = "".join(
+                f"""INSERT OR REPLACE INTO media_refs (owner_type, owner_id, field, url)
+                    SELECT '{owner}', NEW.id, '{col}', NEW.{col} WHERE COALESCE(NEW.{col}, '') != '';
+                """
+                for owner, col in cols
+            )
+            clear = f"DELETE FROM media_refs WHERE owner_type = '{owner}' AND owner_id = OLD.id;"
+            if is_sqlite():
+                db.executescript(f"""
+                    CREATE TRIGGER IF NOT EXISTS trg_media_refs_{table}_ins AFTER INSERT ON {table}
+                    BEGIN {upserts} END;
+                    CREATE TRIGGER IF NOT EXISTS trg_media_refs_{table}_upd
+                    AFTER UPDATE OF {", ".join(c for _, c in cols)} ON {table}
+                    BEGIN {clear} {upserts} END;
+                    CREATE TRIGGER IF NOT EXISTS trg_media_refs_{table}_del AFTER DELETE ON {table}
+                    BEGIN {clear} END;
+                """)
+            else:
+                upserts = upserts.replace("INSERT OR REPLACE INTO", "INSERT INTO").replace(
+                    "!= '';", "!= '' ON CONFLICT (owner_type, owner_id, field) DO UPDATE SET url = EXCLUDED.url;"
+                )
+                db.executescript(f"""
+                    CREATE OR REPLACE FUNCTION trg_media_refs_{table}() RETURNS trigger LANGUAGE plpgsql AS $$
+                    BEGIN
+                        IF TG_OP <> 'INSERT' THEN {clear} END IF;
+                        IF TG_OP <> 'DELETE' THEN {upserts} END IF;
+                        RETURN NULL;
+                    END $$;
+                    DROP TRIGGER IF EXISTS trg_media_refs_{table} ON {table};
+                    CREATE TRIGGER trg_media_refs_{table}
+                    AFTER INSERT OR UPDATE OF {", ".join(c for _, c in cols)} OR DELETE ON {table}
+                    FOR EACH ROW EXECUTE FUNCTION trg_media_refs_{table}();
+                """)
+        if not db.execute("SELECT 1 FROM media_refs LIMIT 1").fetchone():
+            for table, owner, col in media_ref_columns:
+                db.execute(
+                    f"""INSERT OR IGNORE INTO media_refs (owner_type, owner_id, field, url)
+                        SELECT '{owner}', id, '{col}', {col} FROM {table} WHERE COALESCE({col}, '') != ''"""
+                )
+
+        # Full-text index for the superadmin inbox (external content: no second copy of bodies).
+        # SQLite only; on Postgres the inbox search uses ILIKE.
+        if is_sqlite():
+            has_fts = db.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'inbound_messages_fts'"
+            ).fetchone()
+            try:
+                db.executescript("""
+                    CREATE VIRTUAL TABLE IF NOT EXISTS inbound_messages_fts USING fts5(
+                        from_addr, to_addr, subject, body_text,
+                        content='inbound_messages', content_rowid='id',
+                        tokenize='unicode61 remove_diacritics 2'
+                    );
+                    CREATE TRIGGER IF NOT EXISTS trg_inbound_messages_fts_ins AFTER INSERT ON inbound_messages BEGIN
+                        INSERT INTO inbound_messages_fts(rowid, from_addr, to_addr, subject, body_text)
+                        VALUES (NEW.id, NEW.from_addr, NEW.to_addr, NEW.subject, NEW.body_text);
+                    END;
+                    CREATE TRIGGER IF NOT EXISTS trg_inbound_messages_fts_del AFTER DELETE ON inbound_messages BEGIN
+                        INSERT INTO inbound_messages_fts(inbound_messages_fts, rowid, from_addr, to_addr, subject, body_text)
+                        VALUES ('delete', OLD.id, OLD.from_addr, OLD.to_addr, OLD.subject, OLD.body_text);
+                    END;
+                    CREATE TRIGGER IF NOT EXISTS trg_inbound_messages_fts_upd
+                    AFTER UPDATE OF from_addr, to_addr, subject, body_text ON inbound_messages BEGIN
+                        INSERT INTO inbound_messages_fts(inbound_messages_fts, rowid, from_addr, to_addr, subject, body_text)
+                        VALUES ('delete', OLD.id, OLD.from_addr, OLD.to_addr, OLD.subject, OLD.body_text);
+                        INSERT INTO inbound_messages_fts(rowid, from_addr, to_addr, subject, body_text)
+                        VALUES (NEW.id, NEW.from_addr, NEW.to_addr, NEW.subject, NEW.body_text);
+                    END;
+                """)
+                if not has_fts:
+                    db.execute("INSERT INTO inbound_messages_fts(inbound_messages_fts) VALUES ('rebuild')")
+            except sqlite3.OperationalError:
+                pass  # SQLite built without FTS5: inbox search falls back to LIKE
+        else:
+            # Shared across app nodes on Postgres; a single SQLite node keeps both in memory.
+            db.executescript(sql.ddl("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    node TEXT,
+                    params_json TEXT,
+                    progress_json TEXT,
+                    result_json TEXT,
+                    error TEXT,
+                    created_at REAL,
+                    started_at REAL,
+                    finished_at REAL,
+                    updated_at REAL
+                );
+                CREATE INDEX IF NOT EXISTS idx_jobs_kind_status ON jobs(kind, status);
+                CREATE INDEX IF NOT EXISTS idx_jobs_created ON jobs(created_at);
+                CREATE TABLE IF NOT EXISTS instagram_refresh_queue (
+                    handle TEXT PRIMARY KEY,
+                    queued_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                );
+            """))
 
         # Email templates (outreach)
-        db.execute("""
+        db.execute(sql.ddl("""
             CREATE TABLE IF NOT EXISTS email_templates (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 name TEXT NOT NULL,
@@ -292,4 +529,4 @@ def init_db():
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                 updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
             )
-        """)
+        """))
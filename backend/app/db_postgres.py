@@ -0,0 +1,214 @@
+"""
+PostgreSQL backend (DB_BACKEND=postgres): a psycopg connection pool behind the same
+connection interface the rest of the app uses with sqlite3.
+
+Connections handed out by connect() behave like sqlite3 connections for everything the app
+relies on: execute()/executemany() with `?` placeholders, rows addressable by name and by
+index (dict(row) works), cursor.lastrowid / rowcount, commit()/rollback(), and close() -
+which returns the connection to the pool instead of closing it.
+
+psycopg is imported lazily, so SQLite deployments don't need it installed.
+"""
+
+import logging
+import re
+import threading
+from functools import lru_cache
+
+from . import config
+
+log = logging.getLogger(__name__)
+
+_pool = None
+_pool_lock = threading.Lock()
+
+# ? inside string literals / quoted identifiers is data, not a placeholder. % is doubled
+# everywhere because psycopg scans the whole statement for %s.
+_TOKENS = re.compile(r"'(?:[^']|'')*'|\"(?:[^\"]|\"\")*\"|\?|%")
+_INSERT_OR_IGNORE = re.compile(r"^\s*INSERT\s+OR\s+IGNORE\s+INTO\b", re.I)
+_INSERT = re.compile(r"^\s*INSERT\b", re.I)
+
+
+@lru_cache(maxsize=1024)
+def translate(sql: str) -> tuple[str, bool]:
+    """(Postgres SQL, is a plain INSERT that should report lastrowid)."""
+    ignore = bool(_INSERT_OR_IGNORE.match(sql))
+    if ignore:
+        sql = _INSERT_OR_IGNORE.sub("INSERT INTO", sql, count=1)
+    sql = _TOKENS.sub(lambda m: "%s" if m.group(0) == "?" else m.group(0).replace("%", "%%"), sql)
+    sql = sql.rstrip().rstrip(";")
+    if ignore and not re.search(r"\bON\s+CONFLICT\b", sql, re.I):
+        sql += " ON CONFLICT DO NOTHING"
+    wants_id = bool(_INSERT.match(sql)) and not re.search(r"\bRETURNING\b", sql, re.I)
+    if wants_id:
+        sql += " RETURNING *"
+    return sql, wants_id
+
+
+class Row:
+    """sqlite3.Row look-alike: row["col"], row[0], row.keys(), dict(row)."""
+
+    __slots__ = ("_names", "_values")
+
+    def __init__(self, names: tuple[str, ...], values):
+        self._names = names
+        self._values = tuple(values)
+
+    def keys(self) -> list[str]:
+        return list(self._names)
+
+    def __getitem__(self, key):
+        if isinstance(key, (int, slice)):
+            return self._values[key]
+        try:
+            return self._values[self._names.index(key)]
+        except ValueError:
+            raise IndexError(f"No item with that key: {key}") from None
+
+    def __iter__(self):
+        return iter(self._values)
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def __repr__(self) -> str:
+        return f"Row({dict(zip(self._names, self._values))!r})"
+
+
+def _row_factory(cursor):
+    names = tuple(c.name for c in cursor.description or ())
+    return lambda values: Row(names, values)
+
+
+class Cursor:
+    def __init__(self, cursor, lastrowid=None, rows=None):
+        self._cursor = cursor
+        self._rows = rows  # already fetched by an INSERT ... RETURNING
+        self.lastrowid = lastrowid
+        self.rowcount = cursor.rowcount
+
+    def fetchone(self):
+        if self._rows is not None:
+            return self._rows.pop(0) if self._rows else None
+        return self._cursor.fetchone() if self._cursor.description else None
+
+    def fetchall(self) -> list:
+        if self._rows is not None:
+            rows, self._rows = self._rows, []
+            return rows
+        return self._cursor.fetchall() if self._cursor.description else []
+
+    def __iter__(self):
+        return iter(self.fetchall())
+
+
+class Connection:
+    def __init__(self, pool, conn):
+        self._pool = pool
+        self._conn = conn
+
+    def execute(self, sql: str, params=()) -> Cursor:
+        query, wants_id = translate(sql)
+        cur = self._conn.cursor()
+        cur.execute(query, tuple(params))
+        if not wants_id:
+            return Cursor(cur)
+        # RETURNING * was appended for lastrowid; INSERT callers never read the rows themselves.
+        rows = cur.fetchall()
+        lastrowid = None
+        if rows and "id" in rows[-1].keys():
+            lastrowid = rows[-1]["id"]
+        return Cursor(cur, lastrowid=lastrowid, rows=[])
+
+    def executemany(self, sql: str, seq_of_params) -> Cursor:
+        query, wants_id = translate(sql)
+        if wants_id:
+            query = query[: -len(" RETURNING *")]
+        cur = self._conn.cursor()
+        cur.executemany(query, [tuple(p) for p in seq_of_params])
+        return Cursor(cur)
+
+    def executescript(self, script: str) -> None:
+        """Run DDL verbatim (no placeholder rewriting), several statements at once."""
+        with self._conn.cursor() as cur:
+            cur.execute(script)
+
+    def commit(self) -> None:
+        self._conn.commit()
+
+    def rollback(self) -> None:
+        self._conn.rollback()
+
+    def close(self) -> None:
+        if self._conn is not None:
+            conn, self._conn = self._conn, None
+            self._pool.putconn(conn)
+
+
+def _configure(conn) -> None:
+    from psycopg.types.numeric import FloatLoader
+    from psycopg.types.string import TextLoader
+
+    conn.row_factory = _row_factory
+    # Keep values shaped like SQLite returns them: timestamps/dates as text
+    # ('YYYY-MM-DD HH:MM:SS'), SUM()/AVG() over integers as float rather than Decimal.
+    for type_name in ("timestamp", "timestamptz", "date"):
+        conn.adapters.register_loader(type_name, TextLoader)
+    conn.adapters.register_loader("numeric", FloatLoader)
+
+
+def get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            try:
+                from psycopg_pool import ConnectionPool
+            except ImportError as e:
+                raise RuntimeError("DB_BACKEND=postgres needs psycopg[binary,pool] installed") from e
+            if not config.DATABASE_URL:
+                raise RuntimeError("DB_BACKEND=postgres needs DATABASE_URL")
+            _pool = ConnectionPool(
+                config.DATABASE_URL,
+                min_size=config.DB_POOL_MIN_SIZE,
+                max_size=max(config.DB_POOL_MIN_SIZE, config.DB_POOL_MAX_SIZE),
+                timeout=config.DB_POOL_TIMEOUT,
+                kwargs={"options": "-c timezone=UTC"},
+                configure=_configure,
+                name="forkitt",
+                open=True,
+            )
+        return _pool
+
+
+def connect() -> Connection:
+    pool = get_pool()
+    return Connection(pool, pool.getconn())
+
+
+def stats() -> dict:
+    with _pool_lock:
+        pool = _pool
+    if pool is None:
+        return {"backend": "postgres", "pool": None}
+    s = pool.get_stats()
+    return {
+        "backend": "postgres",
+        "pool": {
+            "size": s.get("pool_size"),
+            "available": s.get("pool_available"),
+            "min_size": pool.min_size,
+            "max_size": pool.max_size,
+            "requests_waiting": s.get("requests_waiting", 0),
+            "requests_num": s.get("requests_num", 0),
+            "requests_wait_ms": s.get("requests_wait_ms", 0),
+            "connections_errors": s.get("connections_errors", 0),
+        },
+    }
+
+
+def close() -> None:
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.close()
@@ -0,0 +1,86 @@
+"""
+SQL differences between the supported database backends (DB_BACKEND=sqlite|postgres).
+
+Queries are written in SQLite's flavour with `?` placeholders; the Postgres connection
+rewrites placeholders and `INSERT OR IGNORE` itself (see db_postgres.translate). Anything
+that can't be rewritten mechanically - date arithmetic, case-insensitive LIKE, column types
+in DDL - goes through the active dialect, `database.sql`:
+
+    f"... WHERE created_at >= {sql.seconds_ago()}", (3600,)
+"""
+
+import re
+
+
+class SQLiteDialect:
+    name = "sqlite"
+
+    def now(self) -> str:
+        return "datetime('now')"
+
+    def seconds_ago(self) -> str:
+        """Timestamp N seconds before now; N is bound as one integer parameter."""
+        return "datetime('now', '-' || ? || ' seconds')"
+
+    def today(self) -> str:
+        return "date('now')"
+
+    def week_start(self) -> str:
+        """Start of the current week (Monday), as used by the dashboard 'this week' totals."""
+        return "date('now', 'weekday 1', '-7 days')"
+
+    def date(self, expr: str) -> str:
+        return f"date({expr})"
+
+    def like(self) -> str:
+        """Case-insensitive (for ASCII) LIKE operator."""
+        return "LIKE"
+
+    def ddl(self, script: str) -> str:
+        return script
+
+
+class PostgresDialect:
+    name = "postgres"
+
+    # SQLite column types / defaults -> Postgres. Sessions run with timezone=UTC, so
+    # TIMESTAMP columns hold UTC like SQLite's CURRENT_TIMESTAMP does.
+    _DDL = (
+        (re.compile(r"\bINTEGER PRIMARY KEY AUTOINCREMENT\b", re.I), "BIGSERIAL PRIMARY KEY"),
+        (re.compile(r"\bINTEGER PRIMARY KEY\b", re.I), "BIGINT PRIMARY KEY"),
+        (re.compile(r"\bREAL\b", re.I), "DOUBLE PRECISION"),
+        (re.compile(r"\bBLOB\b", re.I), "BYTEA"),
+        (re.compile(r"\bTIMESTAMP\b", re.I), "TIMESTAMP(0)"),
+    )
+
+    def now(self) -> str:
+        return "LOCALTIMESTAMP(0)"
+
+    def seconds_ago(self) -> str:
+        return "(LOCALTIMESTAMP(0) - ? * INTERVAL '1 second')"
+
+    def today(self) -> str:
+        return "CURRENT_DATE"
+
+    def week_start(self) -> str:
+        return "date_trunc('week', CURRENT_DATE)"
+
+    def date(self, expr: str) -> str:
+        return f"CAST({expr} AS DATE)"
+
+    def like(self) -> str:
+        return "ILIKE"
+
+    def ddl(self, script: str) -> str:
+        for pattern, replacement in self._DDL:
+            script = pattern.sub(replacement, script)
+        return script
+
+
+def dialect_for(backend: str):
+    backend = (backend or "sqlite").lower()
+    if backend == "sqlite":
+        return SQLiteDialect()
+    if backend in ("postgres", "postgresql"):
+        return PostgresDialect()
+    raise ValueError(f"Unknown DB_BACKEND: {backend!r} (expected sqlite or postgres)")
@@ -7,10 +7,18 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse
 from apscheduler.schedulers.background import BackgroundScheduler
-from .database import init_db
+from .database import init_db, is_sqlite
 from . import config
 from .routers import restaurants, menu, orders, admin, superadmin, webhooks, sendgrid_inbound, uploads, marketing, owner_portal
 from .services.followup import check_followup_orders
+from .services.instagram_service import drain_refresh_queue, prewarm_active_handles
+from .services.google_places_service import prune_cache as prune_places_cache
+from .services import browser_pool, image_pool
+from .services.media_cache import MediaFiles
+from .services.media_store import run_scheduled as collect_media_garbage
+from .services.archive import run_scheduled as archive_old_rows
+from .services import db_backup, db_maintenance
+from .services.menu_rescrape import run_nightly as rescrape_menus_nightly
 
 # Ensure upload directory exists before StaticFiles mounts (Starlette checks at import-time).
 try:
@@ -25,11 +33,29 @@ _scheduler = BackgroundScheduler()
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     init_db()
-    _scheduler.add_job(check_followup_orders, "interval", seconds=60, id="followup")
-    _scheduler.start()
-    logging.getLogger("apscheduler").setLevel(logging.WARNING)
+    # With several app nodes on one Postgres, only one of them should run the background jobs.
+    if config.SCHEDULER_ENABLED:
+        _scheduler.add_job(check_followup_orders, "interval", seconds=60, id="followup")
+        _scheduler.add_job(drain_refresh_queue, "interval", seconds=15, id="instagram_refresh")
+        _scheduler.add_job(prewarm_active_handles, "interval", minutes=10, id="instagram_prewarm")
+        _scheduler.add_job(prune_places_cache, "interval", hours=24, id="places_cache_prune")
+        _scheduler.add_job(collect_media_garbage, "interval", hours=24, id="media_gc")
+        if is_sqlite():
+            _scheduler.add_job(archive_old_rows, "cron", hour=4, minute=30, id="archive")
+            _scheduler.add_job(db_maintenance.checkpoint_tick, "interval", seconds=config.DB_CHECKPOINT_INTERVAL, id="db_checkpoint")
+            _scheduler.add_job(db_maintenance.run_scheduled, "cron", hour=config.DB_MAINTENANCE_HOUR, minute=0, id="db_maintenance")
+            _scheduler.add_job(db_backup.run_scheduled, "cron", hour=config.BACKUP_HOUR, minute=0, id="db_backup")
+        _scheduler.add_job(rescrape_menus_nightly, "cron", hour=config.MENU_RESCRAPE_HOUR, minute=15, id="menu_rescrape")
+        _scheduler.start()
+        logging.getLogger("apscheduler").setLevel(logging.WARNING)
     yield
-    _scheduler.shutdown(wait=False)
+    if _scheduler.running:
+        _scheduler.shutdown(wait=False)
+    image_pool.shutdown()
+    browser_pool.shutdown()
+    if not is_sqlite():
+        from . import db_postgres
+        db_postgres.close()
 
 
 app = FastAPI(title="Hackney Eats", version="1.0.0", lifespan=lifespan)
@@ -40,6 +66,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Before-Id"],
 )
 
 app.include_router(restaurants.router, prefix="/api")
@@ -54,7 +81,8 @@ app.include_router(marketing.router, prefix="/api")
 app.include_router(owner_portal.router, prefix="/api")
 
 # Serve uploaded media via backend so nginx only needs to proxy /api/*.
-app.mount("/api/media", StaticFiles(directory=config.UPLOAD_DIR), name="media")
+# ?w=&fmt= returns a cached resized copy (see services/media_cache.py).
+app.mount("/api/media", MediaFiles(directory=config.UPLOAD_DIR), name="media")
 
 # Production: serve built frontend and SPA fallback
 _static_dir = (Path(config.STATIC_DIR) if config.STATIC_DIR else Path(__file__).resolve().parent.parent / "static").resolve()
@@ -25,6 +25,9 @@ class RestaurantDetail(RestaurantSummary):
     phone: Optional[str] = None
     opening_hours: Optional[dict] = None
     accepting_orders: bool = True
+    menu_version: int = 0  # bumped by every menu import that changed something
+    banner_variants: Optional[dict] = None  # responsive widths + srcset per format, see services/media_variants
+    logo_variants: Optional[dict] = None
 
     @classmethod
     def from_row(cls, row):
@@ -63,6 +66,7 @@ class RestaurantDetail(RestaurantSummary):
             opening_hours=hours,
             theme=row["theme"],
             accepting_orders=credits > 0,
+            menu_version=(row["menu_version"] or 0) if "menu_version" in keys else 0,
         )
 
 class GalleryImage(BaseModel):
@@ -70,12 +74,16 @@ class GalleryImage(BaseModel):
     image_url: str
     caption: Optional[str] = None
     display_order: int = 0
+    variants: Optional[dict] = None  # responsive widths + srcset per format, see services/media_variants
 
 class InstagramPost(BaseModel):
     id: str
     shortcode: str
     permalink: str
     media_url: str | None = None
+    media_url_webp: Optional[str] = None
+    thumbnail_url: Optional[str] = None
+    thumbnail_url_webp: Optional[str] = None
     caption: Optional[str] = None
     timestamp: Optional[str] = None
     is_video: bool = False
@@ -119,6 +127,7 @@ class MenuItem(BaseModel):
     is_available: bool = True
     dietary_tags: list[str] = []
     category_id: Optional[int] = None
+    variants: Optional[dict] = None  # responsive widths + srcset per format, see services/media_variants
 
     @classmethod
     def from_row(cls, row):
@@ -1,12 +1,10 @@
-import io
 import json
 import re
 import secrets
 from datetime import datetime, timedelta, timezone
-from pathlib import Path
 from fastapi import APIRouter, HTTPException, Header, BackgroundTasks, Body
-from fastapi.responses import StreamingResponse
-from ..database import get_db
+from fastapi.responses import FileResponse
+from ..database import get_db, sql
 from .. import config
 from ..models import (
     AdminLogin, OrderResponse, OrderStatusUpdate,
@@ -14,6 +12,7 @@ from ..models import (
     RestaurantUpdate, CustomerSummary,
 )
 from ..services.order_service import advance_order_status
+from ..services import archive, media_variants
 from ..services.notification import (
     notify_customer_status, send_email, send_sms, send_whatsapp,
     is_whatsapp_opted_in,
@@ -130,14 +129,14 @@ def get_admin_stats(authorization: str = Header(...)):
         # This week (Monday to now)
         week = db.execute(
             "SELECT COUNT(*) as orders, COALESCE(SUM(subtotal), 0) as revenue "
-            "FROM orders WHERE restaurant_id = ? AND created_at >= date('now', 'weekday 1', '-7 days')",
+            f"FROM orders WHERE restaurant_id = ? AND created_at >= {sql.week_start()}",
             (rid,),
         ).fetchone()
 
         # Today
         today = db.execute(
             "SELECT COUNT(*) as orders, COALESCE(SUM(subtotal), 0) as revenue "
-            "FROM orders WHERE restaurant_id = ? AND date(created_at) = date('now')",
+            f"FROM orders WHERE restaurant_id = ? AND {sql.date('created_at')} = {sql.today()}",
             (rid,),
         ).fetchone()
 
@@ -147,14 +146,18 @@ def get_admin_stats(authorization: str = Header(...)):
             (rid,),
         ).fetchone()["c"]
 
-        # Customer count
-        customer_count = db.execute(
-            "SELECT COUNT(DISTINCT LOWER(TRIM(customer_name)) || '|' || LOWER(TRIM(COALESCE(customer_email, '')))) as c "
-            "FROM orders WHERE restaurant_id = ?",
-            (rid,),
-        ).fetchone()["c"]
+        # Customer count (customers with only archived orders still count)
+        customer_keys = {
+            r[0] for r in db.execute(
+                f"SELECT DISTINCT {archive.CUSTOMER_KEY} FROM orders WHERE restaurant_id = ?", (rid,)
+            ).fetchall()
+        }
+    customer_count = len(customer_keys | archive.customer_groups(rid).keys())
 
-    total_revenue = totals["total_revenue"]
+    # Orders moved to the archive are old, so they only count towards the all-time totals.
+    archived = archive.order_totals(rid)
+    total_orders = totals["total_orders"] + archived["orders"]
+    total_revenue = totals["total_revenue"] + archived["subtotal"]
     week_revenue = week["revenue"]
     commission_rate = 0.10
 
@@ -162,7 +165,7 @@ def get_admin_stats(authorization: str = Header(...)):
     credits = restaurant.get("credits", 10.0) or 10.0
 
     return {
-        "total_orders": totals["total_orders"],
+        "total_orders": total_orders,
         "total_revenue": round(total_revenue, 2),
         "total_commission": round(total_revenue * commission_rate, 2),
         "week_orders": week["orders"],
@@ -274,8 +277,31 @@ def update_admin_restaurant(body: RestaurantUpdate, authorization: str = Header(
 
 # --- Orders ---
 
+def _order_response(o, items, restaurant: dict) -> OrderResponse:
+    return OrderResponse(
+        id=o["id"],
+        order_number=o["order_number"],
+        restaurant_id=o["restaurant_id"],
+        restaurant_name=restaurant["name"],
+        customer_name=o["customer_name"],
+        customer_phone=o["customer_phone"],
+        customer_email=o["customer_email"],
+        pickup_time=o["pickup_time"],
+        special_instructions=o["special_instructions"],
+        subtotal=o["subtotal"],
+        status=o["status"],
+        items=[
+            {"id": i["id"], "item_name": i["item_name"], "quantity": i["quantity"],
+             "unit_price": i["unit_price"], "notes": i["notes"]}
+            for i in items
+        ],
+        created_at=o["created_at"] or "",
+    )
+
+
 @router.get("/orders", response_model=list[OrderResponse])
-def list_orders(status: str | None = None, authorization: str = Header(...)):
+def list_orders(status: str | None = None, include_archived: bool = True, authorization: str = Header(...)):
+    """The restaurant's orders, newest first; include_archived adds orders moved to the archive."""
     restaurant = _get_restaurant_from_token(authorization)
     with get_db() as db:
         if status:
@@ -294,25 +320,13 @@ def list_orders(status: str | None = None, authorization: str = Header(...)):
             items = db.execute(
                 "SELECT * FROM order_items WHERE order_id = ?", (o["id"],)
             ).fetchall()
-            result.append(OrderResponse(
-                id=o["id"],
-                order_number=o["order_number"],
-                restaurant_id=o["restaurant_id"],
-                restaurant_name=restaurant["name"],
-                customer_name=o["customer_name"],
-                customer_phone=o["customer_phone"],
-                customer_email=o["customer_email"],
-                pickup_time=o["pickup_time"],
-                special_instructions=o["special_instructions"],
-                subtotal=o["subtotal"],
-                status=o["status"],
-                items=[
-                    {"id": i["id"], "item_name": i["item_name"], "quantity": i["quantity"],
-                     "unit_price": i["unit_price"], "notes": i["notes"]}
-                    for i in items
-                ],
-                created_at=o["created_at"] or "",
-            ))
+            result.append(_order_response(o, items, restaurant))
+
+    if include_archived:
+        archived = archive.list_orders(restaurant["id"], status)
+        if archived:
+            result.extend(_order_response(o, items, restaurant) for o, items in archived)
+            result.sort(key=lambda r: r.created_at, reverse=True)
     return result
 
 
@@ -322,14 +336,28 @@ def list_customers(authorization: str = Header(...)):
     rid = restaurant["id"]
     with get_db() as db:
         rows = db.execute(
-            """SELECT customer_name, customer_email, customer_phone,
-                      COUNT(*) as order_count, MAX(created_at) as last_order_at,
-                      MAX(sms_optin) as sms_optin
-               FROM orders WHERE restaurant_id = ?
-               GROUP BY LOWER(TRIM(customer_name)), LOWER(TRIM(customer_email))
-               ORDER BY last_order_at DESC""",
+            # Contact details come from each customer's latest order.
+            f"""SELECT g.customer_key, o.customer_name, o.customer_email, o.customer_phone,
+                       g.order_count, g.last_order_at, g.sms_optin
+                FROM (SELECT {archive.CUSTOMER_KEY} AS customer_key, COUNT(*) as order_count,
+                             MAX(created_at) as last_order_at, MAX(sms_optin) as sms_optin, MAX(id) as last_id
+                      FROM orders WHERE restaurant_id = ?
+                      GROUP BY {archive.CUSTOMER_KEY}) g
+                JOIN orders o ON o.id = g.last_id""",
             (rid,),
         ).fetchall()
+        customers = {r["customer_key"]: dict(r) for r in rows}
+        # Customers whose orders were (partly) archived: add their old orders to the counts.
+        for key, old in archive.customer_groups(rid).items():
+            cur = customers.get(key)
+            if cur is None:
+                customers[key] = old
+                continue
+            cur["order_count"] += old["order_count"]
+            cur["sms_optin"] = max(cur["sms_optin"] or 0, old["sms_optin"] or 0)
+            if (old["last_order_at"] or "") > (cur["last_order_at"] or ""):
+                cur.update({k: old[k] for k in ("customer_name", "customer_email", "customer_phone", "last_order_at")})
+        rows = sorted(customers.values(), key=lambda r: r["last_order_at"] or "", reverse=True)
 
         # Build lookup sets for marketing opt-in and WhatsApp opt-in
         marketing_emails = set()
@@ -435,6 +463,7 @@ def update_menu_item(item_id: int, item: MenuItemUpdate, authorization: str = He
             updates["image_url"] = item.image_url
         if item.is_available is not None:
             updates["is_available"] = int(item.is_available)
+            updates["removed_by_import"] = 0  # the owner's choice wins over the next rescrape
         if item.dietary_tags is not None:
             updates["dietary_tags"] = json.dumps(item.dietary_tags)
         if item.category_id is not None:
@@ -458,6 +487,9 @@ def delete_order(order_id: int, authorization: str = Header(...)):
             (order_id, restaurant["id"]),
         ).fetchone()
         if not row:
+            # Archived orders have no reviews (orders with one are never archived)
+            if archive.delete_order(order_id, restaurant["id"]):
+                return
             raise HTTPException(status_code=404, detail="Order not found")
         db.execute("DELETE FROM reviews WHERE order_id = ?", (order_id,))
         db.execute("DELETE FROM order_items WHERE order_id = ?", (order_id,))
@@ -533,7 +565,7 @@ def list_gallery(authorization: str = Header(...)):
             "WHERE restaurant_id = ? ORDER BY display_order, id",
             (restaurant["id"],),
         ).fetchall()
-    return [dict(r) for r in rows]
+    return media_variants.attach([dict(r) for r in rows])
 
 
 @router.post("/gallery", status_code=201)
@@ -629,200 +661,14 @@ def create_topup_session(authorization: str = Header(...)):
 
 @router.get("/flyer")
 def generate_flyer(authorization: str = Header(...)):
-    """Generate an A5 promotional flyer PNG for the restaurant."""
-    from PIL import Image, ImageDraw, ImageFont
-    import qrcode
-    import requests as http_requests
+    """A5 promotional flyer PNG for the restaurant (cached until its name, cuisine or logo changes)."""
+    from ..services import flyers
 
     restaurant = _get_restaurant_from_token(authorization)
-    slug = restaurant["slug"]
-    name = restaurant["name"]
-    cuisine = (restaurant.get("cuisine_type") or "").split("(")[0].strip()
-    url = f"{config.PUBLIC_BASE_URL}/{slug}"
-
-    # A5 at 150 DPI: 874 x 1240 px
-    W, H = 874, 1240
-    ACCENT = (232, 93, 42)  # ForkItt orange #E85D2A
-    WHITE = (255, 255, 255)
-    DARK = (30, 30, 30)
-    LIGHT_TEXT = (100, 100, 100)
-
-    img = Image.new("RGB", (W, H), WHITE)
-    draw = ImageDraw.Draw(img)
-
-    # Fonts — use system fonts, fallback gracefully
-    def load_font(size, bold=False):
-        paths = [
-            "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf" if bold else "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
-            "/System/Library/Fonts/Helvetica.ttc",
-            "/usr/share/fonts/truetype/liberation/LiberationSans-Bold.ttf" if bold else "/usr/share/fonts/truetype/liberation/LiberationSans-Regular.ttf",
-        ]
-        for p in paths:
-            try:
-                return ImageFont.truetype(p, size)
-            except (OSError, IOError):
-                continue
-        return ImageFont.load_default()
-
-    font_name = load_font(52, bold=True)
-    font_cuisine = load_font(28)
-    font_tagline = load_font(22, bold=True)
-    font_url = load_font(20)
-    font_powered = load_font(18)
-    font_cta = load_font(26, bold=True)
-
-    y = 60
-
-    # --- Top accent bar ---
-    draw.rectangle([0, 0, W, 8], fill=ACCENT)
-
-    # --- Restaurant logo ---
-    logo_url = restaurant.get("logo_url")
-    logo_size = 120
-    if logo_url:
-        try:
-            resp = http_requests.get(logo_url, timeout=10)
-            if resp.status_code == 200:
-                logo_img = Image.open(io.BytesIO(resp.content)).convert("RGBA")
-                logo_img = logo_img.resize((logo_size, logo_size), Image.LANCZOS)
-                # Centre logo
-                lx = (W - logo_size) // 2
-                # Paste with alpha
-                bg = Image.new("RGBA", img.size, (255, 255, 255, 255))
-                bg.paste(img.convert("RGBA"))
-                bg.paste(logo_img, (lx, y), logo_img)
-                img = bg.convert("RGB")
-                draw = ImageDraw.Draw(img)
-                y += logo_size + 20
-        except Exception:
-            y += 20
-    else:
-        y += 20
-
-    # --- Restaurant name ---
-    bbox = draw.textbbox((0, 0), name, font=font_name)
-    tw = bbox[2] - bbox[0]
-    draw.text(((W - tw) // 2, y), name, fill=DARK, font=font_name)
-    y += (bbox[3] - bbox[1]) + 12
-
-    # --- Cuisine type ---
-    if cuisine:
-        bbox = draw.textbbox((0, 0), cuisine, font=font_cuisine)
-        tw = bbox[2] - bbox[0]
-        draw.text(((W - tw) // 2, y), cuisine, fill=LIGHT_TEXT, font=font_cuisine)
-        y += (bbox[3] - bbox[1]) + 16
-
-    # --- Divider ---
-    y += 10
-    draw.line([(W // 4, y), (3 * W // 4, y)], fill=(220, 220, 220), width=2)
-    y += 30
-
-    # --- CTA text ---
-    cta = "Order online for Click & Collect"
-    bbox = draw.textbbox((0, 0), cta, font=font_cta)
-    tw = bbox[2] - bbox[0]
-    draw.text(((W - tw) // 2, y), cta, fill=ACCENT, font=font_cta)
-    y += (bbox[3] - bbox[1]) + 10
-
-    cta2 = "Scan the QR code below"
-    bbox = draw.textbbox((0, 0), cta2, font=font_cuisine)
-    tw = bbox[2] - bbox[0]
-    draw.text(((W - tw) // 2, y), cta2, fill=LIGHT_TEXT, font=font_cuisine)
-    y += (bbox[3] - bbox[1]) + 30
-
-    # --- QR code ---
-    qr = qrcode.QRCode(version=None, error_correction=qrcode.constants.ERROR_CORRECT_H, box_size=10, border=2)
-    qr.add_data(url)
-    qr.make(fit=True)
-    qr_img = qr.make_image(fill_color=DARK, back_color=WHITE).convert("RGB")
-
-    qr_size = 320
-    qr_img = qr_img.resize((qr_size, qr_size), Image.LANCZOS)
-
-    # Add orange border around QR
-    bordered_size = qr_size + 16
-    qr_bordered = Image.new("RGB", (bordered_size, bordered_size), ACCENT)
-    qr_bordered.paste(qr_img, (8, 8))
-
-    qx = (W - bordered_size) // 2
-    img.paste(qr_bordered, (qx, y))
-    y += bordered_size + 20
-
-    # --- URL text ---
-    display_url = url.replace("https://", "").replace("http://", "")
-    bbox = draw.textbbox((0, 0), display_url, font=font_url)
-    tw = bbox[2] - bbox[0]
-    draw.text(((W - tw) // 2, y), display_url, fill=ACCENT, font=font_url)
-    y += (bbox[3] - bbox[1]) + 40
-
-    # --- Benefits ---
-    benefits = [
-        "No app needed — order from your phone",
-        "Skip the queue with Click & Collect",
-        "Lower fees — more goes to your local restaurant",
-    ]
-    for b in benefits:
-        line = f"\u2713  {b}"
-        bbox = draw.textbbox((0, 0), line, font=font_cuisine)
-        tw = bbox[2] - bbox[0]
-        draw.text(((W - tw) // 2, y), line, fill=DARK, font=font_cuisine)
-        y += (bbox[3] - bbox[1]) + 14
-
-    # --- Bottom section: Powered by ForkItt ---
-    # Orange footer bar
-    footer_h = 120
-    footer_y = H - footer_h
-    draw.rectangle([0, footer_y, W, H], fill=ACCENT)
-
-    # ForkItt logo in footer
-    forkit_logo_path = Path(__file__).resolve().parent.parent.parent.parent / "frontend" / "public" / "forkit-logo.png"
-    if not forkit_logo_path.exists():
-        forkit_logo_path = Path(__file__).resolve().parent.parent.parent.parent / "frontend" / "public" / "forkit-logo.svg"
-
-    forkitt_logo_size = 40
-    logo_loaded = False
-    if forkit_logo_path.exists() and forkit_logo_path.suffix == ".png":
-        try:
-            fi = Image.open(forkit_logo_path).convert("RGBA").resize((forkitt_logo_size, forkitt_logo_size), Image.LANCZOS)
-            logo_loaded = True
-        except Exception:
-            pass
-
-    line1 = "Local Restaurants \u2022 Click & Collect"
-    line2 = "Powered by ForkItt"
-
-    bbox1 = draw.textbbox((0, 0), line1, font=font_tagline)
-    tw1 = bbox1[2] - bbox1[0]
-    bbox2 = draw.textbbox((0, 0), line2, font=font_powered)
-    tw2 = bbox2[2] - bbox2[0]
-
-    if logo_loaded:
-        # Logo + "Powered by ForkItt" on one line
-        combo_w = forkitt_logo_size + 8 + tw2
-        lx = (W - combo_w) // 2
-        ly = footer_y + (footer_h - forkitt_logo_size) // 2 + 12
-
-        # Line 1 centered above
-        draw.text(((W - tw1) // 2, footer_y + 14), line1, fill=WHITE, font=font_tagline)
-
-        # Logo + line2
-        bg = Image.new("RGBA", img.size, (0, 0, 0, 0))
-        bg.paste(img.convert("RGBA"))
-        bg.paste(fi, (lx, ly), fi)
-        img = bg.convert("RGB")
-        draw = ImageDraw.Draw(img)
-        draw.text((lx + forkitt_logo_size + 8, ly + (forkitt_logo_size - (bbox2[3] - bbox2[1])) // 2), line2, fill=WHITE, font=font_powered)
-    else:
-        draw.text(((W - tw1) // 2, footer_y + 20), line1, fill=WHITE, font=font_tagline)
-        draw.text(((W - tw2) // 2, footer_y + 60), line2, fill=WHITE, font=font_powered)
-
-    # Return as PNG
-    buf = io.BytesIO()
-    img.save(buf, format="PNG", dpi=(150, 150))
-    buf.seek(0)
-    filename = f"ForkItt-Flyer-{slug}.png"
-    return StreamingResponse(
-        buf,
+    path, _ = flyers.get_flyer(restaurant)
+    return FileResponse(
+        path,
         media_type="image/png",
-        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+        filename=f"ForkItt-Flyer-{restaurant['slug']}.png",
+        headers={"Cache-Control": "private, no-cache"},
     )
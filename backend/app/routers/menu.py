@@ -1,6 +1,7 @@
 from fastapi import APIRouter, HTTPException, Query
 from ..database import get_db
 from ..models import MenuCategory, MenuItem
+from ..services import media_variants
 from .restaurants import _require_accessible
 
 router = APIRouter(prefix="/restaurants/{slug}/menu", tags=["menu"])
@@ -21,11 +22,14 @@ def get_menu(slug: str, password: str | None = Query(None)):
             (rid,),
         ).fetchall()
 
+    variants = media_variants.lookup([item["image_url"] for item in items])
+
     # Group items by category
     items_by_cat = {}
     uncategorized = []
     for item in items:
         mi = MenuItem.from_row(item)
+        mi.variants = variants.get(item["image_url"])
         if item["category_id"]:
             items_by_cat.setdefault(item["category_id"], []).append(mi)
         else:
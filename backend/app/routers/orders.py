@@ -5,6 +5,7 @@ from fastapi import APIRouter, Body, HTTPException, BackgroundTasks
 from fastapi.responses import HTMLResponse
 from ..database import get_db
 from ..models import OrderCreate, OrderResponse, ReviewCreate, ReviewResponse
+from ..services import archive
 from ..services.order_service import create_order, advance_order_status
 from .. import config
 from ..services.notification import (
@@ -158,12 +159,15 @@ def get_order_status(order_number: str):
         order = db.execute(
             "SELECT * FROM orders WHERE order_number = ?", (order_number,)
         ).fetchone()
-        if not order:
-            raise HTTPException(status_code=404, detail="Order not found")
-
-        items = db.execute(
-            "SELECT * FROM order_items WHERE order_id = ?", (order["id"],)
-        ).fetchall()
+        if order:
+            items = db.execute(
+                "SELECT * FROM order_items WHERE order_id = ?", (order["id"],)
+            ).fetchall()
+        else:
+            archived = archive.find_order("order_number", order_number)
+            if not archived:
+                raise HTTPException(status_code=404, detail="Order not found")
+            order, items = archived
 
         restaurant = db.execute(
             "SELECT name, slug FROM restaurants WHERE id = ?", (order["restaurant_id"],)
@@ -259,7 +263,10 @@ def customer_collect(order_number: str):
             (order_number,),
         ).fetchone()
         if not order:
-            raise HTTPException(status_code=404, detail="Order not found")
+            archived = archive.find_order("order_number", order_number)
+            if not archived:
+                raise HTTPException(status_code=404, detail="Order not found")
+            order = archived[0]
         if order["status"] == "collected":
             return {"ok": True, "status": "collected"}
         if order["status"] != "ready":
@@ -305,6 +312,9 @@ def get_review(order_number: str):
             "SELECT id FROM orders WHERE order_number = ?", (order_number,)
         ).fetchone()
         if not order:
+            # Reviewed orders are never archived, so an archived order has no review.
+            if archive.find_order("order_number", order_number):
+                return {"review": None}
             raise HTTPException(status_code=404, detail="Order not found")
 
         review = db.execute(
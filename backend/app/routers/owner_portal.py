@@ -2,6 +2,7 @@ from fastapi import APIRouter, HTTPException, BackgroundTasks, Form
 from fastapi.responses import HTMLResponse
 
 from ..database import get_db
+from ..services import archive
 from ..services.order_service import advance_order_status
 from ..services.notification import notify_customer_status, notify_customer_time_changed
 
@@ -24,9 +25,13 @@ def _get_order_by_token(token: str):
             "SELECT * FROM orders WHERE owner_action_token = ?",
             (tok,),
         ).fetchone()
-        if not order:
-            raise HTTPException(status_code=404, detail="Order not found")
-        items = db.execute("SELECT * FROM order_items WHERE order_id = ?", (order["id"],)).fetchall()
+        if order:
+            items = db.execute("SELECT * FROM order_items WHERE order_id = ?", (order["id"],)).fetchall()
+        else:
+            archived = archive.find_order("owner_action_token", tok)
+            if not archived:
+                raise HTTPException(status_code=404, detail="Order not found")
+            order, items = archived
         restaurant = db.execute("SELECT * FROM restaurants WHERE id = ?", (order["restaurant_id"],)).fetchone()
     return dict(order), [dict(i) for i in items], dict(restaurant) if restaurant else None
 
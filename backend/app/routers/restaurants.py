@@ -2,6 +2,7 @@ from fastapi import APIRouter, HTTPException, Query
 from ..database import get_db
 from ..models import RestaurantSummary, RestaurantDetail, InstagramPost, GalleryImage
 from ..services.instagram_service import get_recent_posts
+from ..services import media_variants
 
 router = APIRouter(prefix="/restaurants", tags=["restaurants"])
 
@@ -35,7 +36,11 @@ def list_restaurants():
 @router.get("/{slug}", response_model=RestaurantDetail)
 def get_restaurant(slug: str, password: str | None = Query(None)):
     row = _require_accessible(slug, password)
-    return RestaurantDetail.from_row(row)
+    detail = RestaurantDetail.from_row(row)
+    variants = media_variants.lookup([detail.banner_url, detail.logo_url])
+    detail.banner_variants = variants.get(detail.banner_url)
+    detail.logo_variants = variants.get(detail.logo_url)
+    return detail
 
 
 @router.get("/{slug}/instagram", response_model=list[InstagramPost])
@@ -58,4 +63,4 @@ def get_gallery(slug: str, password: str | None = Query(None)):
             "WHERE restaurant_id = ? ORDER BY display_order, id",
             (row["id"],),
         ).fetchall()
-    return [dict(r) for r in rows]
+    return media_variants.attach([dict(r) for r in rows])
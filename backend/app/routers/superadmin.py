@@ -1,8 +1,8 @@
 import json
 import re
 import secrets
-from fastapi import APIRouter, HTTPException, Header, Body
-from ..database import get_db
+from fastapi import APIRouter, HTTPException, Header, Body, BackgroundTasks, Response
+from ..database import get_db, is_sqlite, sql
 from .. import config
 from ..models import RestaurantCreate, RestaurantUpdate, RestaurantAdmin, InboundMessage
 from ..services import google_places_service
@@ -63,15 +63,16 @@ def _require_superadmin(authorization: str = Header(...)):
         raise HTTPException(status_code=401, detail="Invalid super admin token")
 
 
+def _require_sqlite():
+    if not is_sqlite():
+        raise HTTPException(status_code=400, detail="Only available with the SQLite backend")
+
+
 def _make_slug(name: str) -> str:
     slug = re.sub(r"[^\w\s-]", "", name).strip().replace(" ", "-").lower()
     return re.sub(r"-+", "-", slug)
 
 
-def _norm_name(name: str) -> str:
-    return re.sub(r"[^a-z0-9]+", "", (name or "").lower())
-
-
 def _row_to_admin(row, db) -> dict:
     hours = None
     if row["opening_hours"]:
@@ -313,6 +314,8 @@ def delete_restaurant(restaurant_id: int, authorization: str = Header(...)):
         deleted = db.execute("DELETE FROM restaurants WHERE id = ?", (restaurant_id,)).rowcount
     if not deleted:
         raise HTTPException(status_code=404, detail="Restaurant not found")
+    from ..services import archive
+    archive.delete_restaurant(restaurant_id)
 
 
 @router.post("/restaurants/{restaurant_id}/regenerate-token")
@@ -334,173 +337,154 @@ def regenerate_admin_token(restaurant_id: int, authorization: str = Header(...))
 def superadmin_scrape_deliveroo(
     restaurant_id: int,
     import_to_menu: bool = False,
+    source: str = "deliveroo",
+    force: bool = False,
     body: dict | None = Body(default=None),
     authorization: str = Header(...),
 ):
-    """Scrape Deliveroo menu for a restaurant and optionally import items. Superadmin only."""
+    """
+    Scrape a restaurant's Deliveroo (default) or Just Eat menu. Preview returns the items and the
+    diff against the current menu; import_to_menu applies it (skipped if the scraped menu hash is
+    unchanged unless force=true). Superadmin only.
+    """
     _require_superadmin(authorization)
+    from ..services.menu_import import SOURCES, import_scraped_items, make_scraper
+
+    if source not in SOURCES:
+        raise HTTPException(status_code=400, detail=f"source must be one of: {', '.join(SOURCES)}")
     url_override = (body or {}).get("url") if isinstance(body, dict) else None
     with get_db() as db:
-        row = db.execute("SELECT id, deliveroo_url FROM restaurants WHERE id = ?", (restaurant_id,)).fetchone()
+        row = db.execute(
+            f"SELECT id, {SOURCES[source]} AS menu_url FROM restaurants WHERE id = ?", (restaurant_id,)
+        ).fetchone()
         if not row:
             raise HTTPException(status_code=404, detail="Restaurant not found")
-        scrape_url = url_override or row["deliveroo_url"]
+        scrape_url = url_override or row["menu_url"]
     if not scrape_url:
-        raise HTTPException(status_code=400, detail="No Deliveroo URL configured for this restaurant")
+        label = "Deliveroo" if source == "deliveroo" else "Just Eat"
+        raise HTTPException(status_code=400, detail=f"No {label} URL configured for this restaurant")
     try:
-        from ..services.scraper_deliveroo import DeliverooScraper
-        scraper = DeliverooScraper()
-        items = scraper.scrape_menu(scrape_url)
+        items = make_scraper(source).scrape_menu(scrape_url)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Scraping failed: {str(e)}")
-    if not import_to_menu:
-        return {"items": items, "count": len(items), "source": "deliveroo", "mode": "preview"}
-    imported = 0
-    updated = 0
-    skipped = 0
-    with get_db() as db:
-        categories = db.execute(
-            "SELECT id, name FROM menu_categories WHERE restaurant_id = ?",
-            (restaurant_id,),
-        ).fetchall()
-        category_map = {_norm_name(c["name"]): c["id"] for c in categories}
-        max_display = db.execute(
-            "SELECT COALESCE(MAX(display_order), -1) as m FROM menu_categories WHERE restaurant_id = ?",
-            (restaurant_id,),
-        ).fetchone()["m"]
-        menu_rows = db.execute(
-            "SELECT id, name FROM menu_items WHERE restaurant_id = ?",
-            (restaurant_id,),
-        ).fetchall()
-        menu_by_norm = {_norm_name(m["name"]): m["id"] for m in menu_rows}
-
-        def ensure_category_id(raw_name: str) -> int | None:
-            nonlocal max_display
-            if not raw_name:
-                return None
-            key = _norm_name(raw_name)
-            if not key:
-                return None
-            if key in category_map:
-                return category_map[key]
-            max_display += 1
-            cur = db.execute(
-                "INSERT INTO menu_categories (restaurant_id, name, display_order) VALUES (?, ?, ?)",
-                (restaurant_id, raw_name.strip(), max_display),
-            )
-            category_map[key] = cur.lastrowid
-            return cur.lastrowid
-
-        for item in items:
-            name = (item.get("name") or "").strip()
-            if not name:
-                skipped += 1
-                continue
-            key = _norm_name(name)
-            if not key:
-                skipped += 1
-                continue
-            image_url = (item.get("image_url") or None)
-            category_id = ensure_category_id(item.get("category", "Other"))
-            existing_id = menu_by_norm.get(key)
-            if existing_id:
-                db.execute(
-                    """UPDATE menu_items
-                       SET description = ?, price = ?, category_id = ?, image_url = ?, source = ?, updated_at = CURRENT_TIMESTAMP
-                       WHERE id = ?""",
-                    (
-                        item.get("description") or None,
-                        float(item.get("price") or 0),
-                        category_id,
-                        image_url,
-                        "deliveroo",
-                        existing_id,
-                    ),
-                )
-                updated += 1
-            else:
-                cur = db.execute(
-                    """INSERT INTO menu_items
-                       (restaurant_id, category_id, name, description, price, image_url, source)
-                       VALUES (?, ?, ?, ?, ?, ?, ?)""",
-                    (
-                        restaurant_id,
-                        category_id,
-                        name,
-                        item.get("description") or None,
-                        float(item.get("price") or 0),
-                        image_url,
-                        "deliveroo",
-                    ),
-                )
-                menu_by_norm[key] = cur.lastrowid
-                imported += 1
+    diff = import_scraped_items(restaurant_id, items, source, apply=import_to_menu, force=force)
     return {
         "items": items,
         "count": len(items),
-        "source": "deliveroo",
-        "mode": "import",
-        "imported": imported,
-        "updated": updated,
-        "skipped": skipped,
+        "mode": "import" if import_to_menu else "preview",
+        **diff,
     }
 
 
+@router.post("/menus/rescrape", status_code=202)
+def rescrape_all_menus(body: dict | str | None = Body(default=None), authorization: str = Header(...)):
+    """
+    Start a background re-scrape + import of every active restaurant's Deliveroo / Just Eat menu.
+    Body (all optional): {"restaurant_ids": [..], "sources": ["deliveroo", "justeat"], "dry_run": false}.
+    Poll the returned status_url for per-restaurant results and timings.
+    """
+    _require_superadmin(authorization)
+    from ..services import jobs, menu_rescrape
+
+    payload = _coerce_json_object(body) if body else {}
+    if jobs.is_running(menu_rescrape.JOB_KIND):
+        raise HTTPException(status_code=409, detail="A menu rescrape is already running")
+    try:
+        restaurant_ids = [int(i) for i in payload.get("restaurant_ids") or []] or None
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=400, detail="restaurant_ids must be a list of integers")
+    sources = payload.get("sources") or None
+    if sources is not None and (not isinstance(sources, list) or not sources):
+        raise HTTPException(status_code=400, detail="sources must be a non-empty list")
+    dry_run = bool(payload.get("dry_run"))
+    params = {"trigger": "manual", "restaurant_ids": restaurant_ids, "sources": sources, "dry_run": dry_run}
+    job = jobs.submit(
+        menu_rescrape.JOB_KIND,
+        menu_rescrape.run_menu_rescrape,
+        params=params,
+        restaurant_ids=restaurant_ids,
+        sources=sources,
+        dry_run=dry_run,
+    )
+    return job.to_dict()
+
+
 @router.get("/stats")
-def get_stats(authorization: str = Header(...)):
-    """Get platform-wide statistics."""
+def get_stats(authorization: str = Header(...), fresh: bool = False):
+    """Platform-wide statistics (cached for a few seconds; pass fresh=true to recompute)."""
     _require_superadmin(authorization)
-    with get_db() as db:
-        restaurants = db.execute("SELECT COUNT(*) as c FROM restaurants").fetchone()["c"]
-        active = db.execute("SELECT COUNT(*) as c FROM restaurants WHERE is_active = 1").fetchone()["c"]
-        orders = db.execute("SELECT COUNT(*) as c FROM orders").fetchone()["c"]
-        pending = db.execute("SELECT COUNT(*) as c FROM orders WHERE status = 'pending'").fetchone()["c"]
-        revenue = db.execute("SELECT COALESCE(SUM(subtotal), 0) as total FROM orders WHERE status = 'collected'").fetchone()["total"]
-        menu_items = db.execute("SELECT COUNT(*) as c FROM menu_items").fetchone()["c"]
-    return {
-        "restaurants": restaurants,
-        "active_restaurants": active,
-        "total_orders": orders,
-        "pending_orders": pending,
-        "total_revenue": round(revenue, 2),
-        "total_menu_items": menu_items,
-    }
+    from ..services import platform_stats
+    return platform_stats.get_stats(fresh=fresh)
 
 
 @router.get("/messages", response_model=list[InboundMessage])
 def list_messages(
+    response: Response,
     authorization: str = Header(...),
     orders_only: bool = False,
     q: str | None = None,
-    limit: int = 100,
+    sort: str = "relevance",
+    before_id: int | None = None,
+    limit: int = 50,
 ):
+    """
+    Newest first, paged with before_id (pass the X-Next-Before-Id header of the previous page).
+    With q, matches come from the full-text index: sort=relevance (default) returns the best
+    `limit` matches (subject weighted highest); sort=recent pages through all matches by id.
+    """
     _require_superadmin(authorization)
-    limit = max(1, min(limit, 500))
+    from ..services import message_search
+
+    if sort not in ("relevance", "recent"):
+        raise HTTPException(status_code=400, detail="sort must be relevance or recent")
+    limit = max(1, min(limit, 200))
 
     where = []
     params: list[object] = []
+    join_sql = ""
+    order_sql = "m.id DESC"
+    ranked = False
 
     if orders_only:
-        where.append("order_number IS NOT NULL AND order_number != ''")
-
-    if q:
-        where.append("(from_addr LIKE ? OR to_addr LIKE ? OR subject LIKE ? OR body_text LIKE ?)")
+        where.append("m.order_number IS NOT NULL AND m.order_number != ''")
+
+    if q and message_search.available():
+        match = message_search.fts_query(q)
+        if match is None:
+            return []
+        join_sql = "JOIN inbound_messages_fts f ON f.rowid = m.id"
+        where.append("inbound_messages_fts MATCH ?")
+        params.append(match)
+        ranked = sort != "recent" and before_id is None
+        if ranked:
+            order_sql = f"{message_search.rank_sql()}, m.id DESC"
+    elif q:
+        like_op = sql.like()
+        where.append(f"(m.from_addr {like_op} ? OR m.to_addr {like_op} ? OR m.subject {like_op} ? OR m.body_text {like_op} ?)")
         like = f"%{q}%"
         params.extend([like, like, like, like])
 
+    if before_id is not None:
+        where.append("m.id < ?")
+        params.append(before_id)
+
     where_sql = ("WHERE " + " AND ".join(where)) if where else ""
 
     with get_db() as db:
         rows = db.execute(
-            f"""SELECT id, provider, channel, direction, from_addr, to_addr, subject, body_text, body_html,
-                       order_number, action, status, created_at
-                  FROM inbound_messages
+            f"""SELECT m.id, m.provider, m.channel, m.direction, m.from_addr, m.to_addr, m.subject,
+                       m.body_text, m.body_html, m.order_number, m.action, m.status, m.created_at
+                  FROM inbound_messages m
+                  {join_sql}
                   {where_sql}
-                  ORDER BY id DESC
+                  ORDER BY {order_sql}
                   LIMIT ?""",
             (*params, limit),
         ).fetchall()
 
+    if len(rows) == limit and not ranked:
+        response.headers["X-Next-Before-Id"] = str(min(r["id"] for r in rows))
+
     return [
         InboundMessage(
             id=r["id"],
@@ -581,17 +565,7 @@ def places_photo(
         raise HTTPException(status_code=400, detail=str(exc))
 
 
-@router.post("/places/import", response_model=RestaurantAdmin, status_code=201)
-def places_import(
-    authorization: str = Header(...),
-    body: dict | str = Body(...),
-):
-    _require_superadmin(authorization)
-    body = _coerce_json_object(body)
-    place_id = (body.get("place_id") or "").strip()
-    if not place_id:
-        raise HTTPException(status_code=422, detail="place_id is required")
-
+def _import_place(place_id: str, authorization: str) -> RestaurantAdmin:
     try:
         details = google_places_service.get_details(place_id)
     except Exception as exc:
@@ -626,33 +600,13 @@ def places_import(
     result = create_restaurant(create_payload, authorization=authorization)
     rid = result.id
 
-    # --- Download Google Places photos as permanent uploads ---
-    photo_names = details.get("photo_names") or []
-    banner_url = None
-    gallery_urls: list[str] = []
-
-    for i, pname in enumerate(photo_names[:10]):  # cap at 10 photos
-        try:
-            kind = "banner" if i == 0 else "gallery"
-            max_px = 2400 if i == 0 else 1600
-            url = google_places_service.download_photo_to_upload(
-                pname, rid, kind=kind, max_px=max_px
-            )
-            if url and i == 0:
-                banner_url = url
-            elif url:
-                gallery_urls.append(url)
-        except Exception:
-            pass  # don't fail import over a single photo
-
-    # --- Try to fetch a logo from the restaurant's website ---
-    logo_url = None
-    website = details.get("website")
-    if website:
-        try:
-            logo_url = google_places_service.fetch_website_logo(website, rid)
-        except Exception:
-            pass
+    # --- Download Google Places photos + website logo concurrently as permanent uploads ---
+    media = google_places_service.ingest_place_media(
+        details.get("photo_names") or [], rid, details.get("website")
+    )
+    banner_url = media["banner_url"]
+    logo_url = media["logo_url"]
+    gallery_urls = media["gallery_urls"]
 
     # Update the restaurant with downloaded images
     updates: dict = {}
@@ -677,16 +631,112 @@ def places_import(
     # Add gallery images
     if gallery_urls:
         with get_db() as db:
-            for order, url in enumerate(gallery_urls):
-                db.execute(
-                    "INSERT INTO gallery_images (restaurant_id, image_url, caption, display_order) "
-                    "VALUES (?, ?, NULL, ?)",
-                    (rid, url, order),
-                )
+            db.executemany(
+                "INSERT INTO gallery_images (restaurant_id, image_url, caption, display_order) "
+                "VALUES (?, ?, NULL, ?)",
+                [(rid, url, order) for order, url in enumerate(gallery_urls)],
+            )
 
     return result
 
 
+def _place_id_from_body(body: dict | str) -> str:
+    body = _coerce_json_object(body)
+    place_id = (body.get("place_id") or "").strip()
+    if not place_id:
+        raise HTTPException(status_code=422, detail="place_id is required")
+    return place_id
+
+
+@router.get("/places/usage")
+def places_usage(authorization: str = Header(...), days: int = 7):
+    """Per-day Places API calls vs cache hits (for quota tracking)."""
+    _require_superadmin(authorization)
+    return {"days": google_places_service.usage_summary(days=max(1, min(days, 90)))}
+
+
+@router.post("/places/import", response_model=RestaurantAdmin, status_code=201)
+def places_import(
+    authorization: str = Header(...),
+    body: dict | str = Body(...),
+):
+    _require_superadmin(authorization)
+    return _import_place(_place_id_from_body(body), authorization)
+
+
+@router.post("/places/import/async", status_code=202)
+def places_import_async(
+    authorization: str = Header(...),
+    body: dict | str = Body(...),
+):
+    """Run the whole import (details, photos, logo) as a background job; poll the returned status_url."""
+    _require_superadmin(authorization)
+    place_id = _place_id_from_body(body)
+
+    from ..services import jobs
+
+    def run(job, place_id: str):
+        job.update(stage="importing")
+        return _import_place(place_id, authorization).model_dump()
+
+    job = jobs.submit("places_import", run, place_id, params={"place_id": place_id})
+    return job.to_dict()
+
+
+@router.post("/places/sweep", status_code=202)
+def places_sweep(
+    authorization: str = Header(...),
+    body: dict | str = Body(...),
+):
+    """
+    Onboard a whole area in one background job.
+    Body: {"lat", "lng", "radius_m", "query"?, "max_pages"?} for an area sweep, or
+    {"csv_text": "..."} / {"use_bundled_csv": true} to match venues from a CSV.
+    Optional: max_imports, concurrency, dry_run.
+    """
+    _require_superadmin(authorization)
+    body = _coerce_json_object(body)
+
+    from ..services import area_sweep, jobs
+
+    if jobs.is_running("places_sweep"):
+        raise HTTPException(status_code=409, detail="A sweep is already running")
+
+    csv_rows = None
+    if body.get("csv_text"):
+        csv_rows = area_sweep.parse_csv(str(body["csv_text"]))
+    elif body.get("use_bundled_csv"):
+        if not area_sweep.BUNDLED_CSV.exists():
+            raise HTTPException(status_code=400, detail="Bundled CSV not found on this server")
+        csv_rows = area_sweep.parse_csv(area_sweep.BUNDLED_CSV.read_text(encoding="utf-8"))
+    elif body.get("lat") is None or body.get("lng") is None:
+        raise HTTPException(status_code=422, detail="lat and lng (or csv_text / use_bundled_csv) are required")
+
+    try:
+        kwargs = {
+            "query": (body.get("query") or "restaurants").strip(),
+            "lat": float(body["lat"]) if body.get("lat") is not None else None,
+            "lng": float(body["lng"]) if body.get("lng") is not None else None,
+            "radius_m": int(body.get("radius_m") or 1500),
+            "csv_rows": csv_rows,
+            "max_pages": int(body.get("max_pages") or 3),
+            "max_imports": int(body.get("max_imports") or 60),
+            "concurrency": int(body.get("concurrency") or 3),
+            "dry_run": bool(body.get("dry_run")),
+        }
+    except (TypeError, ValueError) as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
+
+    job = jobs.submit(
+        "places_sweep",
+        area_sweep.run_area_sweep,
+        lambda place_id: _import_place(place_id, authorization),
+        params={k: v for k, v in kwargs.items() if k != "csv_rows"} | {"csv_rows": len(csv_rows) if csv_rows else None},
+        **kwargs,
+    )
+    return job.to_dict()
+
+
 @router.post("/places/fill/{restaurant_id}")
 def places_fill(
     restaurant_id: int,
@@ -729,33 +779,13 @@ def places_fill(
     except Exception as exc:
         raise HTTPException(status_code=400, detail=str(exc))
 
-    # Download photos
-    photo_names = details.get("photo_names") or []
-    banner_url = None
-    gallery_urls: list[str] = []
-
-    for i, pname in enumerate(photo_names[:10]):
-        try:
-            kind = "banner" if i == 0 else "gallery"
-            max_px = 2400 if i == 0 else 1600
-            url = google_places_service.download_photo_to_upload(
-                pname, restaurant_id, kind=kind, max_px=max_px
-            )
-            if url and i == 0:
-                banner_url = url
-            elif url:
-                gallery_urls.append(url)
-        except Exception:
-            pass
-
-    # Try to fetch logo from the restaurant's website
-    logo_url = None
-    website = details.get("website")
-    if website:
-        try:
-            logo_url = google_places_service.fetch_website_logo(website, restaurant_id)
-        except Exception:
-            pass
+    # Download photos + website logo concurrently
+    media = google_places_service.ingest_place_media(
+        details.get("photo_names") or [], restaurant_id, details.get("website")
+    )
+    banner_url = media["banner_url"]
+    logo_url = media["logo_url"]
+    gallery_urls = media["gallery_urls"]
 
     # Build DB updates — always overwrite images, only fill text if currently empty
     updates: dict = {}
@@ -781,12 +811,11 @@ def places_fill(
     # Add gallery images (additive — don't wipe existing)
     if gallery_urls:
         with get_db() as db:
-            for order, url in enumerate(gallery_urls):
-                db.execute(
-                    "INSERT INTO gallery_images (restaurant_id, image_url, caption, display_order) "
-                    "VALUES (?, ?, NULL, ?)",
-                    (restaurant_id, url, order),
-                )
+            db.executemany(
+                "INSERT INTO gallery_images (restaurant_id, image_url, caption, display_order) "
+                "VALUES (?, ?, NULL, ?)",
+                [(restaurant_id, url, order) for order, url in enumerate(gallery_urls)],
+            )
 
     return {
         "ok": True,
@@ -801,6 +830,276 @@ def places_fill(
     }
 
 
+# --- Instagram cache ---
+
+@router.get("/instagram/refresh-status")
+def instagram_refresh_status(authorization: str = Header(...)):
+    """Show handles queued for background refresh and any per-handle backoff."""
+    _require_superadmin(authorization)
+    from ..services.instagram_service import refresh_status
+    return refresh_status()
+
+
+@router.post("/instagram/cache")
+def instagram_cache_ingest(
+    background_tasks: BackgroundTasks,
+    body: dict | str = Body(...),
+    authorization: str = Header(...),
+):
+    """
+    Bulk upsert posts scraped off-server (see scripts/refresh_instagram_cache.py).
+    Body: {"handles": {"handle": [post, ...], ...}} — a bare {handle: posts} map is also accepted.
+    """
+    _require_superadmin(authorization)
+    body = _coerce_json_object(body)
+    batch = body.get("handles") if isinstance(body.get("handles"), dict) else body
+    if not all(isinstance(v, list) for v in batch.values()):
+        raise HTTPException(status_code=422, detail="Each handle must map to a list of posts")
+
+    from ..services.instagram_service import ingest_posts, mirror_cached_handles
+    result = ingest_posts(batch)
+    if result["updated"]:
+        background_tasks.add_task(mirror_cached_handles, result["updated"])
+    return {"ok": True, **result}
+
+
+# --- Media ---
+
+@router.post("/media/variants/backfill", status_code=202)
+def backfill_media_variants(authorization: str = Header(...), limit: int | None = None):
+    """Render responsive variants for existing uploads (gallery, banners, logos, menu images) in the background."""
+    _require_superadmin(authorization)
+    from ..services import jobs, media_variants
+
+    if jobs.is_running("media_variants_backfill"):
+        raise HTTPException(status_code=409, detail="A variant backfill is already running")
+    job = jobs.submit("media_variants_backfill", media_variants.backfill, params={"limit": limit}, limit=limit)
+    return job.to_dict()
+
+
+@router.post("/media/gc", status_code=202)
+def collect_media_garbage(
+    authorization: str = Header(...),
+    dry_run: bool = False,
+    grace_hours: float | None = None,
+):
+    """Delete stored images (and their variants) no restaurant, dish or gallery row references."""
+    _require_superadmin(authorization)
+    from ..services import jobs, media_store
+
+    if jobs.is_running(media_store.JOB_KIND):
+        raise HTTPException(status_code=409, detail="Media GC is already running")
+    if grace_hours is not None and grace_hours < 0:
+        raise HTTPException(status_code=400, detail="grace_hours must be >= 0")
+    job = jobs.submit(
+        media_store.JOB_KIND,
+        media_store.collect_garbage,
+        params={"dry_run": dry_run, "grace_hours": grace_hours},
+        dry_run=dry_run,
+        grace_hours=grace_hours,
+    )
+    return job.to_dict()
+
+
+# --- Archive ---
+
+@router.post("/archive", status_code=202)
+def run_archive(
+    authorization: str = Header(...),
+    dry_run: bool = False,
+    order_days: int | None = None,
+    message_days: int | None = None,
+):
+    """
+    Move old collected/cancelled orders and old inbound messages to the archive database and
+    purge expired verification codes and magic links. 0 days skips that part.
+    """
+    _require_superadmin(authorization)
+    _require_sqlite()
+    from ..services import archive, jobs
+
+    if jobs.is_running(archive.JOB_KIND):
+        raise HTTPException(status_code=409, detail="An archive run is already in progress")
+    if (order_days is not None and order_days < 0) or (message_days is not None and message_days < 0):
+        raise HTTPException(status_code=400, detail="order_days and message_days must be >= 0")
+    job = jobs.submit(
+        archive.JOB_KIND,
+        archive.run_archive,
+        params={"dry_run": dry_run, "order_days": order_days, "message_days": message_days},
+        dry_run=dry_run,
+        order_days=order_days,
+        message_days=message_days,
+    )
+    return job.to_dict()
+
+
+# --- Database ---
+
+@router.post("/db/maintenance", status_code=202)
+def run_db_maintenance(
+    authorization: str = Header(...),
+    full_vacuum: bool = False,
+    vacuum_pages: int | None = None,
+):
+    """
+    ANALYZE / PRAGMA optimize, incremental vacuum and a WAL checkpoint in the background.
+    full_vacuum=true rewrites the whole database (blocking writers while it runs).
+    """
+    _require_superadmin(authorization)
+    _require_sqlite()
+    from ..services import db_maintenance, jobs
+
+    if jobs.is_running(db_maintenance.JOB_KIND):
+        raise HTTPException(status_code=409, detail="Database maintenance is already running")
+    if vacuum_pages is not None and vacuum_pages < 0:
+        raise HTTPException(status_code=400, detail="vacuum_pages must be >= 0")
+    job = jobs.submit(
+        db_maintenance.JOB_KIND,
+        db_maintenance.run_maintenance,
+        params={"full_vacuum": full_vacuum, "vacuum_pages": vacuum_pages},
+        full_vacuum=full_vacuum,
+        vacuum_pages=vacuum_pages,
+    )
+    return job.to_dict()
+
+
+@router.post("/db/checkpoint")
+def run_db_checkpoint(authorization: str = Header(...), mode: str = "TRUNCATE"):
+    """Checkpoint the WAL now (PASSIVE, FULL, RESTART or TRUNCATE); never waits on locks."""
+    _require_superadmin(authorization)
+    _require_sqlite()
+    from ..services import db_maintenance
+
+    try:
+        return db_maintenance.checkpoint(mode)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.post("/db/backups", status_code=202)
+def run_db_backup(authorization: str = Header(...)):
+    """Take an online, integrity-checked snapshot of the database(s) in the background."""
+    _require_superadmin(authorization)
+    _require_sqlite()
+    from ..services import db_backup, jobs
+
+    if jobs.is_running(db_backup.JOB_KIND):
+        raise HTTPException(status_code=409, detail="A backup is already running")
+    job = jobs.submit(db_backup.JOB_KIND, db_backup.run_backup, params={"trigger": "manual"})
+    return job.to_dict()
+
+
+@router.get("/db/backups")
+def list_db_backups(authorization: str = Header(...)):
+    _require_superadmin(authorization)
+    _require_sqlite()
+    from ..services import db_backup
+    return {"snapshots": db_backup.list_snapshots(), "stats": db_backup.stats()}
+
+
+@router.get("/db/backups/{file_name}")
+def download_db_backup(file_name: str, authorization: str = Header(...)):
+    _require_superadmin(authorization)
+    _require_sqlite()
+    from fastapi.responses import FileResponse
+    from ..services import db_backup
+
+    path = db_backup.snapshot_file(file_name)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Backup not found")
+    return FileResponse(path, media_type="application/gzip", filename=path.name)
+
+
+# --- Flyers ---
+
+@router.post("/flyers/batch", status_code=202)
+def render_flyer_batch(body: dict | str | None = Body(default=None), authorization: str = Header(...)):
+    """
+    Render (or reuse cached) flyers for every active restaurant in the background.
+    Body (all optional): {"format": "png"|"pdf", "restaurant_ids": [..], "include_inactive": false}.
+    PNG batches are zipped; PDF batches are one print-ready A5 page per restaurant.
+    """
+    _require_superadmin(authorization)
+    from ..services import flyers, jobs
+
+    payload = _coerce_json_object(body) if body else {}
+    if jobs.is_running(flyers.JOB_KIND):
+        raise HTTPException(status_code=409, detail="A flyer batch is already running")
+    fmt = (payload.get("format") or "png").lower()
+    if fmt not in ("png", "pdf"):
+        raise HTTPException(status_code=400, detail="format must be png or pdf")
+    try:
+        restaurant_ids = [int(i) for i in payload.get("restaurant_ids") or []] or None
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=400, detail="restaurant_ids must be a list of integers")
+    active_only = not payload.get("include_inactive")
+    job = jobs.submit(
+        flyers.JOB_KIND,
+        flyers.render_batch,
+        params={"format": fmt, "restaurant_ids": restaurant_ids, "active_only": active_only},
+        fmt=fmt,
+        restaurant_ids=restaurant_ids,
+        active_only=active_only,
+    )
+    return job.to_dict()
+
+
+@router.get("/flyers/batch/{file_name}")
+def download_flyer_batch(file_name: str, authorization: str = Header(...)):
+    """Download a finished batch (the `file` from the job result)."""
+    _require_superadmin(authorization)
+    from fastapi.responses import FileResponse
+    from ..services import flyers
+
+    path = flyers.batch_file(file_name)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    media_type = "application/pdf" if path.suffix == ".pdf" else "application/zip"
+    return FileResponse(path, media_type=media_type, filename=f"ForkItt-Flyers{path.suffix}")
+
+
+# --- Background jobs ---
+
+@router.get("/jobs")
+def list_jobs(authorization: str = Header(...), kind: str | None = None, limit: int = 50):
+    _require_superadmin(authorization)
+    from ..services import jobs
+    return jobs.recent(kind=kind, limit=max(1, min(limit, 100)))
+
+
+@router.get("/jobs/{job_id}")
+def get_job(job_id: str, authorization: str = Header(...)):
+    _require_superadmin(authorization)
+    from ..services import jobs
+    job = jobs.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
+
+
+# --- Metrics ---
+
+@router.get("/metrics")
+def get_metrics(authorization: str = Header(...)):
+    """In-process counters for background jobs and upstream fetches (reset on restart)."""
+    _require_superadmin(authorization)
+    from ..services import browser_pool, db_backup, db_maintenance, image_pool, media_cache, scraper_deliveroo, singleflight
+    if is_sqlite():
+        database, backups = db_maintenance.stats(), db_backup.stats()
+    else:
+        from .. import db_postgres
+        database, backups = db_postgres.stats(), None
+    return {
+        "singleflight": singleflight.all_stats(),
+        "browser_pool": browser_pool.stats(),
+        "deliveroo_scrape": scraper_deliveroo.scrape_stats(),
+        "image_pool": image_pool.stats(),
+        "media_cache": media_cache.stats(),
+        "database": database,
+        "backups": backups,
+    }
+
+
 # --- Email Templates ---
 
 @router.get("/email-templates")
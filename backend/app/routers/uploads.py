@@ -1,11 +1,10 @@
-import os
-import secrets
 from pathlib import Path
 
 from fastapi import APIRouter, File, Form, Header, HTTPException, UploadFile
 
 from .. import config
 from ..database import get_db
+from ..services import media_store, media_variants
 
 router = APIRouter(prefix="/uploads", tags=["uploads"])
 
@@ -81,6 +80,8 @@ def _resize_in_place(path: Path, kind: str) -> None:
         "logo": (512, 512),
         "banner": (2400, 1350),
         "gallery": (2000, 2000),
+        "instagram": (1080, 1080),
+        "instagram_thumb": (540, 540),
     }
     max_w, max_h = limits.get(kind, (1600, 1600))
 
@@ -114,6 +115,42 @@ def _resize_in_place(path: Path, kind: str) -> None:
             return
 
 
+def _save_webp_copy(src: Path, dest: Path) -> None:
+    # Re-encode an already resized image as WebP alongside the original.
+    from PIL import Image
+
+    with Image.open(src) as img:
+        if img.mode not in ("RGB", "RGBA"):
+            img = img.convert("RGB")
+        img.save(dest, format="WEBP", quality=80, method=6)
+
+
+def _store_upload(target_path: Path, data: bytes, ext: str, kind: str) -> dict | None:
+    # Runs in the image pool: write, check magic bytes, resize. None if it isn't an image,
+    # otherwise the final {width, height, format} (empty if Pillow couldn't read it).
+    _ensure_dir(target_path.parent)
+    target_path.write_bytes(data)
+    if not _looks_like_image(target_path, ext):
+        try:
+            target_path.unlink(missing_ok=True)
+        except Exception:
+            pass
+        return None
+
+    # Resize/optimize best-effort.
+    try:
+        _resize_in_place(target_path, kind)
+    except Exception:
+        pass
+    try:
+        from PIL import Image
+
+        with Image.open(target_path) as img:
+            return {"width": img.width, "height": img.height, "format": media_variants._image_format(img)}
+    except Exception:
+        return {}
+
+
 @router.post("/image")
 async def upload_image(
     file: UploadFile = File(...),
@@ -148,44 +185,28 @@ async def upload_image(
         else:
             raise HTTPException(status_code=400, detail=f"Unsupported content type: {file.content_type}")
 
-    base_dir = Path(config.UPLOAD_DIR)
-    target_dir = base_dir / f"r{rid}" / kind
-    _ensure_dir(target_dir)
-
-    fname = f"{secrets.token_urlsafe(12)}{ext}"
-    target_path = target_dir / fname
-
-    # Stream to disk with size limit.
-    total = 0
-    with target_path.open("wb") as out:
-        while True:
-            chunk = await file.read(1024 * 256)
-            if not chunk:
-                break
-            total += len(chunk)
-            if total > config.UPLOAD_MAX_BYTES:
-                out.close()
-                try:
-                    target_path.unlink(missing_ok=True)
-                except Exception:
-                    pass
-                raise HTTPException(status_code=413, detail="File too large")
-            out.write(chunk)
-
-    if not _looks_like_image(target_path, ext):
-        try:
-            target_path.unlink(missing_ok=True)
-        except Exception:
-            pass
+    # Read with size limit, then write/validate/resize/hash in the image pool so neither disk
+    # IO nor Pillow runs on the event loop. Identical images share one content-addressed file.
+    buf = bytearray()
+    while True:
+        chunk = await file.read(1024 * 256)
+        if not chunk:
+            break
+        buf += chunk
+        if len(buf) > config.UPLOAD_MAX_BYTES:
+            raise HTTPException(status_code=413, detail="File too large")
+    total = len(buf)
+
+    info = await media_store.store_async(bytes(buf), ext, kind)
+    if info is None:
         raise HTTPException(status_code=400, detail="Uploaded file is not a valid image")
+    url = info["url"]
 
-    # Resize/optimize best-effort.
-    try:
-        _resize_in_place(target_path, kind)
-    except Exception:
-        pass
-
-    rel = target_path.relative_to(base_dir).as_posix()
-    url = f"{config.UPLOAD_BASE_PATH}/{rel}"
+    # Responsive variants render in the background; report what they will be (or already are).
+    variants = None
+    if info.get("width"):
+        if not media_variants.schedule(url):
+            variants = media_variants.lookup([url]).get(url)
+        variants = variants or media_variants.planned_metadata(url, info["width"], info["height"], info["format"])
 
-    return {"ok": True, "url": url, "bytes": total}
+    return {"ok": True, "url": url, "bytes": total, "variants": variants}
@@ -70,8 +70,8 @@ async def twilio_whatsapp_webhook(request: Request):
     with get_db() as db:
         db.execute(
             """INSERT INTO inbound_messages
-               (provider, channel, direction, from_addr, to_addr, body_text, status, meta_json)
-               VALUES ('twilio', 'whatsapp', 'inbound', ?, ?, ?, 'ok', ?)""",
+               (provider, channel, direction, from_addr, to_addr, body_text, status, meta_json, provider_sid)
+               VALUES ('twilio', 'whatsapp', 'inbound', ?, ?, ?, 'ok', ?, ?)""",
             (
                 from_number,
                 to_number,
@@ -81,6 +81,7 @@ async def twilio_whatsapp_webhook(request: Request):
                     "button_text": button_text,
                     "button_payload": button_payload,
                 }),
+                message_sid,
             ),
         )
         # Mark the sender as verified (any inbound WhatsApp proves they own the number)
@@ -0,0 +1,380 @@
+"""
+Hot/cold split for orders.db.
+
+Collected and cancelled orders older than ORDER_ARCHIVE_DAYS (with their items) and inbound
+messages older than MESSAGE_ARCHIVE_DAYS are moved into a separate SQLite file
+(ARCHIVE_DATABASE_PATH), attached as `archive` while the job runs. Expired verification codes
+and magic links are deleted outright. The live tables stay small, so stats scans and WAL
+checkpoints only touch recent rows; lookups by order number / owner token fall back to the
+archive through find_order().
+
+Orders with a review are left in place: reviews.order_id references orders(id) and reviews
+feed the live restaurant ratings.
+
+In WAL mode a transaction spanning two attached databases is atomic per file, not across
+both. Each batch is therefore two transactions: the INSERT OR IGNORE copy into the archive
+is committed first, then the rows are deleted from the live tables and that is committed.
+A crash in between leaves the rows in both files; the next run copies them again (ignored
+as duplicates) and finishes the delete.
+"""
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+
+from .. import config
+from ..database import get_db
+
+log = logging.getLogger(__name__)
+
+JOB_KIND = "archive"
+BATCH_SIZE = 500
+
+# table -> extra archive indexes (name, columns)
+_TABLES = {
+    "orders": (
+        ("idx_archive_orders_number", "order_number"),
+        ("idx_archive_orders_token", "owner_action_token"),
+        ("idx_archive_orders_restaurant", "restaurant_id"),
+    ),
+    "order_items": (("idx_archive_order_items_order", "order_id"),),
+    "inbound_messages": (
+        ("idx_archive_inbound_messages_created", "created_at"),
+        ("idx_archive_inbound_messages_order", "order_number"),
+    ),
+}
+_LOOKUP_COLUMNS = ("id", "order_number", "owner_action_token")
+# One customer per (name, email), as the admin customer list and counts group them.
+CUSTOMER_KEY = "LOWER(TRIM(customer_name)) || '|' || LOWER(TRIM(COALESCE(customer_email, '')))"
+
+_lock = threading.Lock()
+_totals: dict | None = None  # archived order totals, reset by each archive run
+
+
+def _archive_exists() -> bool:
+    return os.path.exists(config.ARCHIVE_DATABASE_PATH)
+
+
+def _attach(db: sqlite3.Connection) -> None:
+    os.makedirs(os.path.dirname(os.path.abspath(config.ARCHIVE_DATABASE_PATH)), exist_ok=True)
+    db.execute("ATTACH DATABASE ? AS archive", (config.ARCHIVE_DATABASE_PATH,))
+    db.execute("PRAGMA archive.journal_mode=WAL")
+
+
+def _columns(db: sqlite3.Connection, schema: str, table: str) -> list[tuple[str, str]]:
+    return [(r["name"], r["type"]) for r in db.execute(f"PRAGMA {schema}.table_info({table})").fetchall()]
+
+
+def _ensure_schema(db: sqlite3.Connection) -> dict[str, list[str]]:
+    """
+    Mirror the live column lists into the archive (no foreign keys: restaurants and menu
+    items aren't archived). Columns added to a live table later are added here too.
+    Returns table -> live column names, the column list used when copying.
+    """
+    columns = {}
+    for table, indexes in _TABLES.items():
+        live = _columns(db, "main", table)
+        archived = {name for name, _ in _columns(db, "archive", table)}
+        if not archived:
+            defs = ", ".join(
+                f"{name} INTEGER PRIMARY KEY" if name == "id" else f"{name} {col_type}" for name, col_type in live
+            )
+            db.execute(f"CREATE TABLE archive.{table} ({defs}, archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)")
+        else:
+            for name, col_type in live:
+                if name not in archived:
+                    db.execute(f"ALTER TABLE archive.{table} ADD COLUMN {name} {col_type}")
+        for index, column in indexes:
+            db.execute(f"CREATE INDEX IF NOT EXISTS archive.{index} ON {table}({column})")
+        columns[table] = [name for name, _ in live]
+    return columns
+
+
+def _copy(db: sqlite3.Connection, table: str, columns: list[str], where: str, ids: list[int]) -> None:
+    cols = ", ".join(columns)
+    marks = ",".join("?" * len(ids))
+    db.execute(
+        f"INSERT OR IGNORE INTO archive.{table} ({cols}) SELECT {cols} FROM main.{table} WHERE {where} IN ({marks})",
+        ids,
+    )
+
+
+def _delete(db: sqlite3.Connection, table: str, where: str, ids: list[int]) -> int:
+    marks = ",".join("?" * len(ids))
+    return db.execute(f"DELETE FROM main.{table} WHERE {where} IN ({marks})", ids).rowcount
+
+
+def _archive_orders(db: sqlite3.Connection, columns: dict, days: int, dry_run: bool, job) -> dict:
+    select = """
+        SELECT o.id FROM main.orders o
+        WHERE o.status IN ('collected', 'cancelled')
+          AND COALESCE(o.status_changed_at, o.created_at) < datetime('now', ?)
+          AND NOT EXISTS (SELECT 1 FROM main.reviews r WHERE r.order_id = o.id)
+        ORDER BY o.id LIMIT ?
+    """
+    age = f"-{days} days"
+    if dry_run:
+        n = db.execute(f"SELECT COUNT(*) FROM ({select})", (age, -1)).fetchone()[0]
+        return {"orders": n, "order_items": None}
+
+    moved_orders = moved_items = 0
+    while True:
+        ids = [r[0] for r in db.execute(select, (age, BATCH_SIZE)).fetchall()]
+        if not ids:
+            break
+        _copy(db, "order_items", columns["order_items"], "order_id", ids)
+        _copy(db, "orders", columns["orders"], "id", ids)
+        db.commit()  # archive copy durable before the live rows go
+        moved_items += _delete(db, "order_items", "order_id", ids)
+        moved_orders += _delete(db, "orders", "id", ids)
+        db.commit()
+        if job is not None:
+            job.update(orders=moved_orders)
+    return {"orders": moved_orders, "order_items": moved_items}
+
+
+def _archive_messages(db: sqlite3.Connection, columns: dict, days: int, dry_run: bool) -> int:
+    select = "SELECT id FROM main.inbound_messages WHERE created_at < datetime('now', ?) ORDER BY id LIMIT ?"
+    age = f"-{days} days"
+    if dry_run:
+        return db.execute(f"SELECT COUNT(*) FROM ({select})", (age, -1)).fetchone()[0]
+    moved = 0
+    while True:
+        ids = [r[0] for r in db.execute(select, (age, BATCH_SIZE)).fetchall()]
+        if not ids:
+            break
+        _copy(db, "inbound_messages", columns["inbound_messages"], "id", ids)
+        db.commit()
+        moved += _delete(db, "inbound_messages", "id", ids)
+        db.commit()
+    return moved
+
+
+def _purge_expired(db: sqlite3.Connection, dry_run: bool) -> dict:
+    now = datetime.now(timezone.utc).isoformat()
+    result = {}
+    for table in ("verification_codes", "magic_links"):
+        if dry_run:
+            result[table] = db.execute(f"SELECT COUNT(*) FROM main.{table} WHERE expires_at < ?", (now,)).fetchone()[0]
+        else:
+            result[table] = db.execute(f"DELETE FROM main.{table} WHERE expires_at < ?", (now,)).rowcount
+    return result
+
+
+def run_archive(job=None, *, dry_run: bool = False, order_days: int | None = None, message_days: int | None = None) -> dict:
+    """
+    Move old finished orders and old inbound messages to the archive database and delete
+    expired verification codes / magic links. dry_run only counts what would be affected.
+    A days value of 0 disables that part.
+    """
+    global _totals
+    order_days = config.ORDER_ARCHIVE_DAYS if order_days is None else order_days
+    message_days = config.MESSAGE_ARCHIVE_DAYS if message_days is None else message_days
+    started = time.time()
+
+    with get_db() as db:
+        _attach(db)
+        try:
+            columns = _ensure_schema(db)
+            db.commit()
+            orders = (
+                _archive_orders(db, columns, order_days, dry_run, job)
+                if order_days > 0 else {"orders": 0, "order_items": 0}
+            )
+            messages = _archive_messages(db, columns, message_days, dry_run) if message_days > 0 else 0
+            purged = _purge_expired(db, dry_run)
+            db.commit()
+        except Exception:
+            db.rollback()  # DETACH fails while a transaction is open
+            raise
+        finally:
+            db.execute("DETACH DATABASE archive")
+
+    if not dry_run:
+        with _lock:
+            _totals = None
+    result = {
+        "dry_run": dry_run,
+        "order_days": order_days,
+        "message_days": message_days,
+        "archived_orders": orders["orders"],
+        "archived_order_items": orders["order_items"],
+        "archived_messages": messages,
+        "purged_verification_codes": purged["verification_codes"],
+        "purged_magic_links": purged["magic_links"],
+        "duration_ms": round((time.time() - started) * 1000, 1),
+    }
+    log.info("Archive run: %s", result)
+    return result
+
+
+def run_scheduled() -> None:
+    """Scheduler entry point: queue an archive run unless one is already running."""
+    from . import jobs
+
+    if jobs.is_running(JOB_KIND):
+        log.info("Archive already running; skipping scheduled run")
+        return
+    jobs.submit(JOB_KIND, run_archive, params={"trigger": "scheduled"})
+
+
+# ---------------------------------------------------------------------------
+# Read side
+# ---------------------------------------------------------------------------
+
+def _connect_readonly() -> sqlite3.Connection | None:
+    if not _archive_exists():
+        return None
+    conn = sqlite3.connect(f"file:{config.ARCHIVE_DATABASE_PATH}?mode=ro", uri=True)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+def find_order(column: str, value) -> tuple[dict, list[dict]] | None:
+    """(order, items) for an archived order looked up by id, order_number or owner_action_token."""
+    if column not in _LOOKUP_COLUMNS:
+        raise ValueError(f"Unsupported lookup column: {column}")
+    conn = _connect_readonly()
+    if conn is None:
+        return None
+    try:
+        order = conn.execute(f"SELECT * FROM orders WHERE {column} = ?", (value,)).fetchone()
+        if not order:
+            return None
+        items = conn.execute("SELECT * FROM order_items WHERE order_id = ? ORDER BY id", (order["id"],)).fetchall()
+    except sqlite3.OperationalError:
+        return None  # archive file exists but no run has created the tables yet
+    finally:
+        conn.close()
+    return dict(order), [dict(i) for i in items]
+
+
+def list_orders(restaurant_id: int, status: str | None = None) -> list[tuple[dict, list[dict]]]:
+    """A restaurant's archived orders with their items, newest first."""
+    conn = _connect_readonly()
+    if conn is None:
+        return []
+    where, params = "restaurant_id = ?", [restaurant_id]
+    if status:
+        where += " AND status = ?"
+        params.append(status)
+    try:
+        orders = conn.execute(f"SELECT * FROM orders WHERE {where} ORDER BY created_at DESC", params).fetchall()
+        items = conn.execute(
+            f"SELECT * FROM order_items WHERE order_id IN (SELECT id FROM orders WHERE {where}) ORDER BY id",
+            params,
+        ).fetchall()
+    except sqlite3.OperationalError:
+        return []
+    finally:
+        conn.close()
+    by_order: dict[int, list[dict]] = {}
+    for i in items:
+        by_order.setdefault(i["order_id"], []).append(dict(i))
+    return [(dict(o), by_order.get(o["id"], [])) for o in orders]
+
+
+def customer_groups(restaurant_id: int) -> dict[str, dict]:
+    """
+    CUSTOMER_KEY -> order_count, last_order_at, sms_optin and the contact details of the
+    latest archived order, for merging into the live customer list.
+    """
+    conn = _connect_readonly()
+    if conn is None:
+        return {}
+    try:
+        rows = conn.execute(
+            f"""SELECT g.customer_key, o.customer_name, o.customer_email, o.customer_phone,
+                       g.order_count, g.last_order_at, g.sms_optin
+                FROM (SELECT {CUSTOMER_KEY} AS customer_key, COUNT(*) AS order_count,
+                             MAX(created_at) AS last_order_at, MAX(sms_optin) AS sms_optin, MAX(id) AS last_id
+                      FROM orders WHERE restaurant_id = ? GROUP BY customer_key) g
+                JOIN orders o ON o.id = g.last_id""",
+            (restaurant_id,),
+        ).fetchall()
+    except sqlite3.OperationalError:
+        return {}
+    finally:
+        conn.close()
+    return {r["customer_key"]: dict(r) for r in rows}
+
+
+def order_totals(restaurant_id: int | None = None) -> dict:
+    """
+    Archived order count, collected revenue and the subtotal of all archived orders,
+    platform-wide or for one restaurant.
+    """
+    global _totals
+    if restaurant_id is None:
+        with _lock:
+            if _totals is not None:
+                return _totals
+    empty = {"orders": 0, "revenue": 0.0, "subtotal": 0.0}
+    conn = _connect_readonly()
+    if conn is None:
+        return empty
+    sql = """SELECT COUNT(*) AS orders,
+                    COALESCE(SUM(CASE WHEN status = 'collected' THEN subtotal END), 0) AS revenue,
+                    COALESCE(SUM(subtotal), 0) AS subtotal
+             FROM orders"""
+    try:
+        if restaurant_id is None:
+            row = conn.execute(sql).fetchone()
+        else:
+            row = conn.execute(sql + " WHERE restaurant_id = ?", (restaurant_id,)).fetchone()
+    except sqlite3.OperationalError:
+        return empty
+    finally:
+        conn.close()
+    totals = dict(row)
+    if restaurant_id is None:
+        with _lock:
+            _totals = totals
+    return totals
+
+
+def delete_order(order_id: int, restaurant_id: int) -> bool:
+    """Delete one archived order (and its items) of a restaurant. False if there is none."""
+    if not _archive_exists():
+        return False
+    global _totals
+    conn = sqlite3.connect(config.ARCHIVE_DATABASE_PATH)
+    try:
+        with conn:
+            deleted = conn.execute(
+                "DELETE FROM orders WHERE id = ? AND restaurant_id = ?", (order_id, restaurant_id)
+            ).rowcount
+            if deleted:
+                conn.execute("DELETE FROM order_items WHERE order_id = ?", (order_id,))
+    except sqlite3.OperationalError:
+        return False
+    finally:
+        conn.close()
+    if deleted:
+        with _lock:
+            _totals = None
+    return bool(deleted)
+
+
+def delete_restaurant(restaurant_id: int) -> None:
+    """Drop a deleted restaurant's archived orders and items."""
+    if not _archive_exists():
+        return
+    global _totals
+    conn = sqlite3.connect(config.ARCHIVE_DATABASE_PATH)
+    try:
+        with conn:
+            conn.execute(
+                "DELETE FROM order_items WHERE order_id IN (SELECT id FROM orders WHERE restaurant_id = ?)",
+                (restaurant_id,),
+            )
+            conn.execute("DELETE FROM orders WHERE restaurant_id = ?", (restaurant_id,))
+    except sqlite3.OperationalError:
+        pass
+    finally:
+        conn.close()
+    with _lock:
+        _totals = None
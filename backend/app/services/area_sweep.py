@@ -0,0 +1,172 @@
+"""Bulk onboarding: sweep an area (or a CSV of venues) on Google Places and import every new restaurant."""
+
+import csv
+import io
+import logging
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Callable
+
+from ..database import get_db
+from . import google_places_service
+from .pacing import Pacer
+
+log = logging.getLogger(__name__)
+
+BUNDLED_CSV = Path(__file__).resolve().parents[3] / "scripts" / "HakcneyResturants.csv"
+MAX_PAGES = 10
+MAX_CONCURRENCY = 4
+
+
+def _distance_m(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    r = 6371000.0
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dp, dl = p2 - p1, math.radians(lng2 - lng1)
+    a = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 2 * r * math.asin(math.sqrt(a))
+
+
+def parse_csv(text: str) -> list[dict]:
+    """Rows with at least a restaurant name; accepts the HakcneyResturants.csv column layout."""
+    rows = []
+    for raw in csv.DictReader(io.StringIO(text)):
+        row = {(k or "").strip().lower(): (v or "").strip() for k, v in raw.items()}
+        name = row.get("restaurant") or row.get("name")
+        if name:
+            rows.append({"name": name, "address": row.get("address") or ""})
+    return rows
+
+
+def _candidates_from_area(job, query: str, lat: float, lng: float, radius_m: int, max_pages: int) -> list[dict]:
+    found: list[dict] = []
+    token = None
+    for page in range(max_pages):
+        results, token = google_places_service.search_text_page(
+            query, lat=lat, lng=lng, radius_m=radius_m, limit=20, page_token=token
+        )
+        # locationBias only biases; keep results that are actually inside the circle.
+        for r in results:
+            if r.get("lat") is None or r.get("lng") is None:
+                continue
+            if _distance_m(lat, lng, r["lat"], r["lng"]) <= radius_m:
+                found.append(r)
+        job.update(stage="searching", pages=page + 1, candidates=len(found))
+        if not token:
+            break
+    return found
+
+
+def _candidates_from_csv(job, rows: list[dict], limiter: Pacer) -> tuple[list[dict], list[dict]]:
+    found, unmatched = [], []
+    for i, row in enumerate(rows):
+        limiter.wait()
+        query = f"{row['name']} {row['address']}".strip()
+        try:
+            results = google_places_service.search_text(query, limit=1)
+        except Exception as e:
+            results = []
+            log.info("Sweep search failed for %r: %s", query, e)
+        if results:
+            found.append(results[0])
+        else:
+            unmatched.append(row)
+        job.update(stage="searching", searched=i + 1, candidates=len(found))
+    return found, unmatched
+
+
+def run_area_sweep(
+    job,
+    import_place: Callable[[str], object],
+    *,
+    query: str = "restaurants",
+    lat: float | None = None,
+    lng: float | None = None,
+    radius_m: int = 1500,
+    csv_rows: list[dict] | None = None,
+    max_pages: int = 3,
+    max_imports: int = 60,
+    concurrency: int = 3,
+    rate_per_second: float = 1.0,
+    dry_run: bool = False,
+) -> dict:
+    """
+    Job body (see services.jobs): collect candidate places, drop ones already in
+    restaurants.google_place_id, then call `import_place(place_id)` for each new venue on a
+    bounded pool with rate-limited starts. Progress is reported through job.update().
+    """
+    limiter = Pacer.per_second(rate_per_second)
+    unmatched: list[dict] = []
+    if csv_rows is not None:
+        candidates, unmatched = _candidates_from_csv(job, csv_rows, limiter)
+    else:
+        if lat is None or lng is None:
+            raise ValueError("lat and lng are required for an area sweep")
+        candidates = _candidates_from_area(job, query, lat, lng, radius_m, max(1, min(max_pages, MAX_PAGES)))
+
+    with get_db() as db:
+        existing = {
+            r["google_place_id"]
+            for r in db.execute(
+                "SELECT google_place_id FROM restaurants WHERE google_place_id IS NOT NULL"
+            ).fetchall()
+        }
+
+    new_places: list[dict] = []
+    seen: set[str] = set()
+    already_imported = 0
+    for c in candidates:
+        pid = c["place_id"]
+        if pid in existing:
+            already_imported += 1
+        elif pid not in seen:
+            seen.add(pid)
+            new_places.append(c)
+    new_places = new_places[:max(0, max_imports)]
+
+    job.update(stage="importing", candidates=len(candidates), already_imported=already_imported,
+               total=len(new_places), done=0, imported=0, failed=0)
+
+    summary = {
+        "candidates": len(candidates),
+        "already_imported": already_imported,
+        "unmatched_csv_rows": unmatched,
+        "imported": [],
+        "failed": [],
+        "dry_run": dry_run,
+    }
+    if dry_run:
+        summary["would_import"] = [{"place_id": p["place_id"], "name": p["name"]} for p in new_places]
+        job.update(stage="done")
+        return summary
+
+    def do_import(place: dict) -> dict:
+        limiter.wait()
+        started = time.time()
+        result = import_place(place["place_id"])
+        return {
+            "place_id": place["place_id"],
+            "name": place["name"],
+            "restaurant_id": getattr(result, "id", None),
+            "seconds": round(time.time() - started, 2),
+        }
+
+    workers = max(1, min(int(concurrency), MAX_CONCURRENCY))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="sweep") as pool:
+        futures = {pool.submit(do_import, p): p for p in new_places}
+        for fut in as_completed(futures):
+            place = futures[fut]
+            try:
+                summary["imported"].append(fut.result())
+            except Exception as e:
+                summary["failed"].append({
+                    "place_id": place["place_id"],
+                    "name": place["name"],
+                    "error": str(getattr(e, "detail", None) or e)[:300],
+                })
+            job.update(done=len(summary["imported"]) + len(summary["failed"]),
+                       imported=len(summary["imported"]), failed=len(summary["failed"]), current=place["name"])
+
+    job.update(stage="done")
+    return summary
@@ -0,0 +1,218 @@
+"""
+Pool of warm Playwright Chromium contexts for scraping.
+
+Playwright's sync API is bound to the thread that started it, so each pool slot is a
+dedicated worker thread owning one browser + context. Callers hand work to the pool as
+`fn(page)` and block on the result. Contexts keep their cookies between pages (fewer
+Cloudflare challenges) and are recycled after `max_pages` pages, carrying cookies over.
+Idle browsers are closed to give memory back.
+"""
+
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable
+
+from .. import config
+
+log = logging.getLogger(__name__)
+
+USER_AGENT = (
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
+    "AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+)
+LAUNCH_ARGS = ["--disable-blink-features=AutomationControlled", "--no-sandbox"]
+# Hide webdriver flag to avoid bot detection
+STEALTH_SCRIPT = 'Object.defineProperty(navigator, "webdriver", { get: () => undefined });'
+
+
+class _Slot(threading.Thread):
+    def __init__(self, pool: "BrowserPool", index: int):
+        super().__init__(name=f"browser-pool-{index}", daemon=True)
+        self.pool = pool
+        self.busy = False
+        self._pw = None
+        self._browser = None
+        self._context = None
+        self._storage_state: dict | None = None
+        self._pages_on_context = 0
+
+    # -- browser lifecycle (only ever called on this thread) --
+
+    def _ensure_context(self):
+        if self._context is not None:
+            return self._context
+        if self._pw is None:
+            try:
+                from playwright.sync_api import sync_playwright
+            except ImportError:
+                raise RuntimeError(
+                    "Playwright is not installed. Run: pip install playwright && playwright install chromium"
+                )
+            self._pw = sync_playwright().start()
+        self._browser = self._pw.chromium.launch(headless=True, args=LAUNCH_ARGS)
+        self._context = self._browser.new_context(
+            user_agent=USER_AGENT,
+            viewport={"width": 1920, "height": 1080},
+            locale="en-GB",
+            storage_state=self._storage_state,
+        )
+        self._context.add_init_script(STEALTH_SCRIPT)
+        self._pages_on_context = 0
+        self.pool._count("browser_launches")
+        return self._context
+
+    def _close_browser(self, keep_cookies: bool = True) -> None:
+        if self._context is not None and keep_cookies:
+            try:
+                self._storage_state = self._context.storage_state()
+            except Exception:
+                pass
+        for obj in (self._context, self._browser):
+            try:
+                if obj is not None:
+                    obj.close()
+            except Exception:
+                pass
+        self._context = None
+        self._browser = None
+
+    def _stop_playwright(self) -> None:
+        self._close_browser()
+        if self._pw is not None:
+            try:
+                self._pw.stop()
+            except Exception:
+                pass
+            self._pw = None
+
+    # -- work loop --
+
+    def run(self) -> None:
+        while True:
+            try:
+                task = self.pool._tasks.get(timeout=self.pool.idle_seconds)
+            except queue.Empty:
+                if self._context is not None:
+                    log.info("%s idle, closing browser", self.name)
+                    self._close_browser()
+                continue
+            if task is None:
+                break
+            fn, fut = task
+            if not fut.set_running_or_notify_cancel():
+                continue
+
+            self.busy = True
+            page = None
+            try:
+                page = self._ensure_context().new_page()
+                fut.set_result(fn(page))
+            except Exception as e:
+                fut.set_exception(e)
+                self.pool._count("errors")
+                # A crashed browser/context poisons later pages; start fresh next time.
+                if self._browser is None or not self._browser.is_connected():
+                    self._close_browser(keep_cookies=False)
+            finally:
+                if page is not None:
+                    try:
+                        page.close()
+                    except Exception:
+                        pass
+                self._pages_on_context += 1
+                self.pool._count("pages")
+                if self._context is not None and self._pages_on_context >= self.pool.max_pages:
+                    self._close_browser()
+                    self.pool._count("recycles")
+                self.busy = False
+        self._stop_playwright()
+
+
+class BrowserPool:
+    def __init__(self, size: int, max_pages: int, idle_seconds: int):
+        self.size = max(1, size)
+        self.max_pages = max(1, max_pages)
+        self.idle_seconds = max(10, idle_seconds)
+        self._tasks: "queue.Queue[tuple[Callable, Future] | None]" = queue.Queue()
+        self._slots: list[_Slot] = []
+        self._lock = threading.Lock()
+        self._counters = {"pages": 0, "recycles": 0, "browser_launches": 0, "errors": 0}
+        self._started_at = time.time()
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._counters[name] += 1
+
+    def _ensure_started(self) -> None:
+        with self._lock:
+            if self._slots:
+                return
+            self._slots = [_Slot(self, i) for i in range(self.size)]
+            for slot in self._slots:
+                slot.start()
+
+    def submit(self, fn: Callable[[Any], Any]) -> Future:
+        self._ensure_started()
+        fut: Future = Future()
+        self._tasks.put((fn, fut))
+        return fut
+
+    def run(self, fn: Callable[[Any], Any], timeout: float | None = 180) -> Any:
+        """Run fn(page) on a pooled context and return its result."""
+        return self.submit(fn).result(timeout=timeout)
+
+    def stats(self) -> dict:
+        with self._lock:
+            counters = dict(self._counters)
+            slots = list(self._slots)
+        busy = sum(1 for s in slots if s.busy)
+        return {
+            "size": self.size,
+            "started": len(slots),
+            "busy": busy,
+            "utilisation": round(busy / self.size, 2),
+            "queue_depth": self._tasks.qsize(),
+            "max_pages_per_context": self.max_pages,
+            **counters,
+        }
+
+    def shutdown(self) -> None:
+        with self._lock:
+            slots, self._slots = self._slots, []
+        for _ in slots:
+            self._tasks.put(None)
+        for slot in slots:
+            slot.join(timeout=10)
+
+
+_pool: BrowserPool | None = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> BrowserPool:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = BrowserPool(
+                size=config.BROWSER_POOL_SIZE,
+                max_pages=config.BROWSER_POOL_MAX_PAGES,
+                idle_seconds=config.BROWSER_POOL_IDLE_SECONDS,
+            )
+        return _pool
+
+
+def stats() -> dict:
+    with _pool_lock:
+        pool = _pool
+    return pool.stats() if pool else {"size": config.BROWSER_POOL_SIZE, "started": 0}
+
+
+def shutdown() -> None:
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool:
+        pool.shutdown()
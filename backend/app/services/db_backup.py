@@ -0,0 +1,214 @@
+"""
+Online backups of orders.db (and the archive database, if there is one).
+
+Uses the SQLite backup API (sqlite3.Connection.backup) in steps of BACKUP_PAGES_PER_STEP
+pages with a short pause between steps, so copying a large file doesn't saturate the disk.
+The source connection holds one read transaction for the whole copy: in WAL mode that never
+blocks writers, and it pins the snapshot - without it, every commit from another connection
+would restart the backup from page one and a busy database would never finish. Every
+snapshot is integrity-checked before it is gzipped into BACKUP_DIR as
+<name>-<UTC timestamp>.db.gz; the newest BACKUP_KEEP snapshots per database are kept.
+"""
+
+import gzip
+import logging
+import os
+import re
+import shutil
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from .. import config
+
+log = logging.getLogger(__name__)
+
+JOB_KIND = "db_backup"
+_SNAPSHOT = re.compile(r"^(?P<name>[^./\\][^/\\]*)-\d{8}T\d{6}Z\.db\.gz$")
+
+_lock = threading.Lock()
+_stats = {"runs": 0, "failures": 0, "total_seconds": 0.0}
+_last: dict | None = None
+
+
+def _backup_dir() -> Path:
+    return Path(config.BACKUP_DIR)
+
+
+def _sources() -> list[tuple[str, str]]:
+    """(snapshot name, database path) for every database file that exists."""
+    sources = [(Path(config.DATABASE_PATH).stem, config.DATABASE_PATH)]
+    if os.path.exists(config.ARCHIVE_DATABASE_PATH):
+        sources.append((Path(config.ARCHIVE_DATABASE_PATH).stem, config.ARCHIVE_DATABASE_PATH))
+    return sources
+
+
+def _copy(src_path: str, dest: Path, job=None) -> dict:
+    """Page-stepped online copy of src_path into dest (a plain rollback-journal file)."""
+    pages_per_step = max(1, config.BACKUP_PAGES_PER_STEP)
+    pause = config.BACKUP_STEP_PAUSE_MS / 1000
+    steps = 0
+
+    def progress(status, remaining, total):
+        nonlocal steps
+        steps += 1
+        if job is not None:
+            job.update(pages_remaining=remaining, pages_total=total)
+        if remaining and pause:
+            time.sleep(pause)  # let writers in between steps
+
+    src = sqlite3.connect(src_path, isolation_level=None)
+    dst = sqlite3.connect(dest)
+    try:
+        started = time.time()
+        src.execute("BEGIN")
+        src.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()  # starts the read snapshot
+        try:
+            src.backup(dst, pages=pages_per_step, progress=progress)
+        finally:
+            src.execute("COMMIT")
+        backup_seconds = time.time() - started
+        # The copy inherits WAL mode from the header; a snapshot should be one self-contained file.
+        dst.execute("PRAGMA journal_mode=DELETE")
+        pages = dst.execute("PRAGMA page_count").fetchone()[0]
+
+        started = time.time()
+        check = [r[0] for r in dst.execute("PRAGMA integrity_check").fetchall()]
+        integrity_seconds = time.time() - started
+    finally:
+        dst.close()
+        src.close()
+    if check != ["ok"]:
+        raise RuntimeError(f"Integrity check failed for backup of {src_path}: {'; '.join(check[:5])}")
+    return {
+        "pages": pages,
+        "steps": steps,
+        "backup_ms": round(backup_seconds * 1000, 1),
+        "integrity_ms": round(integrity_seconds * 1000, 1),
+    }
+
+
+def _compress(raw: Path, dest: Path) -> float:
+    started = time.time()
+    tmp = dest.with_name(dest.name + ".tmp")
+    try:
+        with raw.open("rb") as f_in, gzip.open(tmp, "wb", compresslevel=6) as f_out:
+            shutil.copyfileobj(f_in, f_out, 1024 * 1024)
+        os.replace(tmp, dest)
+    finally:
+        tmp.unlink(missing_ok=True)
+    return time.time() - started
+
+
+def list_snapshots() -> list[dict]:
+    """Snapshots in BACKUP_DIR, newest first."""
+    d = _backup_dir()
+    if not d.is_dir():
+        return []
+    snapshots = []
+    for p in d.iterdir():
+        m = _SNAPSHOT.match(p.name)
+        if m and p.is_file():
+            st = p.stat()
+            snapshots.append({"file": p.name, "database": m["name"], "bytes": st.st_size, "created_at": st.st_mtime})
+    # Timestamped names sort chronologically
+    return sorted(snapshots, key=lambda s: s["file"], reverse=True)
+
+
+def _rotate(keep: int) -> list[str]:
+    removed = []
+    seen: dict[str, int] = {}
+    for snap in list_snapshots():
+        seen[snap["database"]] = seen.get(snap["database"], 0) + 1
+        if seen[snap["database"]] > keep:
+            (_backup_dir() / snap["file"]).unlink(missing_ok=True)
+            removed.append(snap["file"])
+    return removed
+
+
+def snapshot_file(name: str) -> Path | None:
+    """A finished snapshot by file name (as returned by list_snapshots / the job result)."""
+    if not name or not _SNAPSHOT.match(name):
+        return None
+    path = _backup_dir() / name
+    return path if path.is_file() else None
+
+
+def run_backup(job=None) -> dict:
+    """Snapshot every database, verify, compress and rotate. Raises if any snapshot fails."""
+    global _last
+    started = time.time()
+    d = _backup_dir()
+    d.mkdir(parents=True, exist_ok=True)
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+    snapshots = []
+    try:
+        for name, path in _sources():
+            if job is not None:
+                job.update(database=name)
+            raw = d / f".{name}-{stamp}.db"
+            dest = d / f"{name}-{stamp}.db.gz"
+            try:
+                info = _copy(path, raw, job)
+                raw_bytes = raw.stat().st_size
+                compress_seconds = _compress(raw, dest)
+            finally:
+                for suffix in ("", "-journal"):
+                    Path(str(raw) + suffix).unlink(missing_ok=True)
+            snapshots.append({
+                "database": name,
+                "file": dest.name,
+                "raw_bytes": raw_bytes,
+                "bytes": dest.stat().st_size,
+                **info,
+                "compress_ms": round(compress_seconds * 1000, 1),
+            })
+    except Exception:
+        with _lock:
+            _stats["runs"] += 1
+            _stats["failures"] += 1
+        raise
+
+    removed = _rotate(max(1, config.BACKUP_KEEP))
+    elapsed = time.time() - started
+    result = {
+        "snapshots": snapshots,
+        "rotated": removed,
+        "duration_ms": round(elapsed * 1000, 1),
+    }
+    with _lock:
+        _stats["runs"] += 1
+        _stats["total_seconds"] += elapsed
+        _last = {**result, "at": time.time()}
+    log.info("DB backup: %s", result)
+    return result
+
+
+def run_scheduled() -> None:
+    """Scheduler entry point: queue a backup unless one is already running."""
+    from . import jobs
+
+    if jobs.is_running(JOB_KIND):
+        log.info("DB backup already running; skipping scheduled run")
+        return
+    jobs.submit(JOB_KIND, run_backup, params={"trigger": "scheduled"})
+
+
+def stats() -> dict:
+    with _lock:
+        s = dict(_stats)
+        last = dict(_last) if _last else None
+    ok = s["runs"] - s["failures"]
+    snapshots = list_snapshots()
+    return {
+        "runs": s["runs"],
+        "failures": s["failures"],
+        "avg_duration_ms": round(s["total_seconds"] / ok * 1000, 1) if ok else None,
+        "last": last,
+        "snapshots": len(snapshots),
+        "snapshot_bytes": sum(snap["bytes"] for snap in snapshots),
+        "latest": snapshots[0]["file"] if snapshots else None,
+    }
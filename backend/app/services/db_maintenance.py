@@ -0,0 +1,207 @@
+"""
+Housekeeping for the SQLite database (WAL mode, see database.get_connection).
+
+- checkpoint_tick(): every DB_CHECKPOINT_INTERVAL seconds. Once the -wal file has not been
+  written for DB_QUIET_SECONDS, runs wal_checkpoint(TRUNCATE) so the file shrinks back to
+  zero. While writes keep coming, a PASSIVE checkpoint (never waits on readers or writers)
+  is run instead when the WAL has grown past DB_WAL_MAX_BYTES.
+- run_maintenance(): daily job. ANALYZE when the planner has no sqlite_stat1 yet, otherwise
+  PRAGMA optimize (re-analyzes only tables whose statistics drifted), then
+  PRAGMA incremental_vacuum to hand freed pages (e.g. after the archive job) back to the
+  filesystem. New databases are created with auto_vacuum=INCREMENTAL; an existing database
+  is converted by one full VACUUM (full_vacuum=True, superadmin only - it blocks writers).
+
+stats() reports file sizes, page counts and the last run of each step for /superadmin/metrics.
+"""
+
+import logging
+import os
+import threading
+import time
+
+from .. import config
+from ..database import get_connection
+
+log = logging.getLogger(__name__)
+
+JOB_KIND = "db_maintenance"
+_AUTO_VACUUM = {0: "none", 1: "full", 2: "incremental"}
+
+_lock = threading.Lock()
+_stats = {
+    "checkpoints": 0,
+    "checkpoints_busy": 0,
+    "checkpoint_seconds": 0.0,
+    "max_checkpoint_ms": 0.0,
+}
+_last: dict[str, dict] = {}  # step -> details of its most recent run
+
+
+def _wal_path() -> str:
+    return config.DATABASE_PATH + "-wal"
+
+
+def _file_size(path: str) -> int:
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
+def _record(name: str, **details) -> None:
+    with _lock:
+        _last[name] = {**details, "at": time.time()}
+
+
+def checkpoint(mode: str = "TRUNCATE") -> dict:
+    """Run one wal_checkpoint without waiting on locks; busy=True means it could not complete."""
+    mode = mode.upper()
+    if mode not in ("PASSIVE", "FULL", "RESTART", "TRUNCATE"):
+        raise ValueError(f"Unknown checkpoint mode: {mode}")
+    wal_before = _file_size(_wal_path())
+    conn = get_connection()
+    try:
+        conn.execute("PRAGMA busy_timeout=0")
+        started = time.time()
+        busy, log_frames, checkpointed = conn.execute(f"PRAGMA wal_checkpoint({mode})").fetchone()
+        elapsed = time.time() - started
+    finally:
+        conn.close()
+    result = {
+        "mode": mode,
+        "busy": bool(busy),
+        "wal_frames": log_frames,
+        "checkpointed_frames": checkpointed,
+        "wal_bytes_before": wal_before,
+        "wal_bytes_after": _file_size(_wal_path()),
+        "duration_ms": round(elapsed * 1000, 1),
+    }
+    with _lock:
+        _stats["checkpoints"] += 1
+        _stats["checkpoints_busy"] += int(bool(busy))
+        _stats["checkpoint_seconds"] += elapsed
+        _stats["max_checkpoint_ms"] = max(_stats["max_checkpoint_ms"], result["duration_ms"])
+    _record("checkpoint", **result)
+    return result
+
+
+def checkpoint_tick() -> None:
+    """Scheduler entry point: TRUNCATE when writes have paused, PASSIVE when the WAL is too big."""
+    try:
+        wal_size = os.path.getsize(_wal_path())
+        idle = time.time() - os.path.getmtime(_wal_path())
+    except OSError:
+        return  # no WAL file (nothing written since the last TRUNCATE / no connection open)
+    if wal_size == 0:
+        return
+    if idle >= config.DB_QUIET_SECONDS:
+        mode = "TRUNCATE"
+    elif wal_size > config.DB_WAL_MAX_BYTES:
+        mode = "PASSIVE"
+    else:
+        return
+    try:
+        result = checkpoint(mode)
+    except Exception as e:
+        log.warning("WAL checkpoint failed: %s", e)
+        return
+    if result["busy"]:
+        log.info("WAL checkpoint (%s) incomplete, database busy", mode)
+
+
+def _pragma(conn, name: str):
+    return conn.execute(f"PRAGMA {name}").fetchone()[0]
+
+
+def run_maintenance(job=None, *, full_vacuum: bool = False, vacuum_pages: int | None = None) -> dict:
+    """
+    Refresh planner statistics and return free pages to the filesystem. full_vacuum rewrites
+    the whole file (and switches it to incremental auto-vacuum); it blocks all writers while
+    it runs.
+    """
+    pages = config.DB_VACUUM_MAX_PAGES if vacuum_pages is None else vacuum_pages
+    result: dict = {}
+    conn = get_connection()
+    try:
+        conn.isolation_level = None  # VACUUM can't run inside a transaction
+
+        started = time.time()
+        has_stats = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'sqlite_stat1'"
+        ).fetchone()
+        if has_stats:
+            conn.execute("PRAGMA analysis_limit=1000")
+            conn.execute("PRAGMA optimize")
+            step = "optimize"
+        else:
+            conn.execute("ANALYZE")
+            step = "analyze"
+        result["statistics"] = {"step": step, "duration_ms": round((time.time() - started) * 1000, 1)}
+        _record("statistics", **result["statistics"])
+        if job is not None:
+            job.update(step="vacuum")
+
+        free_before = _pragma(conn, "freelist_count")
+        started = time.time()
+        if full_vacuum:
+            if _pragma(conn, "auto_vacuum") != 2:
+                conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            conn.execute("VACUUM")
+            mode = "full"
+        elif _pragma(conn, "auto_vacuum") == 2:
+            # execute() steps this pragma only once (one page); executescript runs it to completion
+            conn.executescript(f"PRAGMA incremental_vacuum({int(pages)});")
+            mode = "incremental"
+        else:
+            mode = "skipped"  # auto_vacuum=none: freed pages are reused, only a full VACUUM shrinks the file
+        result["vacuum"] = {
+            "mode": mode,
+            "freelist_before": free_before,
+            "freelist_after": _pragma(conn, "freelist_count"),
+            "duration_ms": round((time.time() - started) * 1000, 1),
+        }
+        _record("vacuum", **result["vacuum"])
+    finally:
+        conn.close()
+
+    result["checkpoint"] = checkpoint("TRUNCATE")
+    log.info("DB maintenance: %s", result)
+    return result
+
+
+def run_scheduled() -> None:
+    """Scheduler entry point: queue a maintenance pass unless one is already running."""
+    from . import jobs
+
+    if jobs.is_running(JOB_KIND):
+        log.info("DB maintenance already running; skipping scheduled run")
+        return
+    jobs.submit(JOB_KIND, run_maintenance, params={"trigger": "scheduled"})
+
+
+def stats() -> dict:
+    conn = get_connection()
+    try:
+        page_size = _pragma(conn, "page_size")
+        page_count = _pragma(conn, "page_count")
+        freelist = _pragma(conn, "freelist_count")
+        auto_vacuum = _AUTO_VACUUM.get(_pragma(conn, "auto_vacuum"), "unknown")
+    finally:
+        conn.close()
+    with _lock:
+        s = dict(_stats)
+        last = {k: dict(v) for k, v in _last.items()}
+    done = s["checkpoints"]
+    return {
+        "db_bytes": _file_size(config.DATABASE_PATH),
+        "wal_bytes": _file_size(_wal_path()),
+        "page_size": page_size,
+        "page_count": page_count,
+        "freelist_count": freelist,
+        "auto_vacuum": auto_vacuum,
+        "checkpoints": done,
+        "checkpoints_busy": s["checkpoints_busy"],
+        "avg_checkpoint_ms": round(s["checkpoint_seconds"] / done * 1000, 1) if done else None,
+        "max_checkpoint_ms": s["max_checkpoint_ms"] if done else None,
+        "last": last,
+    }
@@ -0,0 +1,328 @@
+"""
+A5 promotional flyers (QR code to the restaurant page), cached on disk.
+
+A flyer only depends on the restaurant's name, cuisine, page URL and logo, so it is stored
+as FLYER_DIR/r{id}-{hash of those inputs}.png and re-rendered only when one changes (or
+TEMPLATE_VERSION is bumped). Rendering runs on the image pool; fonts and the ForkItt logo
+are loaded once per worker process. render_batch() renders every restaurant for print,
+as a zip of PNGs or one multi-page PDF.
+"""
+
+import hashlib
+import io
+import json
+import logging
+import os
+import secrets
+import zipfile
+from functools import lru_cache
+from pathlib import Path
+
+import requests
+
+from .. import config
+from ..database import get_db
+from . import image_pool, media_variants
+
+log = logging.getLogger(__name__)
+
+JOB_KIND = "flyer_batch"
+TEMPLATE_VERSION = 1  # bump when the layout changes so cached flyers are re-rendered
+PDF_CHUNK_PAGES = 20  # decoded pages held in memory at once while writing a PDF bundle
+
+# A5 at 150 DPI: 874 x 1240 px
+W, H = 874, 1240
+DPI = 150
+ACCENT = (232, 93, 42)  # ForkItt orange #E85D2A
+WHITE = (255, 255, 255)
+DARK = (30, 30, 30)
+LIGHT_TEXT = (100, 100, 100)
+
+_FORKITT_LOGO = Path(__file__).resolve().parents[3] / "frontend" / "public" / "forkit-logo.png"
+_BENEFITS = (
+    "No app needed — order from your phone",
+    "Skip the queue with Click & Collect",
+    "Lower fees — more goes to your local restaurant",
+)
+
+
+# ---------------------------------------------------------------------------
+# Rendering (image pool workers)
+# ---------------------------------------------------------------------------
+
+@lru_cache(maxsize=None)
+def _font(size: int, bold: bool = False):
+    """System font, looked up once per size per process; falls back to Pillow's default."""
+    from PIL import ImageFont
+
+    paths = [
+        "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf" if bold else "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
+        "/System/Library/Fonts/Helvetica.ttc",
+        "/usr/share/fonts/truetype/liberation/LiberationSans-Bold.ttf" if bold else "/usr/share/fonts/truetype/liberation/LiberationSans-Regular.ttf",
+    ]
+    for p in paths:
+        try:
+            return ImageFont.truetype(p, size)
+        except (OSError, IOError):
+            continue
+    return ImageFont.load_default()
+
+
+@lru_cache(maxsize=1)
+def _forkitt_logo(size: int):
+    from PIL import Image
+
+    if not _FORKITT_LOGO.exists():
+        return None
+    try:
+        with Image.open(_FORKITT_LOGO) as im:
+            return im.convert("RGBA").resize((size, size), Image.LANCZOS)
+    except Exception:
+        return None
+
+
+def _centered(draw, y: int, text: str, font, fill) -> int:
+    """Draw text centred horizontally at y; returns its height."""
+    bbox = draw.textbbox((0, 0), text, font=font)
+    draw.text(((W - (bbox[2] - bbox[0])) // 2, y), text, fill=fill, font=font)
+    return bbox[3] - bbox[1]
+
+
+def render(inputs: dict, logo: bytes | None) -> bytes:
+    """Runs in the image pool: draw the flyer and return PNG bytes."""
+    from PIL import Image, ImageDraw
+    import qrcode
+
+    img = Image.new("RGB", (W, H), WHITE)
+    draw = ImageDraw.Draw(img)
+    font_name = _font(52, bold=True)
+    font_cuisine = _font(28)
+    font_tagline = _font(22, bold=True)
+    font_url = _font(20)
+    font_powered = _font(18)
+    font_cta = _font(26, bold=True)
+
+    y = 60
+
+    # --- Top accent bar ---
+    draw.rectangle([0, 0, W, 8], fill=ACCENT)
+
+    # --- Restaurant logo ---
+    logo_size = 120
+    logo_img = None
+    if logo:
+        try:
+            logo_img = Image.open(io.BytesIO(logo)).convert("RGBA").resize((logo_size, logo_size), Image.LANCZOS)
+        except Exception:
+            logo_img = None
+    if logo_img is not None:
+        img.paste(logo_img, ((W - logo_size) // 2, y), logo_img)
+        y += logo_size + 20
+    else:
+        y += 20
+
+    # --- Restaurant name / cuisine ---
+    y += _centered(draw, y, inputs["name"], font_name, DARK) + 12
+    if inputs["cuisine"]:
+        y += _centered(draw, y, inputs["cuisine"], font_cuisine, LIGHT_TEXT) + 16
+
+    # --- Divider ---
+    y += 10
+    draw.line([(W // 4, y), (3 * W // 4, y)], fill=(220, 220, 220), width=2)
+    y += 30
+
+    # --- CTA text ---
+    y += _centered(draw, y, "Order online for Click & Collect", font_cta, ACCENT) + 10
+    y += _centered(draw, y, "Scan the QR code below", font_cuisine, LIGHT_TEXT) + 30
+
+    # --- QR code (orange border) ---
+    qr = qrcode.QRCode(version=None, error_correction=qrcode.constants.ERROR_CORRECT_H, box_size=10, border=2)
+    qr.add_data(inputs["url"])
+    qr.make(fit=True)
+    qr_size = 320
+    qr_img = qr.make_image(fill_color=DARK, back_color=WHITE).convert("RGB")
+    # The QR is pure black/white modules: NEAREST keeps edges sharp and is far cheaper than LANCZOS.
+    qr_img = qr_img.resize((qr_size, qr_size), Image.NEAREST)
+    bordered_size = qr_size + 16
+    qr_bordered = Image.new("RGB", (bordered_size, bordered_size), ACCENT)
+    qr_bordered.paste(qr_img, (8, 8))
+    img.paste(qr_bordered, ((W - bordered_size) // 2, y))
+    y += bordered_size + 20
+
+    # --- URL text ---
+    display_url = inputs["url"].replace("https://", "").replace("http://", "")
+    y += _centered(draw, y, display_url, font_url, ACCENT) + 40
+
+    # --- Benefits ---
+    for b in _BENEFITS:
+        y += _centered(draw, y, f"✓  {b}", font_cuisine, DARK) + 14
+
+    # --- Footer: Powered by ForkItt ---
+    footer_h = 120
+    footer_y = H - footer_h
+    draw.rectangle([0, footer_y, W, H], fill=ACCENT)
+    line1 = "Local Restaurants • Click & Collect"
+    line2 = "Powered by ForkItt"
+    forkitt_size = 40
+    fi = _forkitt_logo(forkitt_size)
+    if fi is not None:
+        bbox2 = draw.textbbox((0, 0), line2, font=font_powered)
+        combo_w = forkitt_size + 8 + (bbox2[2] - bbox2[0])
+        lx = (W - combo_w) // 2
+        ly = footer_y + (footer_h - forkitt_size) // 2 + 12
+        _centered(draw, footer_y + 14, line1, font_tagline, WHITE)
+        img.paste(fi, (lx, ly), fi)
+        draw.text((lx + forkitt_size + 8, ly + (forkitt_size - (bbox2[3] - bbox2[1])) // 2), line2, fill=WHITE, font=font_powered)
+    else:
+        _centered(draw, footer_y + 20, line1, font_tagline, WHITE)
+        _centered(draw, footer_y + 60, line2, font_powered, WHITE)
+
+    buf = io.BytesIO()
+    img.save(buf, format="PNG", dpi=(DPI, DPI))
+    return buf.getvalue()
+
+
+def to_pdf(pngs: list[str], out_path: str) -> None:
+    """
+    Runs in the image pool: write one A5 page per flyer PNG (at DPI, so pages print at
+    148 x 210 mm) to out_path. Pages are decoded PDF_CHUNK_PAGES at a time and appended
+    to the file, so memory stays flat however many restaurants are in the batch.
+    """
+    from PIL import Image
+
+    for start in range(0, len(pngs), PDF_CHUNK_PAGES):
+        pages = [Image.open(p).convert("RGB") for p in pngs[start:start + PDF_CHUNK_PAGES]]
+        try:
+            pages[0].save(out_path, format="PDF", resolution=DPI, save_all=True,
+                          append_images=pages[1:], append=start > 0)
+        finally:
+            for p in pages:
+                p.close()
+
+
+# ---------------------------------------------------------------------------
+# Cache
+# ---------------------------------------------------------------------------
+
+def flyer_inputs(restaurant: dict) -> dict:
+    return {
+        "name": restaurant["name"],
+        "cuisine": (restaurant.get("cuisine_type") or "").split("(")[0].strip(),
+        "url": f"{config.PUBLIC_BASE_URL}/{restaurant['slug']}",
+        "logo_url": restaurant.get("logo_url") or None,
+    }
+
+
+def cache_key(inputs: dict) -> str:
+    payload = json.dumps({**inputs, "v": TEMPLATE_VERSION}, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:24]
+
+
+def _logo_bytes(logo_url: str | None) -> bytes | None:
+    """Stored logos are read from disk; remote ones are fetched (only on a cache miss)."""
+    if not logo_url:
+        return None
+    path = media_variants.url_to_path(logo_url)
+    try:
+        if path is not None:
+            return path.read_bytes()
+        if logo_url.startswith(("http://", "https://")):
+            resp = requests.get(logo_url, timeout=10)
+            if resp.status_code == 200:
+                return resp.content
+    except Exception as e:
+        log.info("Flyer logo unavailable (%s): %s", logo_url, e)
+    return None
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    # Unique per call: two threads can render the same flyer at once.
+    tmp = path.with_name(f".{path.name}.{secrets.token_hex(6)}.tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+
+def get_flyer(restaurant: dict) -> tuple[Path, bool]:
+    """(PNG path, rendered now?) for a restaurant; renders on a cache miss."""
+    inputs = flyer_inputs(restaurant)
+    base = Path(config.FLYER_DIR)
+    path = base / f"r{restaurant['id']}-{cache_key(inputs)}.png"
+    if path.exists():
+        return path, False
+    base.mkdir(parents=True, exist_ok=True)
+    png = image_pool.run_sync(render, {k: v for k, v in inputs.items() if k != "logo_url"}, _logo_bytes(inputs["logo_url"]))
+    _write_atomic(path, png)
+    # Older renders for this restaurant are stale now.
+    for old in base.glob(f"r{restaurant['id']}-*.png"):
+        if old != path:
+            old.unlink(missing_ok=True)
+    return path, True
+
+
+def render_batch(job, *, fmt: str = "png", restaurant_ids: list[int] | None = None, active_only: bool = True) -> dict:
+    """
+    Job body: make sure every restaurant has a current flyer, then bundle them into
+    FLYER_DIR/batch/{job id}.zip (PNG) or .pdf (one A5 page per restaurant).
+    """
+    sql = "SELECT id, name, slug, cuisine_type, logo_url FROM restaurants"
+    where, params = [], []
+    if active_only:
+        where.append("is_active = 1")
+    if restaurant_ids:
+        where.append(f"id IN ({','.join('?' * len(restaurant_ids))})")
+        params.extend(restaurant_ids)
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    with get_db() as db:
+        restaurants = [dict(r) for r in db.execute(sql + " ORDER BY name", params).fetchall()]
+
+    job.update(total=len(restaurants), done=0, rendered=0)
+    flyers: list[tuple[dict, Path]] = []
+    rendered = 0
+    errors = []
+    for i, r in enumerate(restaurants):
+        try:
+            path, fresh = get_flyer(r)
+            flyers.append((r, path))
+            rendered += int(fresh)
+        except Exception as e:
+            errors.append({"restaurant_id": r["id"], "error": str(e)[:200]})
+        job.update(done=i + 1, rendered=rendered)
+
+    out = None
+    if flyers:
+        batch_dir = Path(config.FLYER_DIR) / "batch"
+        batch_dir.mkdir(parents=True, exist_ok=True)
+        for old in sorted(batch_dir.iterdir(), key=lambda p: p.stat().st_mtime)[:-9]:
+            old.unlink(missing_ok=True)  # keep the last few bundles
+        if fmt == "pdf":
+            out = batch_dir / f"{job.id}.pdf"
+            tmp = out.with_name(f".{out.name}.tmp")
+            image_pool.run_sync(to_pdf, [str(p) for _, p in flyers], str(tmp), timeout=600)
+            os.replace(tmp, out)
+        else:
+            out = batch_dir / f"{job.id}.zip"
+            tmp = out.with_name(f".{out.name}.tmp")
+            with zipfile.ZipFile(tmp, "w", zipfile.ZIP_STORED) as zf:  # PNGs are already compressed
+                for r, p in flyers:
+                    zf.write(p, f"ForkItt-Flyer-{r['slug']}.png")
+            os.replace(tmp, out)
+
+    return {
+        "format": fmt,
+        "restaurants": len(restaurants),
+        "flyers": len(flyers),
+        "rendered": rendered,
+        "cached": len(flyers) - rendered,
+        "errors": errors,
+        "file": out.name if out else None,
+        "bytes": out.stat().st_size if out else 0,
+    }
+
+
+def batch_file(name: str) -> Path | None:
+    """A finished batch bundle by file name (as returned in the job result)."""
+    if not name or "/" in name or "\\" in name or name.startswith("."):
+        return None
+    path = Path(config.FLYER_DIR) / "batch" / name
+    return path if path.suffix in (".zip", ".pdf") and path.is_file() else None
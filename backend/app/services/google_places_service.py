@@ -1,15 +1,39 @@
+import hashlib
 import io
-import secrets
-from pathlib import Path
+import json
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
 
 import requests
+from requests.adapters import HTTPAdapter
 
 from .. import config
+from ..database import get_db
+from . import media_store, media_variants, singleflight
 
 
 PLACES_BASE = "https://places.googleapis.com/v1"
 UA = "Mozilla/5.0 (ForkIt; +https://forkitt.com)"
 
+log = logging.getLogger(__name__)
+
+MAX_IMPORT_PHOTOS = 10
+PHOTO_FETCH_WORKERS = 6
+
+_details_flight = singleflight.group("places_details")
+_photo_flight = singleflight.group("places_photo_uri")
+
+# One keep-alive session shared by every Places / photo / logo request.
+_http = requests.Session()
+_http.mount("https://", HTTPAdapter(pool_connections=8, pool_maxsize=PHOTO_FETCH_WORKERS * 2))
+_http.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=PHOTO_FETCH_WORKERS))
+
+_fetch_pool = ThreadPoolExecutor(max_workers=PHOTO_FETCH_WORKERS, thread_name_prefix="places-media")
+
+SEARCH_FIELD_MASK = "places.id,places.displayName,places.formattedAddress,places.location,places.primaryType,places.primaryTypeDisplayName,places.photos,nextPageToken"
+DETAILS_FIELD_MASK = "id,displayName,formattedAddress,location,internationalPhoneNumber,nationalPhoneNumber,websiteUri,primaryType,primaryTypeDisplayName,googleMapsUri,photos,editorialSummary"
+
 
 def _headers(field_mask: str) -> dict:
     if not config.GOOGLE_PLACES_API_KEY:
@@ -21,14 +45,118 @@ def _headers(field_mask: str) -> dict:
     }
 
 
+# ---------------------------------------------------------------------------
+# SQLite-backed response cache + per-day quota accounting
+# ---------------------------------------------------------------------------
+
+_USAGE_COLUMNS = {"api_calls", "cache_hits", "stale_hits", "errors"}
+
+
+def _ttl_for(call_type: str) -> int:
+    return {
+        "search": config.PLACES_CACHE_TTL_SEARCH,
+        "details": config.PLACES_CACHE_TTL_DETAILS,
+        "photo": config.PLACES_CACHE_TTL_PHOTO,
+    }.get(call_type, 3600)
+
+
+def _count_usage(call_type: str, column: str) -> None:
+    assert column in _USAGE_COLUMNS
+    day = time.strftime("%Y-%m-%d", time.gmtime())
+    try:
+        with get_db() as db:
+            db.execute(
+                f"INSERT INTO places_api_usage (day, call_type, {column}) VALUES (?, ?, 1) "
+                f"ON CONFLICT(day, call_type) DO UPDATE SET {column} = places_api_usage.{column} + 1",
+                (day, call_type),
+            )
+    except Exception:
+        pass  # accounting must never break a Places call
+
+
+def _cached_call(call_type: str, request: dict, fetch) -> dict:
+    """
+    Return the raw API payload for `request` (body/params + field mask), served from
+    places_cache while younger than the call type's TTL. On API errors a stale entry is
+    returned instead of failing; with no entry at all the error propagates.
+    """
+    key = hashlib.sha256(
+        json.dumps({"type": call_type, **request}, sort_keys=True).encode("utf-8")
+    ).hexdigest()
+
+    stale = None
+    try:
+        with get_db() as db:
+            row = db.execute(
+                "SELECT fetched_at, json FROM places_cache WHERE cache_key = ?", (key,)
+            ).fetchone()
+        if row:
+            payload = json.loads(row["json"])
+            if time.time() - int(row["fetched_at"]) < _ttl_for(call_type):
+                _count_usage(call_type, "cache_hits")
+                return payload
+            stale = payload
+    except Exception:
+        stale = None
+
+    try:
+        payload = fetch()
+    except Exception as e:
+        _count_usage(call_type, "errors")
+        if stale is not None:
+            log.warning("Places %s failed (%s); serving stale cache", call_type, e)
+            _count_usage(call_type, "stale_hits")
+            return stale
+        raise
+    _count_usage(call_type, "api_calls")
+
+    try:
+        with get_db() as db:
+            db.execute(
+                "INSERT INTO places_cache (cache_key, call_type, fetched_at, json) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(cache_key) DO UPDATE SET fetched_at = excluded.fetched_at, json = excluded.json",
+                (key, call_type, int(time.time()), json.dumps(payload)),
+            )
+    except Exception:
+        log.exception("Could not store Places %s response in cache", call_type)
+    return payload
+
+
+def usage_summary(days: int = 7) -> list[dict]:
+    """Per-day, per-call-type API call / cache counters, newest first."""
+    since = time.strftime("%Y-%m-%d", time.gmtime(time.time() - max(0, days - 1) * 86400))
+    with get_db() as db:
+        rows = db.execute(
+            "SELECT day, call_type, api_calls, cache_hits, stale_hits, errors FROM places_api_usage "
+            "WHERE day >= ? ORDER BY day DESC, call_type",
+            (since,),
+        ).fetchall()
+    return [dict(r) for r in rows]
+
+
+def prune_cache(max_age_seconds: int = 30 * 24 * 3600) -> int:
+    """Scheduled job: drop cache rows far past any TTL (kept that long only for stale reads)."""
+    with get_db() as db:
+        return db.execute(
+            "DELETE FROM places_cache WHERE fetched_at < ?", (int(time.time()) - max_age_seconds,)
+        ).rowcount
+
+
 def search_text(query: str, *, lat: float | None = None, lng: float | None = None, radius_m: int | None = None, limit: int = 20) -> list[dict]:
     """
     Text search for restaurants/cafes near a location (optional).
     Returns a list of lightweight place dicts.
     """
+    results, _ = search_text_page(query, lat=lat, lng=lng, radius_m=radius_m, limit=limit)
+    return results
+
+
+def search_text_page(query: str, *, lat: float | None = None, lng: float | None = None, radius_m: int | None = None,
+                     limit: int = 20, page_token: str | None = None) -> tuple[list[dict], str | None]:
+    """One page of text search results plus the token for the next page (None when exhausted)."""
     query = (query or "").strip()
     if not query:
-        return []
+        return [], None
 
     body: dict = {
         "textQuery": query,
@@ -37,6 +165,8 @@ def search_text(query: str, *, lat: float | None = None, lng: float | None = Non
         # Keep to relevant venue types
         "includedType": "restaurant",
     }
+    if page_token:
+        body["pageToken"] = page_token
 
     if lat is not None and lng is not None:
         # Bias results near the provided point.
@@ -47,16 +177,17 @@ def search_text(query: str, *, lat: float | None = None, lng: float | None = Non
             }
         }
 
-    r = requests.post(
-        f"{PLACES_BASE}/places:searchText",
-        json=body,
-        headers=_headers(
-            "places.id,places.displayName,places.formattedAddress,places.location,places.primaryType,places.primaryTypeDisplayName,places.photos"
-        ),
-        timeout=20,
-    )
-    r.raise_for_status()
-    data = r.json() or {}
+    def fetch() -> dict:
+        r = _http.post(
+            f"{PLACES_BASE}/places:searchText",
+            json=body,
+            headers=_headers(SEARCH_FIELD_MASK),
+            timeout=20,
+        )
+        r.raise_for_status()
+        return r.json() or {}
+
+    data = _cached_call("search", {"body": body, "field_mask": SEARCH_FIELD_MASK}, fetch)
     places = data.get("places") or []
     results: list[dict] = []
     for p in places:
@@ -78,22 +209,28 @@ def search_text(query: str, *, lat: float | None = None, lng: float | None = Non
                 "photo_name": photo_name,
             }
         )
-    return [r for r in results if r.get("place_id") and r.get("name")]
+    results = [r for r in results if r.get("place_id") and r.get("name")]
+    return results, (data.get("nextPageToken") or None)
 
 
 def get_details(place_id: str) -> dict:
     place_id = (place_id or "").strip()
     if not place_id:
         raise ValueError("place_id required")
-    r = requests.get(
-        f"{PLACES_BASE}/places/{place_id}",
-        headers=_headers(
-            "id,displayName,formattedAddress,location,internationalPhoneNumber,nationalPhoneNumber,websiteUri,primaryType,primaryTypeDisplayName,googleMapsUri,photos,editorialSummary"
-        ),
-        timeout=20,
-    )
-    r.raise_for_status()
-    p = r.json() or {}
+    return _details_flight.do(place_id, _fetch_details, place_id)
+
+
+def _fetch_details(place_id: str) -> dict:
+    def fetch() -> dict:
+        r = _http.get(
+            f"{PLACES_BASE}/places/{place_id}",
+            headers=_headers(DETAILS_FIELD_MASK),
+            timeout=20,
+        )
+        r.raise_for_status()
+        return r.json() or {}
+
+    p = _cached_call("details", {"place_id": place_id, "field_mask": DETAILS_FIELD_MASK}, fetch)
     loc = p.get("location") or {}
     dn = p.get("displayName") or {}
     photos = p.get("photos") or []
@@ -126,7 +263,11 @@ def get_photo_uri(photo_name: str, *, max_height_px: int = 800, max_width_px: in
         return None
     if not config.GOOGLE_PLACES_API_KEY:
         raise RuntimeError("GOOGLE_PLACES_API_KEY is not configured")
+    key = (photo_name, int(max_height_px), int(max_width_px))
+    return _photo_flight.do(key, _fetch_photo_uri, photo_name, max_height_px, max_width_px)
 
+
+def _fetch_photo_uri(photo_name: str, max_height_px: int, max_width_px: int) -> str | None:
     params = {
         "maxHeightPx": str(int(max_height_px)),
         "maxWidthPx": str(int(max_width_px)),
@@ -137,9 +278,13 @@ def get_photo_uri(photo_name: str, *, max_height_px: int = 800, max_width_px: in
         "User-Agent": UA,
         "Accept": "application/json",
     }
-    r = requests.get(f"{PLACES_BASE}/{photo_name}/media", params=params, headers=headers, timeout=20)
-    r.raise_for_status()
-    payload = r.json() if r.headers.get("content-type", "").startswith("application/json") else {}
+
+    def fetch() -> dict:
+        r = _http.get(f"{PLACES_BASE}/{photo_name}/media", params=params, headers=headers, timeout=20)
+        r.raise_for_status()
+        return r.json() if r.headers.get("content-type", "").startswith("application/json") else {}
+
+    payload = _cached_call("photo", {"photo_name": photo_name, "params": params}, fetch)
     return payload.get("photoUri")
 
 
@@ -159,7 +304,8 @@ def download_photo_to_upload(photo_name: str, restaurant_id: int, kind: str = "g
                              *, max_px: int = 1600) -> str | None:
     """
     Download a Google Places photo by its resource name and persist it into
-    the upload directory.  Returns the public URL path (e.g. /api/media/r5/banner/xxx.jpg)
+    the content-addressed media store.  Returns the public URL path
+    (e.g. /api/media/cas/3f/3f2a...e1.jpg)
     or None on failure.
     """
     # First get the real image URL via the Places API
@@ -168,53 +314,24 @@ def download_photo_to_upload(photo_name: str, restaurant_id: int, kind: str = "g
         return None
 
     # Download the actual image bytes
-    resp = requests.get(photo_uri, timeout=30, stream=True, headers={"User-Agent": UA})
+    resp = _http.get(photo_uri, timeout=30, stream=True, headers={"User-Agent": UA})
     resp.raise_for_status()
 
     ctype = (resp.headers.get("content-type") or "image/jpeg").split(";")[0].strip().lower()
     ext = _EXT_MAP.get(ctype, ".jpg")
 
-    base_dir = Path(config.UPLOAD_DIR)
-    target_dir = base_dir / f"r{restaurant_id}" / kind
-    target_dir.mkdir(parents=True, exist_ok=True)
-
-    fname = f"{secrets.token_urlsafe(12)}{ext}"
-    target_path = target_dir / fname
-
-    total = 0
-    with target_path.open("wb") as f:
-        for chunk in resp.iter_content(chunk_size=256 * 1024):
-            total += len(chunk)
-            if total > config.UPLOAD_MAX_BYTES:
-                target_path.unlink(missing_ok=True)
-                return None
-            f.write(chunk)
-
-    # Best-effort resize using the same logic as uploads router
-    try:
-        from PIL import Image, ImageOps
-        limits = {"banner": (2400, 1350), "logo": (512, 512), "gallery": (2000, 2000)}
-        max_w, max_h = limits.get(kind, (1600, 1600))
-        with Image.open(target_path) as img:
-            img = ImageOps.exif_transpose(img)
-            img.thumbnail((max_w, max_h))
-            save_kw = {}
-            if ext in {".jpg", ".jpeg"}:
-                if img.mode not in ("RGB", "L"):
-                    img = img.convert("RGB")
-                save_kw = {"quality": 85, "optimize": True}
-                img.save(target_path, format="JPEG", **save_kw)
-            elif ext == ".png":
-                img.save(target_path, format="PNG", optimize=True)
-            elif ext == ".webp":
-                if img.mode not in ("RGB", "RGBA"):
-                    img = img.convert("RGB")
-                img.save(target_path, format="WEBP", quality=82, method=6)
-    except Exception:
-        pass  # keep original if Pillow unavailable
+    data = bytearray()
+    for chunk in resp.iter_content(chunk_size=256 * 1024):
+        data += chunk
+        if len(data) > config.UPLOAD_MAX_BYTES:
+            return None
 
-    rel = target_path.relative_to(base_dir).as_posix()
-    return f"{config.UPLOAD_BASE_PATH}/{rel}"
+    # Content-addressed: re-importing the same place reuses the stored file.
+    stored = media_store.store(bytes(data), ext, kind)
+    if not stored:
+        return None
+    media_variants.schedule(stored["url"])
+    return stored["url"]
 
 
 # ---------------------------------------------------------------------------
@@ -231,7 +348,7 @@ def fetch_website_logo(website_url: str, restaurant_id: int) -> str | None:
         return None
 
     try:
-        resp = requests.get(website_url, timeout=15, headers={
+        resp = _http.get(website_url, timeout=15, headers={
             "User-Agent": UA,
             "Accept": "text/html",
         }, allow_redirects=True)
@@ -269,7 +386,7 @@ def fetch_website_logo(website_url: str, restaurant_id: int) -> str | None:
 
     # Download and save as logo
     try:
-        img_resp = requests.get(logo_url, timeout=15, headers={"User-Agent": UA}, stream=True)
+        img_resp = _http.get(logo_url, timeout=15, headers={"User-Agent": UA}, stream=True)
         img_resp.raise_for_status()
 
         ctype = (img_resp.headers.get("content-type") or "").split(";")[0].strip().lower()
@@ -286,42 +403,58 @@ def fetch_website_logo(website_url: str, restaurant_id: int) -> str | None:
             else:
                 ext = ".jpg"
 
-        base_dir = Path(config.UPLOAD_DIR)
-        target_dir = base_dir / f"r{restaurant_id}" / "logo"
-        target_dir.mkdir(parents=True, exist_ok=True)
+        data = bytearray()
+        for chunk in img_resp.iter_content(chunk_size=256 * 1024):
+            data += chunk
+            if len(data) > 2 * 1024 * 1024:  # 2MB limit for logos
+                return None
 
-        fname = f"{secrets.token_urlsafe(12)}{ext}"
-        target_path = target_dir / fname
+        stored = media_store.store(bytes(data), ext, "logo")
+        if not stored:
+            return None
+        media_variants.schedule(stored["url"])
+        return stored["url"]
+    except Exception:
+        return None
 
-        total = 0
-        with target_path.open("wb") as f:
-            for chunk in img_resp.iter_content(chunk_size=256 * 1024):
-                total += len(chunk)
-                if total > 2 * 1024 * 1024:  # 2MB limit for logos
-                    target_path.unlink(missing_ok=True)
-                    return None
-                f.write(chunk)
 
-        # Resize to logo dimensions
+# ---------------------------------------------------------------------------
+# Concurrent photo + logo ingestion for Places import/fill
+# ---------------------------------------------------------------------------
+
+def ingest_place_media(photo_names: list[str], restaurant_id: int, website: str | None = None,
+                       *, max_photos: int = MAX_IMPORT_PHOTOS) -> dict:
+    """
+    Download up to `max_photos` Places photos (first becomes the banner, the rest gallery)
+    and the website logo concurrently on a bounded pool. Individual failures are skipped.
+    Returns {"banner_url", "gallery_urls", "logo_url"}.
+    """
+    photo_futures = []
+    for i, pname in enumerate((photo_names or [])[:max_photos]):
+        kind = "banner" if i == 0 else "gallery"
+        max_px = 2400 if i == 0 else 1600
+        photo_futures.append(
+            _fetch_pool.submit(download_photo_to_upload, pname, restaurant_id, kind=kind, max_px=max_px)
+        )
+    logo_future = _fetch_pool.submit(fetch_website_logo, website, restaurant_id) if website else None
+
+    urls: list[str | None] = []
+    for fut in photo_futures:
+        try:
+            urls.append(fut.result())
+        except Exception as e:
+            log.info("Places photo download failed for restaurant %s: %s", restaurant_id, e)
+            urls.append(None)
+
+    logo_url = None
+    if logo_future is not None:
         try:
-            from PIL import Image, ImageOps
-            with Image.open(target_path) as img:
-                img = ImageOps.exif_transpose(img)
-                img.thumbnail((512, 512))
-                if ext in {".jpg", ".jpeg"}:
-                    if img.mode not in ("RGB", "L"):
-                        img = img.convert("RGB")
-                    img.save(target_path, format="JPEG", quality=85, optimize=True)
-                elif ext == ".png":
-                    img.save(target_path, format="PNG", optimize=True)
-                elif ext == ".webp":
-                    if img.mode not in ("RGB", "RGBA"):
-                        img = img.convert("RGB")
-                    img.save(target_path, format="WEBP", quality=82, method=6)
+            logo_url = logo_future.result()
         except Exception:
-            pass
+            logo_url = None
 
-        rel = target_path.relative_to(base_dir).as_posix()
-        return f"{config.UPLOAD_BASE_PATH}/{rel}"
-    except Exception:
-        return None
+    return {
+        "banner_url": urls[0] if urls else None,
+        "gallery_urls": [u for u in urls[1:] if u],
+        "logo_url": logo_url,
+    }
@@ -0,0 +1,169 @@
+"""
+Bounded process pool for Pillow work (upload processing, Places photo resizes).
+
+Decoding/resizing/re-encoding large images holds the GIL for hundreds of milliseconds, so it
+runs in spawned worker processes: request threads and the event loop stay responsive, and at
+most IMAGE_POOL_WORKERS images are processed at once. Tracks processing time, time spent
+waiting in the queue, and queue depth for /superadmin/metrics.
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable
+
+from .. import config
+
+log = logging.getLogger(__name__)
+
+_pool: ProcessPoolExecutor | None = None
+_pool_lock = threading.Lock()
+# Used only while the process pool is broken / being rebuilt.
+_fallback = ThreadPoolExecutor(max_workers=1, thread_name_prefix="image-fallback")
+
+_stats_lock = threading.Lock()
+_stats = {
+    "submitted": 0,
+    "completed": 0,
+    "errors": 0,
+    "in_flight": 0,
+    "max_in_flight": 0,
+    "pool_restarts": 0,
+    "process_seconds": 0.0,
+    "wait_seconds": 0.0,
+}
+_recent_process: deque = deque(maxlen=200)
+
+
+def _timed(fn: Callable[..., Any], args: tuple, submitted_at: float) -> tuple[Any, float, float]:
+    """Runs in the worker: returns (result, processing seconds, seconds spent queued)."""
+    started = time.time()
+    result = fn(*args)
+    return result, time.time() - started, max(0.0, started - submitted_at)
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn: forking a process that runs uvicorn + scheduler threads is unsafe.
+            _pool = ProcessPoolExecutor(
+                max_workers=max(1, config.IMAGE_POOL_WORKERS),
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pool
+
+
+def _reset_pool(broken) -> None:
+    """Drop `broken` if it is still the current pool; a pool another caller already rebuilt is kept."""
+    global _pool
+    with _pool_lock:
+        if _pool is not broken:
+            return
+        _pool = None
+    log.warning("Image pool broken; restarting it")
+    with _stats_lock:
+        _stats["pool_restarts"] += 1
+    broken.shutdown(wait=False, cancel_futures=True)
+
+
+def submit(fn: Callable[..., Any], *args) -> Future:
+    """
+    Run fn(*args) in the pool. fn and args must be picklable (module-level function).
+    The returned future resolves to fn's result; errors from fn are re-raised.
+    """
+    with _stats_lock:
+        _stats["submitted"] += 1
+        _stats["in_flight"] += 1
+        _stats["max_in_flight"] = max(_stats["max_in_flight"], _stats["in_flight"])
+
+    outer: Future = Future()
+
+    def done(inner: Future) -> None:
+        if not inner.cancelled() and isinstance(inner.exception(), BrokenProcessPool):
+            # A worker died (OOM on a huge image, killed). Rebuild and run this one on a thread.
+            _reset_pool(pool)
+            retry = _fallback.submit(_timed, fn, args, time.time())
+            retry.add_done_callback(lambda f: _finish(outer, f))
+            return
+        _finish(outer, inner)
+
+    pool = _get_pool()
+    try:
+        inner = pool.submit(_timed, fn, args, time.time())
+    except (BrokenProcessPool, RuntimeError):
+        _reset_pool(pool)
+        inner = _fallback.submit(_timed, fn, args, time.time())
+    inner.add_done_callback(done)
+    return outer
+
+
+def _finish(outer: Future, inner: Future) -> None:
+    try:
+        result, process_s, wait_s = inner.result()
+    except BaseException as e:
+        _finish_error(outer, e)
+        return
+    _finish_ok(outer, result, process_s, wait_s)
+
+
+def _finish_ok(outer: Future, result: Any, process_s: float, wait_s: float) -> None:
+    with _stats_lock:
+        _stats["in_flight"] -= 1
+        _stats["completed"] += 1
+        _stats["process_seconds"] += process_s
+        _stats["wait_seconds"] += wait_s
+        _recent_process.append(process_s)
+    outer.set_result(result)
+
+
+def _finish_error(outer: Future, e: BaseException) -> None:
+    with _stats_lock:
+        _stats["in_flight"] -= 1
+        _stats["errors"] += 1
+    outer.set_exception(e)
+
+
+def run_sync(fn: Callable[..., Any], *args, timeout: float | None = 120) -> Any:
+    """Blocking call for worker threads / background jobs."""
+    return submit(fn, *args).result(timeout=timeout)
+
+
+async def run(fn: Callable[..., Any], *args) -> Any:
+    """Await fn(*args) from async endpoints without blocking the event loop."""
+    return await asyncio.wrap_future(submit(fn, *args))
+
+
+def stats() -> dict:
+    with _stats_lock:
+        s = dict(_stats)
+        recent = sorted(_recent_process)
+    workers = max(1, config.IMAGE_POOL_WORKERS)
+    done = s["completed"]
+    return {
+        "workers": workers,
+        "in_flight": s["in_flight"],
+        "queue_depth": max(0, s["in_flight"] - workers),
+        "max_in_flight": s["max_in_flight"],
+        "submitted": s["submitted"],
+        "completed": done,
+        "errors": s["errors"],
+        "pool_restarts": s["pool_restarts"],
+        "avg_process_ms": round(s["process_seconds"] / done * 1000, 1) if done else None,
+        "avg_wait_ms": round(s["wait_seconds"] / done * 1000, 1) if done else None,
+        "p95_process_ms": round(recent[min(len(recent) - 1, int(len(recent) * 0.95))] * 1000, 1)
+        if recent else None,
+    }
+
+
+def shutdown() -> None:
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
@@ -1,15 +1,42 @@
 import json
+import logging
+import re
+import shutil
+import threading
 import time
 from datetime import datetime, timezone
+from pathlib import Path
 
 import requests
 
-from ..database import get_db
+from .. import config
+from ..database import get_db, is_sqlite
+from . import image_pool, singleflight
 
+log = logging.getLogger(__name__)
 
 INSTAGRAM_APP_ID = "936619743392459"
 UA = "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36"
 
+CACHE_TTL_SECONDS = 1800
+# Always scrape the most posts any page can ask for, so one cache row serves every `limit`.
+FETCH_LIMIT = 12
+REFRESH_BATCH_SIZE = 5
+BACKOFF_BASE_SECONDS = 300
+BACKOFF_MAX_SECONDS = 6 * 3600
+MEDIA_KIND = "instagram"
+
+# Handles waiting for a background refresh (dict keeps insertion order and dedupes). On the
+# Postgres backend the queue lives in instagram_refresh_queue instead, so handles queued by
+# any node are drained by the scheduler node.
+_refresh_queue: dict[str, None] = {}
+# handle -> (retry_not_before_ts, consecutive_failures); per node, authoritative on the draining node
+_backoff: dict[str, tuple[float, int]] = {}
+_refresh_lock = threading.Lock()
+# Per-handle coalescing of everything that rewrites a handle's cache and media directory
+# (scheduled refresh, post-ingest mirroring), so two of them never interleave.
+_flight = singleflight.group("instagram_profile")
+
 
 def _iso_from_unix(ts: int | None) -> str | None:
     if not ts:
@@ -17,6 +44,21 @@ def _iso_from_unix(ts: int | None) -> str | None:
     return datetime.fromtimestamp(int(ts), tz=timezone.utc).isoformat()
 
 
+def _clean_handle(handle: str | None) -> str:
+    return (handle or "").strip().lstrip("@").strip()
+
+
+def _parse_fetched_at(raw: str | None) -> int:
+    # SQLite CURRENT_TIMESTAMP is UTC without an offset.
+    try:
+        dt = datetime.fromisoformat(str(raw).replace("Z", "+00:00"))
+    except Exception:
+        return 0
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return int(dt.timestamp())
+
+
 def _scrape_public_profile(handle: str, limit: int) -> list[dict]:
     # Best-effort public endpoint. This can break if Instagram changes it.
     url = f"https://i.instagram.com/api/v1/users/web_profile_info/?username={handle}"
@@ -56,65 +98,383 @@ def _scrape_public_profile(handle: str, limit: int) -> list[dict]:
     return posts
 
 
-def get_recent_posts(handle: str, limit: int = 8, ttl_seconds: int = 1800) -> list[dict]:
-    handle = (handle or "").lstrip("@").strip()
-    if not handle:
-        return []
+# ---------------------------------------------------------------------------
+# Mirror post images into UPLOAD_DIR so pages don't depend on expiring CDN URLs
+# ---------------------------------------------------------------------------
+
+def _restaurant_id_for_handle(handle: str) -> int | None:
+    with get_db() as db:
+        row = db.execute(
+            "SELECT id FROM restaurants WHERE LOWER(LTRIM(TRIM(instagram_handle), '@')) = LOWER(?) "
+            "ORDER BY is_active DESC, id LIMIT 1",
+            (handle,),
+        ).fetchone()
+    return int(row["id"]) if row else None
+
+
+def _media_stem(post: dict) -> str:
+    return re.sub(r"[^A-Za-z0-9_-]", "", str(post.get("id") or post.get("shortcode") or ""))
+
+
+def _media_url(path: Path) -> str:
+    rel = path.relative_to(Path(config.UPLOAD_DIR)).as_posix()
+    return f"{config.UPLOAD_BASE_PATH}/{rel}"
 
-    now = int(time.time())
-    cached_posts: list[dict] | None = None
 
+def _derive_images(part: Path, thumb: Path, full_webp: Path, thumb_webp: Path) -> None:
+    """Runs in the image pool: resize the download in place, then write the thumbnail and WebP copies."""
+    from ..routers.uploads import _resize_in_place, _save_webp_copy
+
+    _resize_in_place(part, MEDIA_KIND)
+    shutil.copyfile(part, thumb)
+    _resize_in_place(thumb, f"{MEDIA_KIND}_thumb")
+    _save_webp_copy(part, full_webp)
+    _save_webp_copy(thumb, thumb_webp)
+
+
+def _mirror_one(src_url: str, target_dir: Path, stem: str) -> None:
+    """Download one post image and write {stem}.jpg, {stem}_thumb.jpg and their .webp twins."""
+    full = target_dir / f"{stem}.jpg"
+    thumb = target_dir / f"{stem}_thumb.jpg"
+    part = target_dir / f"{stem}.part.jpg"
+    outputs = [full, thumb, full.with_suffix(".webp"), thumb.with_suffix(".webp")]
+    try:
+        resp = requests.get(src_url, timeout=20, stream=True, headers={"User-Agent": UA})
+        resp.raise_for_status()
+        total = 0
+        with part.open("wb") as f:
+            for chunk in resp.iter_content(chunk_size=256 * 1024):
+                total += len(chunk)
+                if total > config.UPLOAD_MAX_BYTES:
+                    raise ValueError("Instagram image exceeds UPLOAD_MAX_BYTES")
+                f.write(chunk)
+
+        image_pool.run_sync(_derive_images, part, thumb, full.with_suffix(".webp"), thumb.with_suffix(".webp"))
+        # Publish the main file last: its presence marks the post as fully mirrored.
+        part.replace(full)
+    except Exception:
+        for p in [part, *outputs]:
+            p.unlink(missing_ok=True)
+        raise
+
+
+def _cleanup_media(target_dir: Path, keep_stems: set[str]) -> int:
+    removed = 0
+    for f in target_dir.iterdir():
+        if not f.is_file():
+            continue
+        stem = f.name.split(".", 1)[0].removesuffix("_thumb")
+        if stem not in keep_stems:
+            f.unlink(missing_ok=True)
+            removed += 1
+    return removed
+
+
+def _mirror_media(handle: str, posts: list[dict]) -> list[dict]:
+    """
+    Point each post at locally mirrored images (full + thumbnail, JPEG + WebP) and delete
+    media for posts that dropped out of the feed. Posts that fail to mirror keep their CDN URL.
+    """
+    rid = _restaurant_id_for_handle(handle)
+    if not rid:
+        return posts
+
+    target_dir = Path(config.UPLOAD_DIR) / f"r{rid}" / MEDIA_KIND
+    target_dir.mkdir(parents=True, exist_ok=True)
+
+    out: list[dict] = []
+    stems: set[str] = set()
+    for post in posts:
+        post = dict(post)
+        stem = _media_stem(post)
+        if not stem:
+            out.append(post)
+            continue
+        stems.add(stem)
+
+        full = target_dir / f"{stem}.jpg"
+        src_url = post.get("source_media_url") or post.get("media_url")
+        if not full.exists() and src_url and src_url.startswith("http"):
+            try:
+                _mirror_one(src_url, target_dir, stem)
+            except Exception as e:
+                log.warning("Could not mirror Instagram media %s for @%s: %s", stem, handle, e)
+
+        if full.exists():
+            thumb = target_dir / f"{stem}_thumb.jpg"
+            post["source_media_url"] = src_url
+            post["media_url"] = _media_url(full)
+            post["media_url_webp"] = _media_url(full.with_suffix(".webp"))
+            post["thumbnail_url"] = _media_url(thumb)
+            post["thumbnail_url_webp"] = _media_url(thumb.with_suffix(".webp"))
+        out.append(post)
+
+    removed = _cleanup_media(target_dir, stems)
+    if removed:
+        log.info("Removed %s stale Instagram media files for @%s", removed, handle)
+    return out
+
+
+def _read_cache(handle: str) -> tuple[int, list[dict] | None]:
+    """Return (fetched_at unix ts, cached posts) for a handle; (0, None) when not cached."""
     with get_db() as db:
         row = db.execute(
             "SELECT fetched_at, json FROM instagram_cache WHERE instagram_handle = ?",
             (handle,),
         ).fetchone()
-        if row:
-            fetched_at = row["fetched_at"]
-            try:
-                # SQLite returns str timestamp by default.
-                fetched_ts = int(datetime.fromisoformat(fetched_at.replace("Z", "+00:00")).timestamp())
-            except Exception:
-                fetched_ts = 0
-            try:
-                cached = json.loads(row["json"])
-                if isinstance(cached, list):
-                    cached_posts = cached
-            except Exception:
-                cached_posts = None
-
-            # If cache is fresh AND has at least 1 post, use it.
-            # If cache is fresh but empty, retry fetch anyway (empty caches happen when IG blocks/rate-limits).
-            if fetched_ts and (now - fetched_ts) < ttl_seconds and cached_posts and len(cached_posts) > 0:
-                return cached_posts[:limit]
-
-    # Cache miss (or stale): fetch again.
+    if not row:
+        return 0, None
     try:
-        posts = _scrape_public_profile(handle, limit=limit)
+        cached = json.loads(row["json"])
+    except Exception:
+        cached = None
+    return _parse_fetched_at(row["fetched_at"]), (cached if isinstance(cached, list) else None)
+
+
+def _write_cache(handle: str, posts: list[dict]) -> None:
+    with get_db() as db:
+        db.execute(
+            "INSERT INTO instagram_cache(instagram_handle, fetched_at, json) VALUES (?, CURRENT_TIMESTAMP, ?) "
+            "ON CONFLICT(instagram_handle) DO UPDATE SET fetched_at = CURRENT_TIMESTAMP, json = excluded.json",
+            (handle, json.dumps(posts)),
+        )
+
+
+def _is_stale(fetched_ts: int, posts: list[dict] | None, ttl_seconds: int) -> bool:
+    # Fresh-but-empty caches count as stale (empty caches happen when IG blocks/rate-limits).
+    return not fetched_ts or (time.time() - fetched_ts) >= ttl_seconds or not posts
+
+
+def get_recent_posts(handle: str, limit: int = 8, ttl_seconds: int = CACHE_TTL_SECONDS) -> list[dict]:
+    """
+    Serve posts straight from instagram_cache. Stale or missing entries are queued for the
+    background refresher; the request never waits on Instagram.
+    """
+    handle = _clean_handle(handle)
+    if not handle:
+        return []
+
+    fetched_ts, cached_posts = _read_cache(handle)
+    if _is_stale(fetched_ts, cached_posts, ttl_seconds):
+        enqueue_refresh(handle)
+    return (cached_posts or [])[:limit]
+
+
+def enqueue_refresh(handle: str) -> bool:
+    """Queue a handle for background refresh. Returns False if it is backing off."""
+    handle = _clean_handle(handle)
+    if not handle:
+        return False
+    with _refresh_lock:
+        retry_at, _ = _backoff.get(handle, (0.0, 0))
+        if retry_at > time.time():
+            return False
+        if is_sqlite():
+            _refresh_queue[handle] = None
+            return True
+    with get_db() as db:
+        db.execute("INSERT INTO instagram_refresh_queue (handle) VALUES (?) ON CONFLICT (handle) DO NOTHING", (handle,))
+    return True
+
+
+def _pop_queued() -> str | None:
+    if is_sqlite():
+        with _refresh_lock:
+            if not _refresh_queue:
+                return None
+            handle = next(iter(_refresh_queue))
+            del _refresh_queue[handle]
+            return handle
+    # SKIP LOCKED keeps two draining nodes from taking the same handle.
+    with get_db() as db:
+        row = db.execute(
+            """DELETE FROM instagram_refresh_queue WHERE handle = (
+                   SELECT handle FROM instagram_refresh_queue ORDER BY queued_at LIMIT 1 FOR UPDATE SKIP LOCKED
+               ) RETURNING handle"""
+        ).fetchone()
+    return row["handle"] if row else None
+
+
+def _backing_off(handle: str) -> bool:
+    with _refresh_lock:
+        retry_at, _ = _backoff.get(handle, (0.0, 0))
+    return retry_at > time.time()
+
+
+def _record_failure(handle: str, rate_limited: bool, reason: str = "failed") -> None:
+    with _refresh_lock:
+        _, failures = _backoff.get(handle, (0.0, 0))
+        failures += 1
+        base = BACKOFF_BASE_SECONDS if rate_limited else BACKOFF_BASE_SECONDS // 5
+        delay = min(BACKOFF_MAX_SECONDS, base * (2 ** (failures - 1)))
+        _backoff[handle] = (time.time() + delay, failures)
+    log.info("Instagram refresh for @%s %s (rate_limited=%s); backing off %ss", handle, reason, rate_limited, delay)
+
+
+def refresh_handle(handle: str) -> bool:
+    """Fetch a handle from Instagram and update the cache. Returns True when fresh posts were stored."""
+    handle = _clean_handle(handle)
+    if not handle:
+        return False
+    return bool(_flight.do(handle, _refresh_handle, handle))
+
+
+def _refresh_handle(handle: str) -> bool:
+    try:
+        posts = _scrape_public_profile(handle, limit=FETCH_LIMIT)
     except requests.HTTPError as e:
-        # Instagram will sometimes rate-limit datacenter IPs (429). In that case:
-        # - don't overwrite any existing cache with empty data
-        # - if we have cached posts (even stale), serve them
-        resp = getattr(e, "response", None)
-        status = getattr(resp, "status_code", None)
-        if status == 429:
-            return (cached_posts or [])[:limit]
-        posts = []
+        status = getattr(getattr(e, "response", None), "status_code", None)
+        _record_failure(handle, rate_limited=status == 429)
+        return False
     except Exception:
-        posts = []
+        _record_failure(handle, rate_limited=False)
+        return False
+
+    if posts:
+        with _refresh_lock:
+            _backoff.pop(handle, None)
+        _write_cache(handle, _mirror_media(handle, posts))
+        return True
 
-    # If fetch failed but we have older cached posts, prefer stale posts over returning an empty feed.
-    if (not posts) and cached_posts and len(cached_posts) > 0:
-        return cached_posts[:limit]
+    # An empty result is usually Instagram blocking us: back off like a failure, otherwise the
+    # handle stays stale and is scraped again on every drain.
+    _record_failure(handle, rate_limited=False, reason="returned no posts")
+    # Only persist an empty list when there's no cache yet; never overwrite real posts with a
+    # transient empty response.
+    _, cached_posts = _read_cache(handle)
+    if cached_posts is None:
+        _write_cache(handle, [])
+    return False
 
-    # Only write cache when we have data (or there's no cache yet). Avoid persisting empty lists
-    # caused by transient blocks/rate-limits.
-    if posts or cached_posts is None:
+
+_POST_FIELDS = ("id", "shortcode", "permalink", "media_url", "caption", "timestamp", "is_video")
+
+
+def _clean_ingested_post(raw) -> dict | None:
+    if not isinstance(raw, dict):
+        return None
+    shortcode = str(raw.get("shortcode") or "").strip()
+    if not shortcode:
+        return None
+    post = {k: raw.get(k) for k in _POST_FIELDS}
+    post["id"] = str(post["id"] or shortcode)
+    post["shortcode"] = shortcode
+    post["permalink"] = post["permalink"] or f"https://www.instagram.com/p/{shortcode}/"
+    post["is_video"] = bool(post["is_video"])
+    return post
+
+
+def ingest_posts(batch: dict[str, list]) -> dict:
+    """
+    Upsert externally scraped posts ({handle: [post, ...]}) in a single transaction.
+    Handles with no valid posts are skipped so an empty scrape never wipes a good cache.
+    """
+    rows: list[tuple[str, str]] = []
+    skipped: list[str] = []
+    for raw_handle, raw_posts in (batch or {}).items():
+        handle = _clean_handle(raw_handle)
+        posts = [p for p in (_clean_ingested_post(r) for r in (raw_posts or [])) if p][:FETCH_LIMIT]
+        if not handle or not posts:
+            skipped.append(str(raw_handle))
+            continue
+        rows.append((handle, json.dumps(posts)))
+
+    if rows:
         with get_db() as db:
-            db.execute(
+            db.executemany(
                 "INSERT INTO instagram_cache(instagram_handle, fetched_at, json) VALUES (?, CURRENT_TIMESTAMP, ?) "
                 "ON CONFLICT(instagram_handle) DO UPDATE SET fetched_at = CURRENT_TIMESTAMP, json = excluded.json",
-                (handle, json.dumps(posts)),
+                rows,
             )
+        with _refresh_lock:
+            for handle, _ in rows:
+                _backoff.pop(handle, None)
+                _refresh_queue.pop(handle, None)
+        if not is_sqlite():
+            with get_db() as db:
+                db.executemany("DELETE FROM instagram_refresh_queue WHERE handle = ?", [(h,) for h, _ in rows])
+
+    return {"updated": [h for h, _ in rows], "skipped": skipped}
+
+
+def mirror_cached_handles(handles: list[str]) -> None:
+    """Mirror media for handles whose cache was written without it (e.g. bulk ingest)."""
+    for handle in handles:
+        try:
+            # Joining an in-flight refresh is enough: it mirrors the posts it stores.
+            _flight.do(handle, _mirror_cached, handle)
+        except Exception:
+            log.exception("Mirroring Instagram media failed for @%s", handle)
 
-    return posts[:limit]
+
+def _mirror_cached(handle: str) -> bool:
+    _, posts = _read_cache(handle)
+    if not posts:
+        return False
+    _write_cache(handle, _mirror_media(handle, posts))
+    return True
+
+
+def drain_refresh_queue(max_handles: int = REFRESH_BATCH_SIZE) -> int:
+    """Scheduled job: refresh up to `max_handles` queued handles. Returns how many were attempted."""
+    attempted = 0
+    while attempted < max_handles:
+        handle = _pop_queued()
+        if handle is None:
+            break
+        if _backing_off(handle):
+            continue  # queued by another node that doesn't know this node's backoff
+        attempted += 1
+        try:
+            refresh_handle(handle)
+        except Exception:
+            log.exception("Instagram refresh crashed for @%s", handle)
+    return attempted
+
+
+def prewarm_active_handles(ttl_seconds: int = CACHE_TTL_SECONDS) -> int:
+    """Scheduled job: queue every active restaurant's handle whose cache is stale or missing."""
+    with get_db() as db:
+        rows = db.execute(
+            "SELECT DISTINCT instagram_handle FROM restaurants "
+            "WHERE is_active = 1 AND instagram_handle IS NOT NULL AND instagram_handle != ''"
+        ).fetchall()
+        cache_rows = db.execute("SELECT instagram_handle, fetched_at, json FROM instagram_cache").fetchall()
+
+    cached = {}
+    for r in cache_rows:
+        try:
+            posts = json.loads(r["json"])
+        except Exception:
+            posts = None
+        cached[r["instagram_handle"]] = (_parse_fetched_at(r["fetched_at"]), posts if isinstance(posts, list) else None)
+
+    queued = 0
+    for r in rows:
+        handle = _clean_handle(r["instagram_handle"])
+        if not handle:
+            continue
+        fetched_ts, posts = cached.get(handle, (0, None))
+        if _is_stale(fetched_ts, posts, ttl_seconds) and enqueue_refresh(handle):
+            queued += 1
+    return queued
+
+
+def refresh_status() -> dict:
+    """Snapshot of the background refresher for diagnostics."""
+    now = time.time()
+    if is_sqlite():
+        with _refresh_lock:
+            queued = list(_refresh_queue)
+    else:
+        with get_db() as db:
+            queued = [r["handle"] for r in db.execute("SELECT handle FROM instagram_refresh_queue ORDER BY queued_at")]
+    with _refresh_lock:
+        return {
+            "queued": queued,
+            "backing_off": {
+                h: {"retry_in_seconds": int(until - now), "failures": failures}
+                for h, (until, failures) in _backoff.items()
+                if until > now
+            },
+        }
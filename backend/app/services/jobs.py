@@ -0,0 +1,240 @@
+"""
+In-process background jobs with pollable status.
+
+Jobs always run on the node that submitted them. With SQLite (one node) their state is kept
+in memory only and lost on restart. With the Postgres backend every job is also mirrored to
+the shared `jobs` table, so a status poll, the job list and the is_running() guards give the
+same answer on every node. Each node heartbeats its unfinished jobs; a queued/running row
+whose heartbeat is older than STALE_SECONDS belongs to a node that died and is reported as
+an error.
+"""
+
+import json
+import logging
+import secrets
+import socket
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+from ..database import get_db, is_sqlite
+
+log = logging.getLogger(__name__)
+
+MAX_WORKERS = 2
+MAX_RETAINED = 100
+# Shared job table (Postgres backend only)
+SAVE_INTERVAL_SECONDS = 1.0  # progress updates are written at most this often
+HEARTBEAT_SECONDS = 30
+STALE_SECONDS = 180
+RETENTION_SECONDS = 7 * 24 * 3600
+NODE = f"{socket.gethostname()}-{secrets.token_hex(3)}"
+
+_executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="job")
+_jobs: "OrderedDict[str, Job]" = OrderedDict()
+_lock = threading.Lock()
+_heartbeat: threading.Thread | None = None
+
+
+class Job:
+    def __init__(self, kind: str, params: dict | None = None):
+        self.id = secrets.token_urlsafe(9)
+        self.kind = kind
+        self.params = params or {}
+        self.status = "queued"  # queued|running|done|error
+        self.progress: dict[str, Any] = {}
+        self.result: Any = None
+        self.error: str | None = None
+        self.created_at = time.time()
+        self.started_at: float | None = None
+        self.finished_at: float | None = None
+        self._lock = threading.Lock()
+        self._saved_at = 0.0
+
+    def update(self, **progress) -> None:
+        """Merge progress fields (e.g. done=3, total=10) for pollers."""
+        with self._lock:
+            self.progress.update(progress)
+        self._save()
+
+    def _save(self, force: bool = False) -> None:
+        """Mirror this job into the shared table (Postgres backend); throttled unless force."""
+        if is_sqlite():
+            return
+        now = time.time()
+        if not force and now - self._saved_at < SAVE_INTERVAL_SECONDS:
+            return
+        self._saved_at = now
+        d = self.to_dict()
+        try:
+            with get_db() as db:
+                db.execute(
+                    """INSERT INTO jobs (id, kind, status, node, params_json, progress_json, result_json, error,
+                                         created_at, started_at, finished_at, updated_at)
+                       VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                       ON CONFLICT (id) DO UPDATE SET
+                           status = excluded.status, progress_json = excluded.progress_json,
+                           result_json = excluded.result_json, error = excluded.error,
+                           started_at = excluded.started_at, finished_at = excluded.finished_at,
+                           updated_at = excluded.updated_at""",
+                    (
+                        d["id"], d["kind"], d["status"], NODE,
+                        json.dumps(d["params"], default=str), json.dumps(d["progress"], default=str),
+                        json.dumps(d["result"], default=str), d["error"],
+                        d["created_at"], d["started_at"], d["finished_at"], now,
+                    ),
+                )
+        except Exception:
+            log.exception("Could not save job %s to the shared job table", self.id)
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            progress = dict(self.progress)
+        end = self.finished_at or time.time()
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "params": self.params,
+            "progress": progress,
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "duration_seconds": round(end - self.started_at, 2) if self.started_at else None,
+            "status_url": f"/api/superadmin/jobs/{self.id}",
+        }
+
+
+def _run(job: Job, fn: Callable[..., Any], args: tuple, kwargs: dict) -> None:
+    job.status = "running"
+    job.started_at = time.time()
+    job._save(force=True)
+    try:
+        job.result = fn(job, *args, **kwargs)
+        job.status = "done"
+    except Exception as e:
+        # HTTPException carries its message in .detail
+        job.error = str(getattr(e, "detail", None) or e)[:1000]
+        job.status = "error"
+        log.exception("Background job %s (%s) failed", job.id, job.kind)
+    finally:
+        job.finished_at = time.time()
+        job._save(force=True)
+
+
+def _evict() -> None:
+    """Drop the oldest finished jobs beyond MAX_RETAINED. Queued/running jobs are always kept. Call under _lock."""
+    excess = len(_jobs) - MAX_RETAINED
+    if excess <= 0:
+        return
+    finished = [jid for jid, j in _jobs.items() if j.status in ("done", "error")]
+    for jid in finished[:excess]:
+        del _jobs[jid]
+
+
+def submit(kind: str, fn: Callable[..., Any], *args, params: dict | None = None, **kwargs) -> Job:
+    """Run fn(job, *args, **kwargs) on the job pool and return the Job immediately."""
+    job = Job(kind, params)
+    with _lock:
+        _jobs[job.id] = job
+        _evict()
+    if not is_sqlite():
+        job._save(force=True)
+        _start_heartbeat()
+    _executor.submit(_run, job, fn, args, kwargs)
+    return job
+
+
+def get(job_id: str) -> "Job | StoredJob | None":
+    with _lock:
+        job = _jobs.get(job_id)
+    if job is not None or is_sqlite():
+        return job
+    with get_db() as db:
+        row = db.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+    return StoredJob(row) if row else None
+
+
+def recent(kind: str | None = None, limit: int = 50) -> list[dict]:
+    if not is_sqlite():
+        where, params = ("WHERE kind = ?", [kind]) if kind else ("", [])
+        with get_db() as db:
+            rows = db.execute(f"SELECT * FROM jobs {where} ORDER BY created_at DESC LIMIT ?", params + [limit]).fetchall()
+        return [StoredJob(r).to_dict() for r in rows]
+    with _lock:
+        items = list(_jobs.values())
+    items = [j for j in reversed(items) if kind is None or j.kind == kind]
+    return [j.to_dict() for j in items[:limit]]
+
+
+def is_running(kind: str) -> bool:
+    with _lock:
+        if any(j.kind == kind and j.status in ("queued", "running") for j in _jobs.values()):
+            return True
+    if is_sqlite():
+        return False
+    with get_db() as db:
+        return db.execute(
+            "SELECT 1 FROM jobs WHERE kind = ? AND status IN ('queued', 'running') AND updated_at >= ? LIMIT 1",
+            (kind, time.time() - STALE_SECONDS),
+        ).fetchone() is not None
+
+
+class StoredJob:
+    """A job row from the shared table (submitted on another node, or by this one)."""
+
+    def __init__(self, row):
+        self._row = dict(row)
+
+    def to_dict(self) -> dict:
+        r = self._row
+        status, error = r["status"], r["error"]
+        if status in ("queued", "running") and (r["updated_at"] or 0) < time.time() - STALE_SECONDS:
+            status, error = "error", f"Node {r['node']} stopped reporting (restarted or crashed)"
+        end = r["finished_at"] or time.time()
+        return {
+            "id": r["id"],
+            "kind": r["kind"],
+            "status": status,
+            "params": json.loads(r["params_json"] or "{}"),
+            "progress": json.loads(r["progress_json"] or "{}"),
+            "result": json.loads(r["result_json"] or "null"),
+            "error": error,
+            "created_at": r["created_at"],
+            "started_at": r["started_at"],
+            "finished_at": r["finished_at"],
+            "duration_seconds": round(end - r["started_at"], 2) if r["started_at"] else None,
+            "status_url": f"/api/superadmin/jobs/{r['id']}",
+        }
+
+
+def _heartbeat_loop() -> None:
+    while True:
+        time.sleep(HEARTBEAT_SECONDS)
+        with _lock:
+            ids = [jid for jid, j in _jobs.items() if j.status in ("queued", "running")]
+        try:
+            with get_db() as db:
+                if ids:
+                    db.execute(
+                        f"UPDATE jobs SET updated_at = ? WHERE id IN ({','.join('?' * len(ids))})",
+                        [time.time()] + ids,
+                    )
+                db.execute(
+                    "DELETE FROM jobs WHERE finished_at IS NOT NULL AND finished_at < ?",
+                    (time.time() - RETENTION_SECONDS,),
+                )
+        except Exception:
+            log.exception("Job heartbeat failed")
+
+
+def _start_heartbeat() -> None:
+    global _heartbeat
+    with _lock:
+        if _heartbeat is None:
+            _heartbeat = threading.Thread(target=_heartbeat_loop, name="job-heartbeat", daemon=True)
+            _heartbeat.start()
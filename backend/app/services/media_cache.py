@@ -0,0 +1,289 @@
+"""
+On-demand resized copies of stored images: `/api/media/<path>?w=640&fmt=webp`.
+
+Widths are limited to WIDTHS so the cache can't be filled with arbitrary sizes. Each
+derivative is rendered once on the image pool and stored in MEDIA_CACHE_DIR under a
+content-addressed name (sha256 of source bytes + width + format), so a replaced source
+never serves a stale copy and the name doubles as the ETag. The cache is bounded by
+MEDIA_CACHE_MAX_BYTES with least-recently-used eviction (hits touch the file's mtime, so the
+order survives restarts). Requests without w/fmt are plain static file serving.
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import stat
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+import anyio
+from fastapi.staticfiles import StaticFiles
+from starlette.datastructures import Headers, QueryParams
+from starlette.exceptions import HTTPException
+from starlette.responses import FileResponse, Response
+
+from .. import config
+from . import image_pool
+
+log = logging.getLogger(__name__)
+
+WIDTHS = (160, 320, 480, 640, 960, 1280, 1920)
+# fmt -> (Pillow format, extension, content type)
+FORMATS = {
+    "jpeg": ("JPEG", ".jpg", "image/jpeg"),
+    "png": ("PNG", ".png", "image/png"),
+    "webp": ("WEBP", ".webp", "image/webp"),
+    "avif": ("AVIF", ".avif", "image/avif"),
+}
+_SOURCE_FORMATS = {".jpg": "jpeg", ".jpeg": "jpeg", ".png": "png", ".webp": "webp"}
+_TOUCH_INTERVAL = 3600  # seconds between mtime bumps for the same cache file
+
+_lock = threading.Lock()
+_index: "OrderedDict[str, tuple[Path, int]]" = OrderedDict()  # key -> (file, bytes), LRU first
+_total_bytes = 0
+_loaded = False
+_touched: dict[str, float] = {}
+_digests: dict[tuple[str, int, int], str] = {}  # (path, mtime_ns, size) -> sha256 of the source
+_inflight: dict[str, asyncio.Future] = {}
+_stats = {"hits": 0, "misses": 0, "not_modified": 0, "evictions": 0, "errors": 0, "render_seconds": 0.0}
+
+
+def render(src: str, dest: str, width: int, fmt: str) -> int:
+    """Runs in the image pool: write src (resized to width, 0 = full size) to dest; returns its size."""
+    from PIL import Image, ImageOps
+
+    pil_format = FORMATS[fmt][0]
+    tmp = f"{dest}.{os.getpid()}.tmp"
+    with Image.open(src) as img:
+        img = ImageOps.exif_transpose(img)
+        if width and img.width > width:  # never upscale
+            img = img.resize((width, max(1, round(img.height * width / img.width))), Image.LANCZOS)
+        if fmt == "jpeg":
+            if img.mode not in ("RGB", "L"):
+                img = img.convert("RGB")
+            img.save(tmp, format=pil_format, quality=82, optimize=True, progressive=True)
+        elif fmt == "png":
+            img.save(tmp, format=pil_format, optimize=True)
+        else:
+            if img.mode not in ("RGB", "RGBA"):
+                img = img.convert("RGBA" if img.mode in ("P", "LA", "PA") else "RGB")
+            if fmt == "webp":
+                img.save(tmp, format=pil_format, quality=80, method=4)
+            else:
+                img.save(tmp, format=pil_format, quality=60, speed=6)
+    os.replace(tmp, dest)
+    return os.path.getsize(dest)
+
+
+def _cache_dir() -> Path:
+    return Path(config.MEDIA_CACHE_DIR)
+
+
+def _load_index() -> None:
+    """Rebuild the LRU index from disk once per process (oldest mtime first)."""
+    global _loaded, _total_bytes
+    with _lock:
+        if _loaded:
+            return
+        entries = []
+        base = _cache_dir()
+        if base.exists():
+            for p in base.glob("*/*"):
+                if p.name.endswith(".tmp"):
+                    p.unlink(missing_ok=True)  # left over from a crashed render
+                    continue
+                try:
+                    st = p.stat()
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, p.stem, p, st.st_size))
+        entries.sort()
+        _index.clear()
+        _index.update((key, (p, size)) for _, key, p, size in entries)
+        _total_bytes = sum(size for _, _, _, size in entries)
+        _loaded = True
+    _evict()
+
+
+def _evict() -> None:
+    global _total_bytes
+    doomed = []
+    with _lock:
+        while _total_bytes > config.MEDIA_CACHE_MAX_BYTES and len(_index) > 1:
+            _, (path, size) = _index.popitem(last=False)
+            _total_bytes -= size
+            _stats["evictions"] += 1
+            doomed.append(path)
+    for path in doomed:
+        path.unlink(missing_ok=True)
+
+
+def _source_digest(path: Path, st: os.stat_result) -> str:
+    memo = (str(path), st.st_mtime_ns, st.st_size)
+    digest = _digests.get(memo)
+    if digest is None:
+        h = hashlib.sha256()
+        with path.open("rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                h.update(chunk)
+        digest = h.hexdigest()
+        if len(_digests) > 10_000:
+            _digests.clear()
+        _digests[memo] = digest
+    return digest
+
+
+def _locate(path: Path, st: os.stat_result, width: int, fmt: str) -> tuple[str, Path, bool]:
+    """(cache key, cache file, exists). Hits are moved to the LRU tail."""
+    _load_index()
+    key = hashlib.sha256(f"{_source_digest(path, st)}:{width}:{fmt}".encode()).hexdigest()
+    dest = _cache_dir() / key[:2] / f"{key}{FORMATS[fmt][1]}"
+    with _lock:
+        hit = key in _index
+        if hit:
+            _index.move_to_end(key)
+    if hit and not dest.exists():  # removed behind our back
+        _forget(key)
+        hit = False
+    if hit:
+        now = time.time()
+        if now - _touched.get(key, 0) > _TOUCH_INTERVAL:
+            _touched[key] = now
+            try:
+                os.utime(dest)
+            except OSError:
+                pass
+    else:
+        dest.parent.mkdir(parents=True, exist_ok=True)
+    return key, dest, hit
+
+
+def _forget(key: str) -> None:
+    global _total_bytes
+    with _lock:
+        entry = _index.pop(key, None)
+        if entry:
+            _total_bytes -= entry[1]
+
+
+def _add(key: str, dest: Path, size: int) -> None:
+    global _total_bytes
+    with _lock:
+        if key not in _index:
+            _total_bytes += size
+        _index[key] = (dest, size)
+        _index.move_to_end(key)
+    _evict()
+
+
+async def _render_once(key: str, src: Path, dest: Path, width: int, fmt: str) -> None:
+    """Render a derivative; concurrent requests for the same one share the work."""
+    fut = _inflight.get(key)
+    if fut is None:
+        started = time.time()
+
+        async def job():
+            try:
+                size = await image_pool.run(render, str(src), str(dest), width, fmt)
+            except Exception:
+                with _lock:
+                    _stats["errors"] += 1
+                raise
+            _add(key, dest, size)
+            with _lock:
+                _stats["render_seconds"] += time.time() - started
+
+        fut = _inflight[key] = asyncio.ensure_future(job())
+        fut.add_done_callback(lambda _: _inflight.pop(key, None))
+    await asyncio.shield(fut)
+
+
+def parse_params(query_string: bytes) -> tuple[int | None, str | None]:
+    """(width, fmt) from the query string; raises HTTPException(400) for values outside the whitelist."""
+    params = QueryParams(query_string)
+    w, fmt = params.get("w"), params.get("fmt")
+    width = None
+    if w is not None:
+        if not w.isdigit() or int(w) not in WIDTHS:
+            raise HTTPException(400, f"w must be one of {', '.join(map(str, WIDTHS))}")
+        width = int(w)
+    if fmt is not None:
+        fmt = fmt.lower()
+        if fmt == "jpg":
+            fmt = "jpeg"
+        if fmt not in FORMATS or (fmt == "avif" and not _avif_supported()):
+            raise HTTPException(400, f"fmt must be one of {', '.join(f for f in FORMATS if f != 'avif' or _avif_supported())}")
+    return width, fmt
+
+
+def _avif_supported() -> bool:
+    from PIL import features
+
+    return bool(features.check("avif"))
+
+
+def stats() -> dict:
+    with _lock:
+        s = dict(_stats)
+        files, total = len(_index), _total_bytes
+    renders = s["misses"] - s["errors"]
+    return {
+        "files": files,
+        "bytes": total,
+        "max_bytes": config.MEDIA_CACHE_MAX_BYTES,
+        "hits": s["hits"],
+        "misses": s["misses"],
+        "not_modified": s["not_modified"],
+        "evictions": s["evictions"],
+        "errors": s["errors"],
+        "avg_render_ms": round(s["render_seconds"] / renders * 1000, 1) if renders > 0 else None,
+    }
+
+
+class MediaFiles(StaticFiles):
+    """StaticFiles for UPLOAD_DIR that serves cached derivatives when ?w= / ?fmt= is given."""
+
+    async def get_response(self, path: str, scope) -> Response:
+        width, fmt = parse_params(scope.get("query_string", b""))
+        if width is None and fmt is None:
+            return await super().get_response(path, scope)
+        if scope["method"] not in ("GET", "HEAD"):
+            raise HTTPException(status_code=405, headers={"Allow": "GET, HEAD"})
+
+        try:
+            full_path, st = await anyio.to_thread.run_sync(self.lookup_path, path)
+        except (OSError, ValueError):
+            raise HTTPException(status_code=404)
+        source_format = _SOURCE_FORMATS.get(Path(path).suffix.lower())
+        if not st or not stat.S_ISREG(st.st_mode):
+            raise HTTPException(status_code=404)
+        if source_format is None:
+            # GIFs (possibly animated) and anything else Pillow shouldn't touch: serve as-is.
+            return self.file_response(full_path, st, scope)
+
+        src = Path(full_path)
+        fmt = fmt or source_format
+        key, dest, hit = await anyio.to_thread.run_sync(_locate, src, st, width or 0, fmt)
+        with _lock:
+            _stats["hits" if hit else "misses"] += 1
+        if not hit:
+            try:
+                await _render_once(key, src, dest, width or 0, fmt)
+            except Exception as e:
+                log.info("Derivative render failed for %s: %s", path, e)
+                return self.file_response(full_path, st, scope)
+
+        headers = {
+            "etag": f'"{key[:32]}"',
+            "cache-control": f"public, max-age={config.MEDIA_CACHE_MAX_AGE}",
+        }
+        response = FileResponse(dest, media_type=FORMATS[fmt][2], headers=headers)
+        if self.is_not_modified(response.headers, Headers(scope=scope)):
+            with _lock:
+                _stats["not_modified"] += 1
+            return Response(status_code=304, headers=headers)
+        return response
+
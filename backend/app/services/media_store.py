@@ -0,0 +1,216 @@
+"""
+Content-addressed storage for uploaded / imported images, plus orphan collection.
+
+Images are validated and resized on the image pool, then stored as
+UPLOAD_DIR/cas/<h[:2]>/<sha256 of the stored bytes><ext>, so uploading the same logo twice or
+re-importing a restaurant from Places reuses the existing file. media_blobs records each
+stored file; media_refs (maintained by triggers on restaurants, menu_items and
+gallery_images) records which rows point at which URL. collect_garbage() deletes files -
+including their responsive variants - that nothing references any more.
+"""
+
+import hashlib
+import logging
+import os
+import re
+import secrets
+import time
+from pathlib import Path
+
+from .. import config
+from ..database import get_db
+from . import image_pool, media_variants
+
+log = logging.getLogger(__name__)
+
+JOB_KIND = "media_gc"
+CAS_DIR = "cas"
+# Directories (under r{id}/) holding images that only the database references. Instagram
+# mirrors are tracked through instagram_cache and clean up after themselves.
+GC_KINDS = ("menu", "logo", "banner", "gallery")
+
+_MAGIC = (
+    (b"\xff\xd8\xff", ".jpg"),
+    (b"\x89PNG\r\n\x1a\n", ".png"),
+    (b"GIF87a", ".gif"),
+    (b"GIF89a", ".gif"),
+)
+_VARIANT_SUFFIX = re.compile(r"_w\d+$")
+
+
+def sniff_ext(data: bytes) -> str | None:
+    """File extension from magic bytes (servers often send the wrong content-type)."""
+    for magic, ext in _MAGIC:
+        if data.startswith(magic):
+            return ext
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return ".webp"
+    return None
+
+
+def ingest(upload_dir: str, data: bytes, ext: str, kind: str) -> dict | None:
+    """
+    Runs in the image pool: validate + resize into a temp file, hash the result and move it
+    to its content address (or drop it if that file already exists). None if not an image.
+    """
+    from ..routers.uploads import _store_upload
+
+    base = Path(upload_dir)
+    tmp = base / CAS_DIR / "tmp" / f"{secrets.token_urlsafe(12)}{ext}"
+    info = _store_upload(tmp, data, ext, kind)
+    if info is None:
+        return None
+    try:
+        h = hashlib.sha256()
+        with tmp.open("rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                h.update(chunk)
+        digest = h.hexdigest()
+        dest = base / CAS_DIR / digest[:2] / f"{digest}{ext}"
+        size = tmp.stat().st_size
+        deduped = dest.exists()
+        if deduped:
+            os.utime(dest)  # fresh mtime keeps it out of a GC pass racing with this upload
+        else:
+            dest.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(tmp, dest)
+    finally:
+        tmp.unlink(missing_ok=True)
+    return {**info, "hash": digest, "rel": dest.relative_to(base).as_posix(), "bytes": size, "deduped": deduped}
+
+
+def _register(kind: str, info: dict) -> dict:
+    url = f"{config.UPLOAD_BASE_PATH}/{info['rel']}"
+    with get_db() as db:
+        db.execute(
+            """INSERT OR IGNORE INTO media_blobs (hash, url, kind, bytes, width, height, format)
+               VALUES (?, ?, ?, ?, ?, ?, ?)""",
+            (info["hash"], url, kind, info["bytes"], info.get("width"), info.get("height"), info.get("format")),
+        )
+    return {**info, "url": url}
+
+
+def _prepare(data: bytes, ext: str | None) -> str | None:
+    return sniff_ext(data) or ext
+
+
+def store(data: bytes, ext: str | None, kind: str) -> dict | None:
+    """Blocking store for worker threads. Returns {url, hash, bytes, width, height, format, deduped}."""
+    ext = _prepare(data, ext)
+    if not ext:
+        return None
+    info = image_pool.run_sync(ingest, config.UPLOAD_DIR, data, ext, kind)
+    return _register(kind, info) if info else None
+
+
+async def store_async(data: bytes, ext: str | None, kind: str) -> dict | None:
+    """store() for async endpoints: the pool does the disk and Pillow work."""
+    ext = _prepare(data, ext)
+    if not ext:
+        return None
+    info = await image_pool.run(ingest, config.UPLOAD_DIR, data, ext, kind)
+    return _register(kind, info) if info else None
+
+
+# ---------------------------------------------------------------------------
+# Garbage collection
+# ---------------------------------------------------------------------------
+
+def _group_key(path: Path) -> tuple[str, str]:
+    """Original + its variants ({stem}_w640.webp, {stem}.avif, ...) share (dir, stem)."""
+    return str(path.parent), _VARIANT_SUFFIX.sub("", path.name.split(".", 1)[0])
+
+
+def _candidate_files(base: Path):
+    cas = base / CAS_DIR
+    if cas.exists():
+        for d in cas.iterdir():
+            if d.is_dir() and d.name != "tmp":
+                yield from (p for p in d.iterdir() if p.is_file())
+    for rdir in base.glob("r*"):
+        for kind in GC_KINDS:
+            d = rdir / kind
+            if d.is_dir():
+                yield from (p for p in d.iterdir() if p.is_file())
+
+
+def collect_garbage(job, *, dry_run: bool = False, grace_hours: float | None = None) -> dict:
+    """
+    Delete stored images (and their variants) that no restaurant, dish or gallery row
+    references. Files touched within the grace period are kept: an upload returns its URL
+    before the client saves it onto a row.
+    """
+    grace = config.MEDIA_GC_GRACE_HOURS if grace_hours is None else grace_hours
+    cutoff = time.time() - grace * 3600
+    base = Path(config.UPLOAD_DIR)
+
+    with get_db() as db:
+        urls = [r["url"] for r in db.execute("SELECT DISTINCT url FROM media_refs").fetchall()]
+    referenced = set()
+    for url in urls:
+        path = media_variants.url_to_path(url)
+        if path is not None:
+            referenced.add(_group_key(path))
+
+    groups: dict[tuple[str, str], list[tuple[Path, os.stat_result]]] = {}
+    for p in _candidate_files(base.resolve()):
+        try:
+            groups.setdefault(_group_key(p), []).append((p, p.stat()))
+        except OSError:
+            continue
+    job.update(total=len(groups), done=0)
+
+    deleted_files = freed = kept_recent = 0
+    orphan_urls: list[str] = []
+    for i, (key, files) in enumerate(groups.items()):
+        if i % 500 == 0:
+            job.update(done=i)
+        if key in referenced:
+            continue
+        if any(st.st_mtime > cutoff for _, st in files):
+            kept_recent += 1
+            continue
+        for p, st in files:
+            orphan_urls.append(f"{config.UPLOAD_BASE_PATH}/{p.relative_to(base.resolve()).as_posix()}")
+            freed += st.st_size
+            deleted_files += 1
+            if not dry_run:
+                p.unlink(missing_ok=True)
+
+    # Stale temp files from crashed ingests.
+    tmp_dir = base / CAS_DIR / "tmp"
+    if tmp_dir.exists():
+        for p in tmp_dir.iterdir():
+            if p.is_file() and p.stat().st_mtime < cutoff and not dry_run:
+                p.unlink(missing_ok=True)
+
+    if orphan_urls and not dry_run:
+        with get_db() as db:
+            for start in range(0, len(orphan_urls), 500):
+                chunk = orphan_urls[start:start + 500]
+                marks = ",".join("?" * len(chunk))
+                db.execute(f"DELETE FROM media_variants WHERE url IN ({marks})", chunk)
+                db.execute(f"DELETE FROM media_blobs WHERE url IN ({marks})", chunk)
+    job.update(done=len(groups))
+
+    result = {
+        "dry_run": dry_run,
+        "grace_hours": grace,
+        "groups": len(groups),
+        "referenced_urls": len(urls),
+        "kept_recent": kept_recent,
+        "deleted_files": deleted_files,
+        "freed_bytes": freed,
+    }
+    log.info("Media GC: %s", result)
+    return result
+
+
+def run_scheduled() -> None:
+    """Scheduler entry point: queue a GC pass unless one is already running."""
+    from . import jobs
+
+    if jobs.is_running(JOB_KIND):
+        log.info("Media GC already running; skipping scheduled run")
+        return
+    jobs.submit(JOB_KIND, collect_garbage, params={"trigger": "scheduled"})
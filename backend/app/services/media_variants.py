@@ -0,0 +1,232 @@
+"""
+Responsive variants for stored images (uploads, Places photos, logos).
+
+Each image under UPLOAD_DIR gets width variants (320/640/1280 + full size) in AVIF, WebP and
+its original format, written next to it as `{stem}_w{width}{ext}` (full size: `{stem}{ext}`).
+Variants are rendered once, in the background on the image pool; metadata (and ready-made
+`srcset` strings per format) is kept in media_variants keyed by the image URL.
+"""
+
+import json
+import logging
+import threading
+from pathlib import Path
+
+from .. import config
+from ..database import get_db
+from . import image_pool
+
+log = logging.getLogger(__name__)
+
+WIDTHS = (320, 640, 1280)
+
+_pending: set[str] = set()
+_pending_lock = threading.Lock()
+
+
+def _formats(original_format: str, ext: str) -> list[tuple[str, str]]:
+    """(format, extension) pairs to render, modern formats first."""
+    from PIL import features
+
+    out = []
+    if features.check("avif"):
+        out.append(("avif", ".avif"))
+    out.append(("webp", ".webp"))
+    if original_format not in ("avif", "webp"):
+        out.append((original_format, ext))
+    return out
+
+
+def _plan(name: str, width: int, height: int, original_format: str) -> list[dict]:
+    """Variant files for an image of this size; deterministic so uploads can report them up front."""
+    stem, ext = Path(name).stem, Path(name).suffix.lower()
+    widths = [w for w in WIDTHS if w < width] + [width]
+    plan = []
+    for w in widths:
+        h = height if w == width else max(1, round(height * w / width))
+        suffix = "" if w == width else f"_w{w}"
+        for fmt, fext in _formats(original_format, ext):
+            plan.append({"file": f"{stem}{suffix}{fext}", "width": w, "height": h, "format": fmt})
+    return plan
+
+
+def _image_format(img) -> str:
+    fmt = (img.format or "").lower()
+    return "jpeg" if fmt in ("jpeg", "jpg", "mpo") else fmt
+
+
+def generate(path_str: str) -> dict | None:
+    """Runs in the image pool: render every planned variant that doesn't exist yet."""
+    from PIL import Image
+
+    path = Path(path_str)
+    with Image.open(path) as img:
+        fmt = _image_format(img)
+        if fmt not in ("jpeg", "png", "webp") or getattr(img, "is_animated", False):
+            return None  # GIFs / animations keep their single file
+        img.load()
+        width, height = img.size
+        plan = _plan(path.name, width, height, fmt)
+        resized = {width: img}
+        for v in plan:
+            dest = path.with_name(v["file"])
+            if dest.exists():
+                continue
+            im = resized.get(v["width"])
+            if im is None:
+                im = resized[v["width"]] = img.resize((v["width"], v["height"]), Image.LANCZOS)
+            if v["format"] == "jpeg":
+                im = im.convert("RGB") if im.mode not in ("RGB", "L") else im
+                im.save(dest, format="JPEG", quality=82, optimize=True, progressive=True)
+            elif v["format"] == "png":
+                im.save(dest, format="PNG", optimize=True)
+            elif v["format"] in ("webp", "avif"):
+                if im.mode not in ("RGB", "RGBA"):
+                    im = im.convert("RGBA" if im.mode in ("P", "LA", "PA") else "RGB")
+                if v["format"] == "webp":
+                    im.save(dest, format="WEBP", quality=80, method=4)
+                else:
+                    im.save(dest, format="AVIF", quality=60, speed=6)
+    for v in plan:
+        v["bytes"] = path.with_name(v["file"]).stat().st_size
+    return {"width": width, "height": height, "variants": plan}
+
+
+def url_to_path(url: str | None) -> Path | None:
+    """Local file for a /api/media/... URL, or None for external / unsafe URLs."""
+    prefix = config.UPLOAD_BASE_PATH.rstrip("/") + "/"
+    if not url or not url.startswith(prefix):
+        return None
+    base = Path(config.UPLOAD_DIR).resolve()
+    path = (base / url[len(prefix):].split("?", 1)[0]).resolve()
+    if base not in path.parents:
+        return None
+    return path
+
+
+def _to_metadata(url: str, width: int, height: int, variants: list[dict], ready: bool) -> dict:
+    base = url.rsplit("/", 1)[0]
+    items = []
+    for v in variants:
+        v = dict(v)
+        items.append({**v, "url": f"{base}/{v.pop('file')}"})
+    srcset: dict[str, str] = {}
+    for v in items:
+        entry = f"{v['url']} {v['width']}w"
+        srcset[v["format"]] = f"{srcset[v['format']]}, {entry}" if v["format"] in srcset else entry
+    return {"width": width, "height": height, "ready": ready, "srcset": srcset, "variants": items}
+
+
+def planned_metadata(url: str, width: int, height: int, original_format: str) -> dict | None:
+    """Metadata for variants that schedule() is about to render (ready=False)."""
+    if not width or original_format not in ("jpeg", "png", "webp"):
+        return None
+    return _to_metadata(url, width, height, _plan(url.rsplit("/", 1)[-1], width, height, original_format), False)
+
+
+def _store(url: str, result: dict | None) -> None:
+    if not result:
+        return
+    with get_db() as db:
+        db.execute(
+            """INSERT INTO media_variants (url, width, height, variants_json)
+               VALUES (?, ?, ?, ?)
+               ON CONFLICT(url) DO UPDATE SET
+                   width = excluded.width, height = excluded.height,
+                   variants_json = excluded.variants_json, created_at = CURRENT_TIMESTAMP""",
+            (url, result["width"], result["height"], json.dumps(result["variants"])),
+        )
+
+
+def schedule(url: str | None) -> bool:
+    """Queue variant generation for a local image URL (no-op if done or already queued)."""
+    path = url_to_path(url)
+    if path is None or not path.exists():
+        return False
+    with _pending_lock:
+        if url in _pending:
+            return False
+        _pending.add(url)
+    with get_db() as db:
+        if db.execute("SELECT 1 FROM media_variants WHERE url = ?", (url,)).fetchone():
+            with _pending_lock:
+                _pending.discard(url)
+            return False
+
+    def done(fut) -> None:
+        try:
+            _store(url, fut.result())
+        except Exception as e:
+            log.info("Variant generation failed for %s: %s", url, e)
+        finally:
+            with _pending_lock:
+                _pending.discard(url)
+
+    image_pool.submit(generate, str(path)).add_done_callback(done)
+    return True
+
+
+def ensure(url: str | None) -> bool:
+    """Blocking variant generation (for backfill jobs). True if variants exist afterwards."""
+    path = url_to_path(url)
+    if path is None or not path.exists():
+        return False
+    with get_db() as db:
+        if db.execute("SELECT 1 FROM media_variants WHERE url = ?", (url,)).fetchone():
+            return True
+    result = image_pool.run_sync(generate, str(path))
+    _store(url, result)
+    return bool(result)
+
+
+def lookup(urls: list[str]) -> dict[str, dict]:
+    """Ready variant metadata for the given URLs (one query)."""
+    urls = list({u for u in urls if u})
+    if not urls:
+        return {}
+    with get_db() as db:
+        rows = db.execute(
+            f"SELECT url, width, height, variants_json FROM media_variants WHERE url IN ({','.join('?' * len(urls))})",
+            urls,
+        ).fetchall()
+    return {
+        r["url"]: _to_metadata(r["url"], r["width"], r["height"], json.loads(r["variants_json"]), True)
+        for r in rows
+    }
+
+
+def attach(rows: list[dict], key: str = "image_url") -> list[dict]:
+    """Add a `variants` field (or None) to each row dict, looked up by rows[key]."""
+    meta = lookup([r.get(key) for r in rows])
+    for r in rows:
+        r["variants"] = meta.get(r.get(key))
+    return rows
+
+
+def backfill(job, limit: int | None = None) -> dict:
+    """Job body: render variants for every local image the database references."""
+    with get_db() as db:
+        urls = [
+            r["u"] for r in db.execute(
+                """SELECT image_url AS u FROM gallery_images
+                   UNION SELECT banner_url FROM restaurants
+                   UNION SELECT logo_url FROM restaurants
+                   UNION SELECT image_url FROM menu_items"""
+            ).fetchall()
+            if url_to_path(r["u"]) is not None
+        ]
+        done_urls = {r["url"] for r in db.execute("SELECT url FROM media_variants").fetchall()}
+    todo = [u for u in urls if u not in done_urls][: limit or None]
+    job.update(total=len(todo), done=0, generated=0, skipped=0)
+    generated = skipped = 0
+    for i, url in enumerate(todo):
+        try:
+            if ensure(url):
+                generated += 1
+            else:
+                skipped += 1
+        except Exception as e:
+            skipped += 1
+            log.info("Variant backfill failed for %s: %s", url, e)
+        job.update(done=i + 1, generated=generated, skipped=skipped)
+    return {"referenced": len(urls), "already_done": len(done_urls), "generated": generated, "skipped": skipped}
@@ -0,0 +1,154 @@
+"""
+Mirror scraped menu photos (Deliveroo / Just Eat CDN URLs) into UPLOAD_DIR.
+
+Local copies survive CDN URL changes and can be resized on demand via /api/media/...?w=.
+Files are named after a hash of the source URL (r{id}/menu/scraped_<hash>.<ext>), so a
+re-scrape that returns the same CDN URL maps back onto the existing copy instead of
+registering an image change.
+
+Downloads never run inside a request: a single-restaurant import queues a background job
+(schedule()); the batch rescrape mirrors every imported restaurant inside its own job.
+"""
+
+import hashlib
+import logging
+from pathlib import Path
+
+import requests
+
+from .. import config
+from ..database import get_db
+from . import image_pool
+
+log = logging.getLogger(__name__)
+
+JOB_KIND = "menu_images"
+MEDIA_KIND = "menu"
+MAX_PER_IMPORT = 300
+_EXTS = (".jpg", ".png", ".webp", ".gif")
+_UA = "Mozilla/5.0 (compatible; HackneyEatsBot/1.0)"
+
+
+def _stem(url: str) -> str:
+    return "scraped_" + hashlib.sha1(url.encode("utf-8")).hexdigest()[:20]
+
+
+def _target_dir(restaurant_id: int) -> Path:
+    return Path(config.UPLOAD_DIR) / f"r{restaurant_id}" / MEDIA_KIND
+
+
+def _media_url(path: Path) -> str:
+    rel = path.relative_to(Path(config.UPLOAD_DIR)).as_posix()
+    return f"{config.UPLOAD_BASE_PATH}/{rel}"
+
+
+def _is_remote(url: str | None) -> bool:
+    return bool(url) and url.startswith(("http://", "https://"))
+
+
+def mirrored_url(restaurant_id: int, url: str | None) -> str | None:
+    """Local URL of an existing mirror of a remote image, else None."""
+    if not _is_remote(url):
+        return None
+    base = _target_dir(restaurant_id) / _stem(url)
+    for ext in _EXTS:
+        path = base.with_suffix(ext)
+        if path.exists():
+            return _media_url(path)
+    return None
+
+
+def localize(restaurant_id: int, items: dict[str, dict]) -> None:
+    """Swap remote image_urls for their local mirrors (in place), so diffs compare like with like."""
+    for item in items.values():
+        local = mirrored_url(restaurant_id, item.get("image_url"))
+        if local:
+            item["image_url"] = local
+
+
+def _download(url: str, restaurant_id: int) -> str | None:
+    """Fetch one image into the menu media dir; returns its local URL (None if not an image)."""
+    from ..routers.uploads import ALLOWED_CONTENT_TYPES, _store_upload
+
+    resp = requests.get(url, timeout=20, stream=True, headers={"User-Agent": _UA})
+    resp.raise_for_status()
+    ext = ALLOWED_CONTENT_TYPES.get((resp.headers.get("content-type") or "").split(";")[0].strip().lower())
+    if not ext:
+        return None
+    data = bytearray()
+    for chunk in resp.iter_content(chunk_size=256 * 1024):
+        data += chunk
+        if len(data) > config.UPLOAD_MAX_BYTES:
+            raise ValueError("menu image exceeds UPLOAD_MAX_BYTES")
+    path = _target_dir(restaurant_id) / f"{_stem(url)}{ext}"
+    if image_pool.run_sync(_store_upload, path, bytes(data), ext, MEDIA_KIND) is None:
+        return None
+    return _media_url(path)
+
+
+def _remote_urls(restaurant_id: int) -> list[str]:
+    with get_db() as db:
+        return [
+            r["image_url"] for r in db.execute(
+                """SELECT DISTINCT image_url FROM menu_items
+                   WHERE restaurant_id = ? AND COALESCE(source, 'manual') != 'manual'
+                     AND (image_url LIKE 'http://%' OR image_url LIKE 'https://%')""",
+                (restaurant_id,),
+            ).fetchall()
+        ]
+
+
+def mirror_menu_images(restaurant_id: int, limit: int = MAX_PER_IMPORT, job=None) -> dict:
+    """Download remote image_urls of a restaurant's scraped dishes and point the rows at the copies."""
+    urls = _remote_urls(restaurant_id)
+    if job is not None:
+        job.update(total=min(len(urls), limit), done=0)
+    rewrites: list[tuple[str, int, str]] = []
+    mirrored = reused = failed = 0
+    for done, url in enumerate(urls[:limit], 1):
+        local = mirrored_url(restaurant_id, url)
+        if local:
+            reused += 1
+        else:
+            try:
+                local = _download(url, restaurant_id)
+            except Exception as e:
+                log.info("Could not mirror menu image %s: %s", url, e)
+                local = None
+            if local:
+                mirrored += 1
+            else:
+                failed += 1
+        if local:
+            rewrites.append((local, restaurant_id, url))
+        if job is not None:
+            job.update(done=done)
+    if rewrites:
+        with get_db() as db:
+            db.executemany(
+                """UPDATE menu_items SET image_url = ?
+                   WHERE restaurant_id = ? AND image_url = ? AND COALESCE(source, 'manual') != 'manual'""",
+                rewrites,
+            )
+    return {"mirrored": mirrored, "reused": reused, "failed": failed, "remaining": max(0, len(urls) - limit)}
+
+
+def run_mirror(job, *, restaurant_id: int) -> dict:
+    """Job body (see services.jobs)."""
+    return mirror_menu_images(restaurant_id, job=job)
+
+
+def schedule(restaurant_id: int) -> dict | None:
+    """
+    Queue a mirror job for a restaurant's remote dish photos; returns {"job_id", "status"}, or
+    None when there is nothing to download. A job already queued for the restaurant is reused.
+    """
+    from . import jobs
+
+    if not _remote_urls(restaurant_id):
+        return None
+    for j in jobs.recent(JOB_KIND, limit=jobs.MAX_RETAINED):
+        if j["status"] == "queued" and j["params"].get("restaurant_id") == restaurant_id:
+            return {"job_id": j["id"], "status": j["status"]}
+    job = jobs.submit(JOB_KIND, run_mirror, params={"restaurant_id": restaurant_id}, restaurant_id=restaurant_id)
+    return {"job_id": job.id, "status": job.status}
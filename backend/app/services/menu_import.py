@@ -0,0 +1,249 @@
+"""
+Write scraped menu items (Deliveroo / Just Eat) into menu_categories + menu_items.
+
+Imports are diff-based: the scraped menu is normalized and hashed, an unchanged hash skips
+the restaurant entirely, otherwise an add/update/remove diff keyed on the normalized dish
+name is applied in one transaction and restaurants.menu_version is bumped. Remote dish photos
+are then mirrored into UPLOAD_DIR by a background job (services/menu_images.py).
+"""
+
+import hashlib
+import json
+import re
+
+from ..database import get_db
+from . import menu_images
+
+# source -> restaurants column holding that source's menu URL
+SOURCES = {"deliveroo": "deliveroo_url", "justeat": "justeat_url"}
+
+# Fields compared between the scraped item and the stored row.
+_DIFF_FIELDS = ("description", "price", "category", "image_url")
+
+
+def make_scraper(source: str, pacer=None):
+    """Scraper instance for a source. Imports are lazy so Playwright etc. stay optional."""
+    if source == "deliveroo":
+        from .scraper_deliveroo import DeliverooScraper
+        return DeliverooScraper()
+    if source == "justeat":
+        from .scraper_justeat import JustEatScraper
+        return JustEatScraper(pacer=pacer)
+    raise ValueError(f"Unknown menu source: {source}")
+
+
+def norm_name(name: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "", (name or "").lower())
+
+
+def normalize_items(items: list[dict]) -> tuple[dict[str, dict], int]:
+    """Scraped items keyed by norm_name (first occurrence wins) plus the number skipped."""
+    normalized: dict[str, dict] = {}
+    skipped = 0
+    for item in items:
+        name = (item.get("name") or "").strip()
+        key = norm_name(name)
+        if not key or key in normalized:
+            skipped += 1
+            continue
+        try:
+            price = round(float(item.get("price") or 0), 2)
+        except (TypeError, ValueError):
+            price = 0.0
+        normalized[key] = {
+            "name": name,
+            "description": (item.get("description") or "").strip() or None,
+            "price": price,
+            "category": (item.get("category") or "").strip() or "Other",
+            "image_url": item.get("image_url") or None,
+        }
+    return normalized, skipped
+
+
+def menu_hash(normalized: dict[str, dict]) -> str:
+    payload = json.dumps([normalized[k] for k in sorted(normalized)], sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def import_scraped_items(
+    restaurant_id: int,
+    items: list[dict],
+    source: str,
+    *,
+    apply: bool = True,
+    force: bool = False,
+    mirror_images: bool = True,
+) -> dict:
+    """
+    Diff scraped items against the restaurant's menu and (if apply) write the changes.
+
+    Dishes previously imported from this source that are missing from the scrape are marked
+    unavailable (and removed_by_import) rather than deleted, since order_items reference them;
+    only those are made available again if they reappear, so a dish the owner marked sold-out
+    stays sold-out. Manual dishes are left alone, including ones whose name matches a scraped
+    dish (counted in `manual`). Returns the diff plus the imported/updated/skipped counts the
+    scrape endpoint has always returned.
+    """
+    normalized, skipped = normalize_items(items)
+    new_hash = menu_hash(normalized)
+    # Hash the scraped URLs, but diff against local mirrors of them.
+    menu_images.localize(restaurant_id, normalized)
+    result = {
+        "source": source,
+        "menu_hash": new_hash,
+        "changed": False,
+        "applied": False,
+        "added": [],
+        "changes": [],
+        "removed": [],
+        "unchanged": 0,
+        "imported": 0,
+        "updated": 0,
+        "removed_count": 0,
+        "manual": 0,
+        "skipped": skipped,
+    }
+
+    with get_db() as db:
+        version = db.execute(
+            "SELECT COALESCE(menu_version, 0) AS v FROM restaurants WHERE id = ?", (restaurant_id,)
+        ).fetchone()
+        result["menu_version"] = version["v"] if version else 0
+        state = db.execute(
+            "SELECT menu_hash FROM menu_import_state WHERE restaurant_id = ? AND source = ?",
+            (restaurant_id, source),
+        ).fetchone()
+        if state and state["menu_hash"] == new_hash and not force:
+            result["unchanged"] = len(normalized)
+            result["hash_match"] = True
+            return result
+
+        categories = db.execute(
+            "SELECT id, name FROM menu_categories WHERE restaurant_id = ?", (restaurant_id,)
+        ).fetchall()
+        category_ids = {norm_name(c["name"]): c["id"] for c in categories}
+        category_names = {c["id"]: c["name"] for c in categories}
+        rows = db.execute(
+            """SELECT id, name, description, price, category_id, image_url, is_available, source,
+                      removed_by_import
+               FROM menu_items WHERE restaurant_id = ?""",
+            (restaurant_id,),
+        ).fetchall()
+        existing = {}
+        for r in rows:
+            existing.setdefault(norm_name(r["name"]), r)
+
+        # -- diff --
+        inserts: list[dict] = []
+        updates: list[tuple[int, dict, bool]] = []  # (row id, scraped item, restore availability)
+        for key, item in normalized.items():
+            row = existing.get(key)
+            if row is None:
+                inserts.append(item)
+                result["added"].append(item["name"])
+                continue
+            if row["source"] not in SOURCES:
+                result["manual"] += 1
+                continue
+            current = {
+                "description": row["description"],
+                "price": round(float(row["price"] or 0), 2),
+                "category": category_names.get(row["category_id"]),
+                "image_url": row["image_url"],
+            }
+            changes = {}
+            for f in _DIFF_FIELDS:
+                if f == "category":
+                    differs = norm_name(current[f] or "") != norm_name(item[f])
+                else:
+                    differs = current[f] != item[f]
+                if differs:
+                    changes[f] = [current[f], item[f]]
+            restore = bool(row["removed_by_import"]) and row["source"] == source
+            if changes or restore or row["source"] != source:
+                updates.append((row["id"], item, restore))
+                entry = {"name": item["name"], "fields": changes}
+                if restore:
+                    entry["restored"] = True
+                if row["source"] != source:
+                    entry["source"] = [row["source"], source]
+                result["changes"].append(entry)
+            else:
+                result["unchanged"] += 1
+        removals = [
+            r for key, r in existing.items()
+            if key not in normalized and r["source"] == source and r["is_available"]
+        ]
+        result["removed"] = [r["name"] for r in removals]
+        result["imported"] = len(inserts)
+        result["updated"] = len(updates)
+        result["removed_count"] = len(removals)
+        result["changed"] = bool(inserts or updates or removals)
+        if not apply:
+            return result
+
+        # -- apply (single transaction: get_db commits on exit) --
+        max_display = db.execute(
+            "SELECT COALESCE(MAX(display_order), -1) as m FROM menu_categories WHERE restaurant_id = ?",
+            (restaurant_id,),
+        ).fetchone()["m"]
+        for item in inserts + [u[1] for u in updates]:
+            key = norm_name(item["category"])
+            if key and key not in category_ids:
+                max_display += 1
+                cur = db.execute(
+                    "INSERT INTO menu_categories (restaurant_id, name, display_order) VALUES (?, ?, ?)",
+                    (restaurant_id, item["category"], max_display),
+                )
+                category_ids[key] = cur.lastrowid
+
+        if inserts:
+            db.executemany(
+                """INSERT INTO menu_items
+                   (restaurant_id, category_id, name, description, price, image_url, source)
+                   VALUES (?, ?, ?, ?, ?, ?, ?)""",
+                [
+                    (restaurant_id, category_ids.get(norm_name(i["category"])), i["name"],
+                     i["description"], i["price"], i["image_url"], source)
+                    for i in inserts
+                ],
+            )
+        if updates:
+            db.executemany(
+                """UPDATE menu_items
+                   SET description = ?, price = ?, category_id = ?, image_url = ?, source = ?,
+                       is_available = CASE WHEN ? THEN 1 ELSE is_available END,
+                       removed_by_import = CASE WHEN ? THEN 0 ELSE removed_by_import END,
+                       updated_at = CURRENT_TIMESTAMP
+                   WHERE id = ?""",
+                [
+                    (i["description"], i["price"], category_ids.get(norm_name(i["category"])),
+                     i["image_url"], source, int(restore), int(restore), row_id)
+                    for row_id, i, restore in updates
+                ],
+            )
+        if removals:
+            db.executemany(
+                """UPDATE menu_items SET is_available = 0, removed_by_import = 1, updated_at = CURRENT_TIMESTAMP
+                   WHERE id = ?""",
+                [(r["id"],) for r in removals],
+            )
+        if result["changed"]:
+            db.execute(
+                "UPDATE restaurants SET menu_version = COALESCE(menu_version, 0) + 1 WHERE id = ?",
+                (restaurant_id,),
+            )
+            result["menu_version"] += 1
+        db.execute(
+            """INSERT INTO menu_import_state (restaurant_id, source, menu_hash, item_count, imported_at)
+               VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)
+               ON CONFLICT(restaurant_id, source) DO UPDATE SET
+                   menu_hash = excluded.menu_hash,
+                   item_count = excluded.item_count,
+                   imported_at = excluded.imported_at""",
+            (restaurant_id, source, new_hash, len(normalized)),
+        )
+        result["applied"] = True
+    # Batch callers (menu_rescrape) pass mirror_images=False and mirror inside their own job.
+    result["images"] = menu_images.schedule(restaurant_id) if mirror_images else None
+    return result
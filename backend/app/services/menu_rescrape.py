@@ -0,0 +1,166 @@
+"""Batch re-scrape of every restaurant's Deliveroo / Just Eat menu (nightly + on demand)."""
+
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from .. import config
+from ..database import get_db
+from . import jobs, menu_images
+from .menu_import import SOURCES, import_scraped_items, make_scraper
+from .pacing import Pacer
+
+log = logging.getLogger(__name__)
+
+JOB_KIND = "menu_rescrape"
+
+# Per-source worker count and mean gap between request starts (seconds, +/- jitter).
+# Deliveroo is also bounded by the browser pool when it falls back to Playwright.
+SOURCE_LIMITS = {
+    "deliveroo": {"concurrency": 2, "interval": 4.0},
+    "justeat": {"concurrency": 2, "interval": 3.0},
+}
+PACING_JITTER = 0.5
+
+
+def _targets(restaurant_ids: list[int] | None, sources: list[str]) -> list[dict]:
+    sql = "SELECT id, name, deliveroo_url, justeat_url FROM restaurants WHERE is_active = 1"
+    params: list = []
+    if restaurant_ids:
+        sql += f" AND id IN ({','.join('?' * len(restaurant_ids))})"
+        params.extend(restaurant_ids)
+    with get_db() as db:
+        rows = db.execute(sql + " ORDER BY id", params).fetchall()
+    targets = []
+    for r in rows:
+        for source in sources:
+            url = (r[SOURCES[source]] or "").strip()
+            if url:
+                targets.append({"restaurant_id": r["id"], "name": r["name"], "source": source, "url": url})
+    return targets
+
+
+def _scrape_one(target: dict, pacer: Pacer, dry_run: bool) -> dict:
+    source = target["source"]
+    scraper = make_scraper(source, pacer=pacer)
+    # BaseScraper subclasses wait on the pacer inside fetch_page; Deliveroo has its own fetch path.
+    waited = pacer.wait() if source == "deliveroo" else 0.0
+    started = time.time()
+    result = {
+        "restaurant_id": target["restaurant_id"],
+        "name": target["name"],
+        "source": source,
+        "ok": True,
+        "paced_seconds": round(waited, 2),
+    }
+    try:
+        items = scraper.scrape_menu(target["url"])
+    except Exception as e:
+        log.info("Menu rescrape failed for %s (%s): %s", target["name"], source, e)
+        result.update(ok=False, error=str(e)[:300], scrape_seconds=round(time.time() - started, 2))
+        return result
+    scraped_at = time.time()
+    result.update(count=len(items), scrape_seconds=round(scraped_at - started, 2))
+    if items and not dry_run:
+        diff = import_scraped_items(target["restaurant_id"], items, source, mirror_images=False)
+        result.update({k: diff[k] for k in ("changed", "menu_version", "imported", "updated", "removed_count")})
+        result["applied"] = diff["applied"]
+        result["import_seconds"] = round(time.time() - scraped_at, 2)
+    elif not items:
+        result["ok"] = False
+        result["error"] = "No menu items found"
+    return result
+
+
+def run_menu_rescrape(
+    job,
+    *,
+    restaurant_ids: list[int] | None = None,
+    sources: list[str] | None = None,
+    dry_run: bool = False,
+) -> dict:
+    """
+    Job body (see services.jobs): scrape every active restaurant's configured menu URLs.
+    Each source gets its own bounded pool and jittered pacer, so Deliveroo and Just Eat run
+    side by side without either being hit faster than its limit. A restaurant with no items
+    found is reported as failed and its menu is left untouched.
+    """
+    sources = [s for s in (sources or list(SOURCES)) if s in SOURCES]
+    targets = _targets(restaurant_ids, sources)
+    job.update(stage="scraping", total=len(targets), done=0, ok=0, failed=0)
+
+    results: list[dict] = []
+    pools = {
+        s: ThreadPoolExecutor(max_workers=SOURCE_LIMITS[s]["concurrency"], thread_name_prefix=f"rescrape-{s}")
+        for s in sources
+    }
+    pacers = {s: Pacer(SOURCE_LIMITS[s]["interval"], PACING_JITTER) for s in sources}
+    try:
+        futures = {
+            pools[t["source"]].submit(_scrape_one, t, pacers[t["source"]], dry_run): t
+            for t in targets
+        }
+        for fut in as_completed(futures):
+            target = futures[fut]
+            try:
+                results.append(fut.result())
+            except Exception as e:
+                # import_scraped_items failures (scrape errors are recorded in _scrape_one)
+                log.exception("Menu import failed for %s (%s)", target["name"], target["source"])
+                results.append({
+                    "restaurant_id": target["restaurant_id"],
+                    "name": target["name"],
+                    "source": target["source"],
+                    "ok": False,
+                    "error": str(e)[:300],
+                })
+            ok = sum(1 for r in results if r["ok"])
+            job.update(done=len(results), ok=ok, failed=len(results) - ok, current=target["name"])
+    finally:
+        for pool in pools.values():
+            pool.shutdown(wait=True)
+
+    results.sort(key=lambda r: (r["restaurant_id"], r["source"]))
+    images = _mirror_images(job, results)
+    by_source = {}
+    for s in sources:
+        rs = [r for r in results if r["source"] == s]
+        by_source[s] = {
+            "total": len(rs),
+            "ok": sum(1 for r in rs if r["ok"]),
+            "items": sum(r.get("count", 0) for r in rs),
+            "changed": sum(1 for r in rs if r.get("changed")),
+            "scrape_seconds": round(sum(r.get("scrape_seconds", 0) for r in rs), 2),
+        }
+    job.update(stage="done")
+    return {"dry_run": dry_run, "sources": by_source, "images": images, "results": results}
+
+
+def _mirror_images(job, results: list[dict]) -> dict:
+    """
+    Mirror dish photos for every restaurant whose import was applied, inside this job: one
+    job per restaurant would flood the shared job pool (and its registry) on a big rescrape.
+    """
+    restaurant_ids = sorted({r["restaurant_id"] for r in results if r.get("applied")})
+    totals = {"restaurants": len(restaurant_ids), "mirrored": 0, "reused": 0, "failed": 0}
+    job.update(stage="images", images_total=len(restaurant_ids), images_done=0)
+    for done, restaurant_id in enumerate(restaurant_ids, 1):
+        try:
+            counts = menu_images.mirror_menu_images(restaurant_id)
+        except Exception:
+            log.exception("Mirroring menu images failed for restaurant %s", restaurant_id)
+            counts = {}
+        for k in ("mirrored", "reused", "failed"):
+            totals[k] += counts.get(k, 0)
+        job.update(images_done=done)
+    return totals
+
+
+def run_nightly() -> None:
+    """Scheduler entry point: queue a full rescrape unless one is already running."""
+    if not config.MENU_RESCRAPE_NIGHTLY:
+        return
+    if jobs.is_running(JOB_KIND):
+        log.info("Menu rescrape already running; skipping nightly run")
+        return
+    jobs.submit(JOB_KIND, run_menu_rescrape, params={"trigger": "nightly"})
@@ -0,0 +1,44 @@
+"""
+Superadmin inbox search over inbound_messages_fts (FTS5, kept in sync by triggers).
+
+User input is never passed to MATCH as-is: each whitespace-separated term becomes a quoted
+prefix phrase (`bob@example.com` -> `"bob example com"*`), so addresses, phone numbers and
+stray quotes can't produce FTS syntax errors.
+"""
+
+import re
+
+from ..database import get_db, is_sqlite
+
+# bm25 column weights: from_addr, to_addr, subject, body_text
+_WEIGHTS = (2.0, 2.0, 5.0, 1.0)
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+_available: bool | None = None
+
+
+def fts_query(q: str) -> str | None:
+    """FTS5 MATCH expression for free text (terms ANDed, last token of each term prefix-matched)."""
+    phrases = []
+    for term in (q or "").split():
+        tokens = _TOKEN.findall(term)
+        if tokens:
+            phrases.append('"' + " ".join(tokens) + '"*')
+    return " ".join(phrases) or None
+
+
+def available() -> bool:
+    """True if the FTS table exists (SQLite may be built without FTS5; Postgres has none)."""
+    global _available
+    if _available is None and not is_sqlite():
+        _available = False
+    if _available is None:
+        with get_db() as db:
+            _available = bool(db.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'inbound_messages_fts'"
+            ).fetchone())
+    return _available
+
+
+def rank_sql() -> str:
+    return f"bm25(inbound_messages_fts, {', '.join(map(str, _WEIGHTS))})"
@@ -4,7 +4,7 @@ from email.message import EmailMessage
 import json as _json
 import time
 from .. import config
-from ..database import get_db
+from ..database import get_db, sql
 
 logger = logging.getLogger(__name__)
 
@@ -70,14 +70,19 @@ def _store_message(
     action: str | None,
     status: str,
     meta: dict | None = None,
+    restaurant_id: int | None = None,
 ):
+    # sid / content_sid / error_code also go into indexed columns so opt-in dedupe and
+    # delivery-status updates are index seeks rather than meta_json LIKE scans.
+    meta = meta or {}
     try:
         with get_db() as db:
             db.execute(
                 """INSERT INTO inbound_messages
                    (provider, channel, direction, from_addr, to_addr, subject, body_text, body_html,
-                    order_number, action, status, meta_json)
-                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                    order_number, action, status, meta_json,
+                    provider_sid, content_sid, error_code, restaurant_id)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
                 (
                     provider,
                     channel,
@@ -90,7 +95,11 @@ def _store_message(
                     order_number,
                     action,
                     status,
-                    _json.dumps(meta or {}),
+                    _json.dumps(meta),
+                    meta.get("sid"),
+                    meta.get("content_sid"),
+                    meta.get("error_code"),
+                    restaurant_id,
                 ),
             )
     except Exception:
@@ -98,6 +107,22 @@ def _store_message(
         pass
 
 
+def _record_delivery_status(message_sid: str, status: str | None, error_code: int | None) -> None:
+    """Mark a stored outbound message as failed once Twilio reports it failed/undelivered."""
+    if not message_sid or status not in {"failed", "undelivered"}:
+        return
+    try:
+        with get_db() as db:
+            db.execute(
+                """UPDATE inbound_messages
+                   SET status = 'error', error_code = COALESCE(?, error_code)
+                   WHERE provider_sid = ?""",
+                (error_code, message_sid),
+            )
+    except Exception:
+        pass
+
+
 def send_whatsapp(to_number: str, message: str, restaurant_id: int | None = None) -> bool:
     """Send a WhatsApp message via Twilio. Returns True on success."""
     if not config.WHATSAPP_ENABLED:
@@ -126,6 +151,7 @@ def send_whatsapp(to_number: str, message: str, restaurant_id: int | None = None
             action=None,
             status="ok",
             meta={"sid": getattr(msg, "sid", None)},
+            restaurant_id=restaurant_id,
         )
         logger.info("WhatsApp queued to %s (sid=%s)", to_number, getattr(msg, "sid", None))
         if restaurant_id:
@@ -147,6 +173,7 @@ def send_whatsapp(to_number: str, message: str, restaurant_id: int | None = None
             action=None,
             status="error",
             meta={"error_code": code, "error": str(e)[:500]},
+            restaurant_id=restaurant_id,
         )
         logger.error("Failed to send WhatsApp to %s (code=%s): %s", to_number, code, e)
         return False
@@ -183,6 +210,7 @@ def send_sms(to_number: str, message: str, restaurant_id: int | None = None) ->
             action=None,
             status="ok",
             meta={"sid": getattr(msg, "sid", None)},
+            restaurant_id=restaurant_id,
         )
         logger.info("SMS queued to %s (sid=%s)", to_number, getattr(msg, "sid", None))
         if restaurant_id:
@@ -204,6 +232,7 @@ def send_sms(to_number: str, message: str, restaurant_id: int | None = None) ->
             action=None,
             status="error",
             meta={"error_code": code, "error": str(e)[:500]},
+            restaurant_id=restaurant_id,
         )
         logger.error("Failed to send SMS to %s (code=%s): %s", to_number, code, e)
         return False
@@ -348,19 +377,18 @@ def _check_delivery_and_optin(to_number: str, message_sid: str):
     def _recent_optin_sent(within_hours: int = 12) -> bool:
         try:
             to_key = f"whatsapp:{to_number}"
-            needle = f"%{config.TWILIO_OPTIN_CONTENT_SID}%"
             with get_db() as db:
                 row = db.execute(
-                    """SELECT 1
+                    f"""SELECT 1
                        FROM inbound_messages
-                       WHERE provider = 'twilio'
+                       WHERE to_addr = ?
+                         AND content_sid = ?
+                         AND created_at >= {sql.seconds_ago()}
+                         AND provider = 'twilio'
                          AND channel = 'whatsapp'
                          AND direction = 'outbound'
-                         AND to_addr = ?
-                         AND meta_json LIKE ?
-                         AND created_at >= datetime('now', ?)
                        LIMIT 1""",
-                    (to_key, needle, f"-{within_hours} hours"),
+                    (to_key, config.TWILIO_OPTIN_CONTENT_SID, within_hours * 3600),
                 ).fetchone()
             return bool(row)
         except Exception:
@@ -371,6 +399,7 @@ def _check_delivery_and_optin(to_number: str, message_sid: str):
         time.sleep(2)
         status, code = _twilio_fetch_message_status(message_sid)
         if status in {"failed", "undelivered"}:
+            _record_delivery_status(message_sid, status, code)
             logger.warning(
                 "WhatsApp delivery failed to %s (sid=%s status=%s code=%s); sending opt-in template",
                 to_number,
@@ -0,0 +1,35 @@
+"""Thread-safe request pacing shared by scrapers and bulk jobs."""
+
+import random
+import threading
+import time
+
+
+class Pacer:
+    """
+    Spaces calls across threads: each wait() returns no sooner than `interval` seconds
+    (scaled by a random factor in [1 - jitter, 1 + jitter]) after the previous slot.
+    The first call goes straight through, so one-off requests are not delayed.
+    """
+
+    def __init__(self, interval: float, jitter: float = 0.0):
+        self.interval = max(0.0, float(interval))
+        self.jitter = min(max(0.0, float(jitter)), 1.0)
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def per_second(cls, rate: float, jitter: float = 0.0) -> "Pacer":
+        return cls(1.0 / rate if rate > 0 else 0.0, jitter)
+
+    def wait(self) -> float:
+        """Block until this caller's slot; returns the seconds slept."""
+        step = self.interval * random.uniform(1 - self.jitter, 1 + self.jitter)
+        with self._lock:
+            now = time.monotonic()
+            delay = self._next - now
+            self._next = max(now, self._next) + step
+        if delay > 0:
+            time.sleep(delay)
+            return delay
+        return 0.0
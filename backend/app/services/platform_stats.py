@@ -0,0 +1,68 @@
+"""
+Platform-wide totals for the superadmin dashboard.
+
+One statement reads each table once (restaurants, orders, menu_items) instead of a query
+per number. The result is cached in process for SUPERADMIN_STATS_TTL seconds and concurrent
+misses share a single query, so several open dashboard tabs don't each rescan orders.
+Archived orders are added from archive.order_totals(), which only changes when the archive
+job runs.
+"""
+
+import threading
+import time
+from datetime import datetime, timezone
+
+from .. import config
+from ..database import get_db
+from . import archive, singleflight
+
+_flight = singleflight.group("platform_stats")
+_lock = threading.Lock()
+_cached: tuple[float, dict] | None = None  # (computed at, stats)
+
+_SQL = """
+    SELECT r.total AS restaurants, r.active AS active_restaurants,
+           o.total AS total_orders, o.pending AS pending_orders, o.revenue AS total_revenue,
+           m.total AS total_menu_items
+    FROM (SELECT COUNT(*) AS total, COALESCE(SUM(CASE WHEN is_active = 1 THEN 1 ELSE 0 END), 0) AS active
+          FROM restaurants) r,
+         (SELECT COUNT(*) AS total,
+                 COALESCE(SUM(CASE WHEN status = 'pending' THEN 1 ELSE 0 END), 0) AS pending,
+                 COALESCE(SUM(CASE WHEN status = 'collected' THEN subtotal END), 0) AS revenue
+          FROM orders) o,
+         (SELECT COUNT(*) AS total FROM menu_items) m
+"""
+
+
+def _compute() -> tuple[float, dict]:
+    global _cached
+    started = time.time()
+    with get_db() as db:
+        stats = dict(db.execute(_SQL).fetchone())
+    archived = archive.order_totals()
+    stats["archived_orders"] = archived["orders"]
+    stats["total_orders"] += archived["orders"]
+    stats["total_revenue"] = round((stats["total_revenue"] or 0) + archived["revenue"], 2)
+    stats["query_ms"] = round((time.time() - started) * 1000, 1)
+    entry = (time.time(), stats)
+    with _lock:
+        _cached = entry
+    return entry
+
+
+def get_stats(*, fresh: bool = False) -> dict:
+    """Totals plus cache freshness: computed_at (UTC ISO), age_seconds and cached."""
+    ttl = config.SUPERADMIN_STATS_TTL
+    with _lock:
+        entry = _cached
+    hit = entry is not None and not fresh and time.time() - entry[0] < ttl
+    if not hit:
+        entry = _flight.do("stats", _compute)
+    computed_at, stats = entry
+    return {
+        **stats,
+        "cached": hit,
+        "computed_at": datetime.fromtimestamp(computed_at, timezone.utc).isoformat(timespec="seconds"),
+        "age_seconds": round(max(0.0, time.time() - computed_at), 1),
+        "ttl_seconds": ttl,
+    }
@@ -1,10 +1,14 @@
 import json
 import logging
-import time
 import random
+import re
+from typing import Any, Iterator
+
 import requests
 from bs4 import BeautifulSoup
 
+from .pacing import Pacer
+
 logger = logging.getLogger(__name__)
 
 USER_AGENTS = [
@@ -14,8 +18,64 @@ USER_AGENTS = [
 ]
 
 
+_SCRIPT_OPEN_RE = re.compile(r"<script\b([^>]*)>", re.I)
+_SCRIPT_CLOSE_RE = re.compile(r"</script\s*>", re.I)
+_ATTR_RE = re.compile(r"""([\w:-]+)\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s>]+))""")
+
+
+def iter_scripts(html: str, *, id: str | None = None, type: str | None = None) -> Iterator[str]:
+    """
+    Yield the raw text of <script> tags (optionally filtered by id / type) straight from the
+    HTML string, without building a parse tree. Script bodies are skipped as a whole, so a
+    "<script" inside JavaScript doesn't start a new tag.
+    """
+    pos = 0
+    while True:
+        m = _SCRIPT_OPEN_RE.search(html, pos)
+        if not m:
+            return
+        close = _SCRIPT_CLOSE_RE.search(html, m.end())
+        end = close.start() if close else len(html)
+        pos = close.end() if close else len(html)
+        if id is not None or type is not None:
+            attrs = {a.lower(): dq or sq or bare for a, dq, sq, bare in _ATTR_RE.findall(m.group(1))}
+            if id is not None and attrs.get("id") != id:
+                continue
+            if type is not None and attrs.get("type", "").lower() != type:
+                continue
+        yield html[m.end():end]
+
+
+def script_json(html: str, *, id: str | None = None, type: str | None = None) -> Any:
+    """Decoded JSON of the first matching <script> (e.g. id="__NEXT_DATA__"), or None."""
+    for text in iter_scripts(html, id=id, type=type):
+        try:
+            return json.loads(text)
+        except (json.JSONDecodeError, TypeError):
+            continue
+    return None
+
+
+def iter_jsonld(html: str) -> Iterator[dict]:
+    """Top-level objects from every <script type="application/ld+json"> block."""
+    for text in iter_scripts(html, type="application/ld+json"):
+        try:
+            data = json.loads(text)
+        except (json.JSONDecodeError, TypeError):
+            continue
+        for obj in data if isinstance(data, list) else [data]:
+            if isinstance(obj, dict):
+                yield obj
+
+
+# Default spacing between page fetches across all scrapers (1-3s, like the old fixed sleep,
+# but only applied between requests rather than before every one).
+_default_pacer = Pacer(interval=2.0, jitter=0.5)
+
+
 class BaseScraper:
-    def __init__(self):
+    def __init__(self, pacer: Pacer | None = None):
+        self.pacer = pacer or _default_pacer
         self.session = requests.Session()
         self.session.headers.update({
             "User-Agent": random.choice(USER_AGENTS),
@@ -25,25 +85,20 @@ class BaseScraper:
             "Connection": "keep-alive",
         })
 
-    def fetch_page(self, url: str) -> BeautifulSoup:
-        time.sleep(random.uniform(1, 3))
+    def fetch_html(self, url: str) -> str:
+        self.pacer.wait()
         response = self.session.get(url, timeout=15)
         response.raise_for_status()
-        return BeautifulSoup(response.text, "html.parser")
-
-    def extract_jsonld(self, soup: BeautifulSoup) -> list[dict]:
-        """Extract menu items from JSON-LD structured data."""
-        scripts = soup.find_all("script", type="application/ld+json")
-        for script in scripts:
-            try:
-                data = json.loads(script.string)
-                # Handle single object or array
-                items_list = data if isinstance(data, list) else [data]
-                for item in items_list:
-                    if item.get("@type") in ("Restaurant", "FoodEstablishment"):
-                        return self._parse_jsonld_menu(item)
-            except (json.JSONDecodeError, TypeError):
-                continue
+        return response.text
+
+    def fetch_page(self, url: str) -> BeautifulSoup:
+        return BeautifulSoup(self.fetch_html(url), "html.parser")
+
+    def extract_jsonld(self, html: str) -> list[dict]:
+        """Extract menu items from JSON-LD structured data in the raw HTML."""
+        for item in iter_jsonld(html):
+            if item.get("@type") in ("Restaurant", "FoodEstablishment"):
+                return self._parse_jsonld_menu(item)
         return []
 
     def _parse_jsonld_menu(self, data: dict) -> list[dict]:
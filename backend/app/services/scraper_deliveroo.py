@@ -1,68 +1,123 @@
 import json
 import logging
+import random
+import threading
+import time
 from urllib.parse import urlparse, parse_qsl, urlencode, urlunparse
+
+import requests
 from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+
+from . import browser_pool
+from .scraper_base import USER_AGENTS, iter_jsonld, iter_scripts
 
 logger = logging.getLogger(__name__)
 
+_CHALLENGE_MARKERS = ("Just a moment", "cf-chl", "challenge-platform", "cf_chl_opt")
+
+# Shared keep-alive session for the HTTP fast path (same headers as BaseScraper).
+_session = requests.Session()
+_session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=8))
+_session.headers.update({
+    "User-Agent": random.choice(USER_AGENTS),
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "en-GB,en;q=0.5",
+    "Accept-Encoding": "gzip, deflate",
+    "Connection": "keep-alive",
+})
+
+_stats_lock = threading.Lock()
+_stats = {
+    "fast_path": 0,
+    "fallback_challenge": 0,
+    "fallback_no_items": 0,
+    "fallback_http_error": 0,
+    "fast_path_seconds": 0.0,
+    "fallback_seconds": 0.0,
+}
+
+
+def _record(outcome: str, seconds: float) -> None:
+    with _stats_lock:
+        _stats[outcome] += 1
+        key = "fast_path_seconds" if outcome == "fast_path" else "fallback_seconds"
+        _stats[key] += seconds
+
+
+def scrape_stats() -> dict:
+    """Fast-path vs browser-fallback counts (fallbacks split by reason) and average timings."""
+    with _stats_lock:
+        s = dict(_stats)
+    fallbacks = s["fallback_challenge"] + s["fallback_no_items"] + s["fallback_http_error"]
+    total = s["fast_path"] + fallbacks
+    return {
+        "scrapes": total,
+        "fast_path": s["fast_path"],
+        "fallback": fallbacks,
+        "fallback_challenge": s["fallback_challenge"],
+        "fallback_no_items": s["fallback_no_items"],
+        "fallback_http_error": s["fallback_http_error"],
+        "fast_path_rate": round(s["fast_path"] / total, 3) if total else 0.0,
+        "avg_fast_path_seconds": round(s["fast_path_seconds"] / s["fast_path"], 2) if s["fast_path"] else None,
+        "avg_fallback_seconds": round(s["fallback_seconds"] / fallbacks, 2) if fallbacks else None,
+    }
+
 
 class DeliverooScraper:
-    """Scrape menu items from Deliveroo restaurant pages using Playwright (headless browser)."""
+    """
+    Scrape menu items from Deliveroo restaurant pages. Tries a plain HTTP fetch of the
+    server-rendered __NEXT_DATA__ first and falls back to a pooled Playwright browser.
+    """
 
     def scrape_menu(self, url: str) -> list[dict]:
         url = self._normalize_menu_url(url)
-        logger.info(f"Scraping Deliveroo with Playwright: {url}")
-
-        try:
-            from playwright.sync_api import sync_playwright
-        except ImportError:
-            raise RuntimeError(
-                "Playwright is not installed. Run: pip install playwright && playwright install chromium"
-            )
-
-        with sync_playwright() as p:
-            browser = p.chromium.launch(
-                headless=True,
-                args=["--disable-blink-features=AutomationControlled", "--no-sandbox"],
-            )
-            context = browser.new_context(
-                user_agent="Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
-                           "AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-                viewport={"width": 1920, "height": 1080},
-                locale="en-GB",
-            )
-            page = context.new_page()
-            # Hide webdriver flag to avoid bot detection
-            page.add_init_script(
-                'Object.defineProperty(navigator, "webdriver", { get: () => undefined });'
-            )
-
-            try:
-                page.goto(url, wait_until="load", timeout=60000)
-                # Wait for any Cloudflare challenge to pass
-                for _ in range(15):
-                    if "Just a moment" not in page.title():
-                        break
-                    page.wait_for_timeout(2000)
-                page.wait_for_timeout(2000)
-            except Exception as e:
-                browser.close()
-                raise RuntimeError(f"Failed to load page: {e}")
+        started = time.time()
 
-            html = page.content()
+        # Fast path: plain HTTP fetch + __NEXT_DATA__; most menu pages are server-rendered.
+        items, reason = self._scrape_http(url)
+        if items:
+            logger.info(f"Found {len(items)} items via HTTP __NEXT_DATA__ fast path")
+            _record("fast_path", time.time() - started)
+            return items
 
-            # Grab __NEXT_DATA__ directly from the DOM
-            next_data = None
-            try:
-                nd_el = page.query_selector("script#__NEXT_DATA__")
-                if nd_el:
-                    next_data = nd_el.inner_text()
-            except Exception:
-                pass
+        logger.info(f"Scraping Deliveroo with pooled Playwright browser ({reason}): {url}")
+        html, next_data = browser_pool.get_pool().run(lambda page: self._load_page(page, url))
+        items = self._extract_items(html, next_data)
+        _record(f"fallback_{reason}", time.time() - started)
+        return items
 
-            browser.close()
+    def _scrape_http(self, url: str) -> tuple[list[dict], str]:
+        """Return (items, fallback_reason). Items is empty when the browser is needed."""
+        try:
+            resp = _session.get(url, timeout=15)
+        except requests.RequestException as e:
+            logger.info(f"Deliveroo HTTP fetch failed: {e}")
+            return [], "http_error"
+
+        head = resp.text[:20000]
+        if resp.headers.get("cf-mitigated") == "challenge" or any(m in head for m in _CHALLENGE_MARKERS):
+            return [], "challenge"
+        if resp.status_code >= 400:
+            return [], "http_error"
+
+        text = next(iter_scripts(resp.text, id="__NEXT_DATA__"), None)
+        if text is None:
+            return [], "no_items"
+        try:
+            items = self._extract_from_next_data(json.loads(text))
+        except (json.JSONDecodeError, TypeError):
+            items = []
+        return items, "no_items"
 
-        soup = BeautifulSoup(html, "html.parser")
+    def _extract_items(self, html: str, next_data: str | None) -> list[dict]:
+        """
+        Run the extraction strategies in order over a browser-rendered page. The JSON-based
+        strategies read <script> bodies straight from the HTML string; a BeautifulSoup tree is
+        only built if it comes down to walking the markup.
+        """
+        if next_data is None:
+            next_data = next(iter_scripts(html, id="__NEXT_DATA__"), None)
 
         # Strategy 1: __NEXT_DATA__ (Deliveroo is a Next.js app)
         if next_data:
@@ -75,19 +130,19 @@ class DeliverooScraper:
                 pass
 
         # Strategy 2: JSON-LD structured data
-        items = self._extract_jsonld(soup)
+        items = self._extract_jsonld(html)
         if items:
             logger.info(f"Found {len(items)} items via JSON-LD")
             return [{**i, "source": "deliveroo"} for i in items]
 
         # Strategy 3: Embedded script data
-        items = self._extract_from_scripts(soup)
+        items = self._extract_from_scripts(html)
         if items:
             logger.info(f"Found {len(items)} items via script data")
             return items
 
         # Strategy 4: HTML parsing
-        items = self._extract_from_html(soup)
+        items = self._extract_from_html(BeautifulSoup(html, "html.parser"))
         if items:
             logger.info(f"Found {len(items)} items via HTML parsing")
             return items
@@ -95,6 +150,35 @@ class DeliverooScraper:
         logger.warning("No menu items found on Deliveroo page")
         return []
 
+    def _load_page(self, page, url: str) -> tuple[str, str | None]:
+        """Runs on a pooled browser thread: load the menu page and return (html, __NEXT_DATA__ text)."""
+        try:
+            page.goto(url, wait_until="load", timeout=60000)
+            # Wait for any Cloudflare challenge to pass
+            for _ in range(15):
+                if "Just a moment" not in page.title():
+                    break
+                page.wait_for_timeout(2000)
+            # Menu data is server-rendered into __NEXT_DATA__; continue as soon as it is attached.
+            try:
+                page.wait_for_selector("script#__NEXT_DATA__", state="attached", timeout=5000)
+            except Exception:
+                pass
+        except Exception as e:
+            raise RuntimeError(f"Failed to load page: {e}")
+
+        html = page.content()
+
+        # Grab __NEXT_DATA__ directly from the DOM
+        next_data = None
+        try:
+            nd_el = page.query_selector("script#__NEXT_DATA__")
+            if nd_el:
+                next_data = nd_el.inner_text()
+        except Exception:
+            pass
+        return html, next_data
+
     def _normalize_menu_url(self, url: str) -> str:
         """
         Deliveroo sometimes returns a Cloudflare "Just a moment..." page for bare menu URLs.
@@ -245,18 +329,11 @@ class DeliverooScraper:
             "source": "deliveroo",
         }
 
-    def _extract_jsonld(self, soup: BeautifulSoup) -> list[dict]:
+    def _extract_jsonld(self, html: str) -> list[dict]:
         """Extract menu items from JSON-LD structured data."""
-        scripts = soup.find_all("script", type="application/ld+json")
-        for script in scripts:
-            try:
-                data = json.loads(script.string)
-                items_list = data if isinstance(data, list) else [data]
-                for item in items_list:
-                    if item.get("@type") in ("Restaurant", "FoodEstablishment"):
-                        return self._parse_jsonld_menu(item)
-            except (json.JSONDecodeError, TypeError):
-                continue
+        for item in iter_jsonld(html):
+            if item.get("@type") in ("Restaurant", "FoodEstablishment"):
+                return self._parse_jsonld_menu(item)
         return []
 
     def _parse_jsonld_menu(self, data: dict) -> list[dict]:
@@ -284,10 +361,9 @@ class DeliverooScraper:
                 })
         return items
 
-    def _extract_from_scripts(self, soup) -> list[dict]:
+    def _extract_from_scripts(self, html: str) -> list[dict]:
         """Try to find menu data in embedded script tags."""
-        for script in soup.find_all("script"):
-            text = script.string or ""
+        for text in iter_scripts(html):
             if "menuItem" in text or "menu_item" in text or '"items"' in text:
                 try:
                     start = text.find("{")
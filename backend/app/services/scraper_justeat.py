@@ -1,6 +1,8 @@
-import json
 import logging
-from .scraper_base import BaseScraper
+
+from bs4 import BeautifulSoup
+
+from .scraper_base import BaseScraper, script_json
 
 logger = logging.getLogger(__name__)
 
@@ -10,22 +12,22 @@ class JustEatScraper(BaseScraper):
 
     def scrape_menu(self, url: str) -> list[dict]:
         logger.info(f"Scraping Just Eat: {url}")
-        soup = self.fetch_page(url)
+        html = self.fetch_html(url)
 
-        # Strategy 1: __NEXT_DATA__ (Just Eat uses Next.js)
-        items = self._extract_from_next_data(soup)
+        # Strategy 1: __NEXT_DATA__ (Just Eat uses Next.js), read straight from the raw HTML
+        items = self._extract_from_next_data(html)
         if items:
             logger.info(f"Found {len(items)} items via __NEXT_DATA__")
             return items
 
         # Strategy 2: JSON-LD
-        items = self.extract_jsonld(soup)
+        items = self.extract_jsonld(html)
         if items:
             logger.info(f"Found {len(items)} items via JSON-LD")
             return [{"source": "justeat", **i} for i in items]
 
-        # Strategy 3: HTML parsing
-        items = self._extract_from_html(soup)
+        # Strategy 3: HTML parsing (the only strategy that needs a parse tree)
+        items = self._extract_from_html(BeautifulSoup(html, "html.parser"))
         if items:
             logger.info(f"Found {len(items)} items via HTML parsing")
             return items
@@ -33,15 +35,10 @@ class JustEatScraper(BaseScraper):
         logger.warning("No menu items found on Just Eat page")
         return []
 
-    def _extract_from_next_data(self, soup) -> list[dict]:
-        """Extract menu from Next.js __NEXT_DATA__ script tag."""
-        script = soup.find("script", id="__NEXT_DATA__")
-        if not script or not script.string:
-            return []
-
-        try:
-            data = json.loads(script.string)
-        except json.JSONDecodeError:
+    def _extract_from_next_data(self, html: str) -> list[dict]:
+        """Extract menu from the Next.js __NEXT_DATA__ script tag."""
+        data = script_json(html, id="__NEXT_DATA__")
+        if not isinstance(data, dict):
             return []
 
         # Navigate through Next.js page props
@@ -0,0 +1,85 @@
+"""Request coalescing: concurrent callers for the same key share one in-flight upstream call."""
+
+import threading
+from typing import Any, Callable
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: BaseException | None = None
+
+
+class SingleFlight:
+    """
+    Thread-based single-flight group (sync FastAPI routes run in a threadpool).
+    The first caller for a key runs `fn`; callers arriving while it runs block and
+    receive the same result (or exception). Nothing is cached after the call completes.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls: dict[Any, _Call] = {}
+        self._stats = {"calls": 0, "executions": 0, "coalesced": 0, "errors": 0}
+
+    def do(self, key: Any, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        with self._lock:
+            self._stats["calls"] += 1
+            call = self._calls.get(key)
+            if call is not None:
+                self._stats["coalesced"] += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                self._stats["executions"] += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn(*args, **kwargs)
+        except BaseException as e:
+            call.error = e
+            with self._lock:
+                self._stats["errors"] += 1
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+        return call.result
+
+    def stats(self) -> dict:
+        with self._lock:
+            out = dict(self._stats)
+            out["in_flight"] = len(self._calls)
+        out["coalesce_ratio"] = round(out["coalesced"] / out["calls"], 3) if out["calls"] else 0.0
+        return out
+
+
+_groups: dict[str, SingleFlight] = {}
+_groups_lock = threading.Lock()
+
+
+def group(name: str) -> SingleFlight:
+    """Return the process-wide single-flight group called `name`, creating it on first use."""
+    with _groups_lock:
+        g = _groups.get(name)
+        if g is None:
+            g = _groups[name] = SingleFlight(name)
+        return g
+
+
+def all_stats() -> dict:
+    with _groups_lock:
+        groups = list(_groups.values())
+    return {g.name: g.stats() for g in groups}
@@ -25,7 +25,7 @@ function formatApiError(payload, fallback = "Request failed") {
   return fallback;
 }
 
-async function request(path, options = {}) {
+async function send(path, options = {}) {
   const url = `${API_BASE}${path}`;
   const { headers: extraHeaders, ...rest } = options;
   const res = await fetch(url, {
@@ -36,6 +36,11 @@ async function request(path, options = {}) {
     const err = await res.json().catch(() => ({ detail: res.statusText }));
     throw new Error(formatApiError(err, `Request failed (${res.status})`));
   }
+  return res;
+}
+
+async function request(path, options = {}) {
+  const res = await send(path, options);
   if (res.status === 204) return null;
   return res.json();
 }
@@ -347,14 +352,27 @@ export function superadminScrapeDeliveroo(token, restaurantId, importToMenu = fa
   });
 }
 
-export function getSuperadminMessages(token, options = {}) {
-  const { ordersOnly = false, q = "", limit = 100 } = options;
+function superadminMessagesPath(options) {
+  const { ordersOnly = false, q = "", limit = 100, sort = "", beforeId = null } = options;
   const params = new URLSearchParams();
   if (ordersOnly) params.set("orders_only", "true");
   if (q) params.set("q", q);
+  if (sort) params.set("sort", sort);
+  if (beforeId != null) params.set("before_id", String(beforeId));
   if (limit) params.set("limit", String(limit));
   const suffix = params.toString() ? `?${params.toString()}` : "";
-  return request(`/superadmin/messages${suffix}`, { headers: superHeaders(token) });
+  return `/superadmin/messages${suffix}`;
+}
+
+export function getSuperadminMessages(token, options = {}) {
+  return request(superadminMessagesPath(options), { headers: superHeaders(token) });
+}
+
+// One page of the inbox plus the cursor for the next one (null on the last page).
+export async function getSuperadminMessagesPage(token, options = {}) {
+  const res = await send(superadminMessagesPath(options), { headers: superHeaders(token) });
+  const next = res.headers.get("X-Next-Before-Id");
+  return { messages: await res.json(), nextBeforeId: next ? Number(next) : null };
 }
 
 export function superadminReplyEmail(token, { to_email, subject, body, from_email = null }) {
@@ -1,3 +1,5 @@
+import ResponsiveImage from "../restaurant/ResponsiveImage";
+
 const TAG_CLASSES = {
   vegetarian: "badge-vegetarian",
   vegan: "badge-vegan",
@@ -10,9 +12,11 @@ export default function MenuItem({ item, onAdd }) {
     <article className="menu-card menu-item-card">
       {item.image_url && (
         <div className="menu-item-media">
-          <img
+          <ResponsiveImage
             src={item.image_url}
+            variants={item.variants}
             alt={item.name}
+            sizes="92px"
             loading="lazy"
             referrerPolicy="no-referrer"
           />
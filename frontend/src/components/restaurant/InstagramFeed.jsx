@@ -27,7 +27,10 @@ export default function InstagramFeed({ posts = [], handle = null }) {
                 title={p.caption || "Instagram post"}
               >
                 {p.media_url ? (
-                  <img loading="lazy" src={p.media_url} alt={p.caption || "Instagram post"} referrerPolicy="no-referrer" />
+                  <picture>
+                    {p.thumbnail_url_webp && <source srcSet={p.thumbnail_url_webp} type="image/webp" />}
+                    <img loading="lazy" src={p.thumbnail_url || p.media_url} alt={p.caption || "Instagram post"} referrerPolicy="no-referrer" />
+                  </picture>
                 ) : (
                   <div className="ig-fallback">IG</div>
                 )}
@@ -0,0 +1,16 @@
+/**
+ * <picture> for an uploaded image with responsive variants (see backend services/media_variants).
+ * Falls back to a plain <img src> until the variants have been generated.
+ */
+export default function ResponsiveImage({ src, variants, alt, sizes = "100vw", ...imgProps }) {
+  const srcset = variants && variants.ready ? variants.srcset || {} : {};
+  const fallback = srcset.jpeg || srcset.png;
+
+  return (
+    <picture>
+      {srcset.avif && <source type="image/avif" srcSet={srcset.avif} sizes={sizes} />}
+      {srcset.webp && <source type="image/webp" srcSet={srcset.webp} sizes={sizes} />}
+      <img src={src} srcSet={fallback} sizes={fallback ? sizes : undefined} alt={alt} {...imgProps} />
+    </picture>
+  );
+}
@@ -1,22 +1,30 @@
-export default function RestaurantHero({ restaurant }) {
-  const heroStyle = restaurant.banner_url
-    ? {
-        backgroundImage: `linear-gradient(120deg, var(--hero-overlay-1), var(--hero-overlay-2)), url(${restaurant.banner_url})`,
-        backgroundSize: "cover",
-        backgroundPosition: "center",
-      }
-    : undefined;
+import ResponsiveImage from "./ResponsiveImage";
 
+export default function RestaurantHero({ restaurant }) {
+  // The banner is a <picture> rather than a CSS background so phones download a narrow variant.
   return (
-    <header className="restaurant-banner" style={heroStyle}>
+    <header className={`restaurant-banner${restaurant.banner_url ? " restaurant-banner--image" : ""}`}>
+      {restaurant.banner_url && (
+        <ResponsiveImage
+          className="restaurant-banner-image"
+          src={restaurant.banner_url}
+          variants={restaurant.banner_variants}
+          alt=""
+          sizes="100vw"
+          fetchPriority="high"
+          referrerPolicy="no-referrer"
+        />
+      )}
       <div className="container">
         <div className="restaurant-banner-inner">
           <div className="restaurant-identity">
             {restaurant.logo_url ? (
-              <img
+              <ResponsiveImage
                 className="restaurant-logo restaurant-logo--hero"
                 src={restaurant.logo_url}
+                variants={restaurant.logo_variants}
                 alt={`${restaurant.name} logo`}
+                sizes="64px"
                 loading="eager"
                 referrerPolicy="no-referrer"
               />
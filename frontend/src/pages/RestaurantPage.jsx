@@ -5,6 +5,7 @@ import { useBasket } from "../context/BasketContext";
 import RestaurantHero from "../components/restaurant/RestaurantHero";
 import MapWidget from "../components/restaurant/MapWidget";
 import InstagramFeed from "../components/restaurant/InstagramFeed";
+import ResponsiveImage from "../components/restaurant/ResponsiveImage";
 import OpeningHours from "../components/restaurant/OpeningHours";
 import DealsSignup from "../components/restaurant/DealsSignup";
 import MenuSection from "../components/menu/MenuSection";
@@ -212,7 +213,13 @@ export default function RestaurantPage() {
             <div className="ig-grid">
               {gallery.map((img) => (
                 <div key={img.id} className="ig-card" style={{ cursor: "default" }}>
-                  <img loading="lazy" src={img.image_url} alt={img.caption || "Gallery photo"} />
+                  <ResponsiveImage
+                    loading="lazy"
+                    src={img.image_url}
+                    variants={img.variants}
+                    sizes="clamp(180px, 30vw, 260px)"
+                    alt={img.caption || "Gallery photo"}
+                  />
                   {img.caption && (
                     <span className="ig-overlay">
                       <span className="ig-pill">{img.caption}</span>
@@ -4,6 +4,7 @@ import {
   getSuperadminStats,
   getSuperadminRestaurants,
   getSuperadminMessages,
+  getSuperadminMessagesPage,
   superadminReplyEmail,
   superPlacesSearch,
   superPlacesImport,
@@ -85,6 +86,8 @@ export default function SuperAdminDashboard() {
   const [restaurants, setRestaurants] = useState([]);
   const [messages, setMessages] = useState([]);
   const [messagesLoading, setMessagesLoading] = useState(false);
+  const [messagesNextBeforeId, setMessagesNextBeforeId] = useState(null);
+  const [messagesLoadingMore, setMessagesLoadingMore] = useState(false);
   const [msgTab, setMsgTab] = useState("email"); // "email" | "sms"
   const [expandedMsg, setExpandedMsg] = useState(null); // message id
   const [msgSort, setMsgSort] = useState({ col: "id", dir: "desc" });
@@ -156,8 +159,9 @@ export default function SuperAdminDashboard() {
     setMessagesLoading(true);
     setError(null);
     try {
-      const data = await getSuperadminMessages(token, { ordersOnly, q: search, limit: 200 });
-      setMessages(data);
+      const page = await getSuperadminMessagesPage(token, { ordersOnly, q: search, limit: 200 });
+      setMessages(page.messages);
+      setMessagesNextBeforeId(page.nextBeforeId);
     } catch (e) {
       setError(e.message);
     } finally {
@@ -165,6 +169,23 @@ export default function SuperAdminDashboard() {
     }
   }, [ordersOnly, search, token]);
 
+  const loadMoreMessages = async () => {
+    if (messagesNextBeforeId == null) return;
+    setMessagesLoadingMore(true);
+    setError(null);
+    try {
+      const page = await getSuperadminMessagesPage(token, {
+        ordersOnly, q: search, limit: 200, beforeId: messagesNextBeforeId,
+      });
+      setMessages((prev) => [...prev, ...page.messages]);
+      setMessagesNextBeforeId(page.nextBeforeId);
+    } catch (e) {
+      setError(e.message);
+    } finally {
+      setMessagesLoadingMore(false);
+    }
+  };
+
   useEffect(() => {
     if (view === "messages") loadMessages();
   }, [view, loadMessages]);
@@ -173,7 +194,7 @@ export default function SuperAdminDashboard() {
     if (!restaurant?.owner_email) { setOutreachMessages([]); return; }
     setOutreachMessagesLoading(true);
     try {
-      const data = await getSuperadminMessages(token, { q: restaurant.owner_email, limit: 200 });
+      const data = await getSuperadminMessages(token, { q: restaurant.owner_email, sort: "recent", limit: 200 });
       const ownerEmail = restaurant.owner_email.toLowerCase();
       setOutreachMessages(
         (data || [])
@@ -422,7 +443,9 @@ export default function SuperAdminDashboard() {
     try {
       const result = await superadminScrapeDeliveroo(token, editing, true, url);
       setDeliverooScrapeMessage(
-        `Imported ${result.imported ?? 0} new, updated ${result.updated ?? 0}. Refresh the list to see menu counts.`
+        result.hash_match
+          ? "Menu unchanged since the last import."
+          : `Imported ${result.imported ?? 0} new, updated ${result.updated ?? 0}, marked ${result.removed_count ?? 0} unavailable. Refresh the list to see menu counts.`
       );
       loadData();
     } catch (e) {
@@ -824,6 +847,14 @@ export default function SuperAdminDashboard() {
                     </div>
                   )
                 )}
+
+                {!messagesLoading && messagesNextBeforeId != null && (
+                  <div style={{ textAlign: "center", marginTop: "1rem" }}>
+                    <button className="btn btn-outline btn-sm" onClick={loadMoreMessages} disabled={messagesLoadingMore}>
+                      {messagesLoadingMore ? "Loading…" : "Load more"}
+                    </button>
+                  </div>
+                )}
               </>
             );
           })()}
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Offline benchmark for the Deliveroo / Just Eat menu extraction strategies.
+
+Runs every strategy of each scraper over the saved pages in scripts/scraper_fixtures/
+(no network) and reports parse time, peak Python memory and items found, checking item
+counts against the manifest so parser changes can be compared for speed *and* accuracy.
+`--parser` only affects the HTML-walk strategy (and the "soup" baseline); the JSON
+strategies read <script> bodies straight from the raw HTML.
+
+Usage:
+    python scripts/bench_scrapers.py [--repeat 3] [--parser html.parser|lxml] [--only deliveroo]
+                                     [--json results.json]
+    # Save a live page into the corpus (its current item counts become the expected values):
+    python scripts/bench_scrapers.py --capture URL --source deliveroo --name my_restaurant
+"""
+
+import argparse
+import gzip
+import json
+import logging
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+FIXTURES = ROOT / "scripts" / "scraper_fixtures"
+sys.path.insert(0, str(ROOT / "backend"))
+
+from bs4 import BeautifulSoup  # noqa: E402
+
+from app.services.scraper_base import iter_scripts  # noqa: E402
+from app.services.scraper_deliveroo import DeliverooScraper  # noqa: E402
+from app.services.scraper_justeat import JustEatScraper  # noqa: E402
+
+
+def _deliveroo_strategies(parser: str) -> dict:
+    s = DeliverooScraper()
+
+    def next_data(html):
+        text = next(iter_scripts(html, id="__NEXT_DATA__"), None)
+        return s._extract_from_next_data(json.loads(text)) if text else []
+
+    return {
+        "soup": lambda html: BeautifulSoup(html, parser) and [],
+        "next_data": next_data,
+        "jsonld": s._extract_jsonld,
+        "scripts": s._extract_from_scripts,
+        "html": lambda html: s._extract_from_html(BeautifulSoup(html, parser)),
+        # Browser fallback path: full chain over the rendered page, as scrape_menu runs it
+        # (next_data=None makes it read __NEXT_DATA__ from the HTML itself).
+        "pipeline": lambda html: s._extract_items(html, None),
+    }
+
+
+def _justeat_strategies(parser: str) -> dict:
+    s = JustEatScraper()
+
+    def pipeline(html):
+        s.fetch_html = lambda url: html
+        return s.scrape_menu("fixture")
+
+    return {
+        "soup": lambda html: BeautifulSoup(html, parser) and [],
+        "next_data": s._extract_from_next_data,
+        "jsonld": s.extract_jsonld,
+        "html": lambda html: s._extract_from_html(BeautifulSoup(html, parser)),
+        "pipeline": pipeline,
+    }
+
+
+STRATEGIES = {"deliveroo": _deliveroo_strategies, "justeat": _justeat_strategies}
+
+
+def _read(fixture: dict) -> str:
+    path = FIXTURES / fixture["file"]
+    raw = path.read_bytes()
+    if path.suffix == ".gz":
+        raw = gzip.decompress(raw)
+    return raw.decode("utf-8", errors="replace")
+
+
+def _measure(fn, html: str, repeat: int) -> dict:
+    times = []
+    items = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        items = fn(html)
+        times.append(time.perf_counter() - t0)
+    # Separate run for memory: tracemalloc slows allocation-heavy code down a lot.
+    tracemalloc.start()
+    fn(html)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "items": len(items or []),
+        "min_ms": round(min(times) * 1000, 1),
+        "median_ms": round(statistics.median(times) * 1000, 1),
+        "peak_mb": round(peak / 1024 / 1024, 1),
+    }
+
+
+def run(args) -> list[dict]:
+    manifest = json.loads((FIXTURES / "manifest.json").read_text())
+    results = []
+    for fixture in manifest:
+        if args.only and fixture["source"] != args.only:
+            continue
+        html = _read(fixture)
+        strategies = STRATEGIES[fixture["source"]](args.parser)
+        for name, fn in strategies.items():
+            try:
+                r = _measure(fn, html, args.repeat)
+            except Exception as e:
+                r = {"items": 0, "error": f"{type(e).__name__}: {e}"[:120]}
+            expected = fixture.get("expected", {}).get(name)
+            r.update(
+                fixture=fixture["name"],
+                source=fixture["source"],
+                strategy=name,
+                size_kb=round(len(html) / 1024),
+                expected=expected,
+                ok=None if expected is None else r["items"] == expected,
+            )
+            results.append(r)
+    return results
+
+
+def _print_table(results: list[dict], parser: str) -> None:
+    print(f"parser={parser}")
+    header = f"{'fixture':<22}{'strategy':<11}{'KB':>6}{'items':>7}{'expect':>8}{'min ms':>9}{'med ms':>9}{'peak MB':>9}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        expect = "" if r["expected"] is None else str(r["expected"])
+        flag = "" if r["ok"] is not False else "  MISMATCH"
+        if "error" in r:
+            print(f"{r['fixture']:<22}{r['strategy']:<11}{r['size_kb']:>6}  error: {r['error']}")
+            continue
+        print(
+            f"{r['fixture']:<22}{r['strategy']:<11}{r['size_kb']:>6}{r['items']:>7}{expect:>8}"
+            f"{r['min_ms']:>9}{r['median_ms']:>9}{r['peak_mb']:>9}{flag}"
+        )
+
+
+def capture(args) -> None:
+    """Fetch a live page into the corpus and record today's item counts as expected values."""
+    import re
+    import requests
+    from app.services.scraper_base import USER_AGENTS
+
+    if not args.source or not args.name:
+        sys.exit("--capture needs --source and --name")
+    if not re.fullmatch(r"[a-z0-9_]+", args.name):
+        sys.exit("--name must be lowercase letters, digits and underscores")
+    resp = requests.get(args.capture, headers={"User-Agent": USER_AGENTS[0], "Accept-Language": "en-GB"}, timeout=30)
+    resp.raise_for_status()
+    path = FIXTURES / f"{args.name}.html.gz"
+    with gzip.GzipFile(path, "wb", mtime=0) as f:
+        f.write(resp.text.encode("utf-8"))
+
+    expected = {}
+    for name, fn in STRATEGIES[args.source]("html.parser").items():
+        if name != "soup":
+            expected[name] = len(fn(resp.text) or [])
+    manifest_path = FIXTURES / "manifest.json"
+    manifest = [m for m in json.loads(manifest_path.read_text()) if m["name"] != args.name]
+    manifest.append({"name": args.name, "file": path.name, "source": args.source, "url": args.capture, "expected": expected})
+    manifest_path.write_text(json.dumps(sorted(manifest, key=lambda m: m["name"]), indent=2) + "\n")
+    print(f"Saved {path.name} ({len(resp.text) / 1024:.0f} KB): {expected}")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--parser", default="html.parser", help="BeautifulSoup parser for the soup-based strategies")
+    ap.add_argument("--only", choices=sorted(STRATEGIES), help="Only benchmark one source")
+    ap.add_argument("--json", help="Also write results to this JSON file")
+    ap.add_argument("--capture", metavar="URL", help="Save a live page into the fixture corpus and exit")
+    ap.add_argument("--source", choices=sorted(STRATEGIES))
+    ap.add_argument("--name")
+    args = ap.parse_args()
+
+    logging.basicConfig(level=logging.ERROR)
+    if args.capture:
+        capture(args)
+        return
+
+    results = run(args)
+    _print_table(results, args.parser)
+    if args.json:
+        Path(args.json).write_text(json.dumps({"parser": args.parser, "results": results}, indent=2))
+    if any(r["ok"] is False for r in results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Refresh the server's Instagram cache from a residential IP.
+
+Instagram rate-limits datacenter IPs, so this scrapes every restaurant's handle
+locally (a few at a time) and uploads the whole batch in one request to
+POST /api/superadmin/instagram/cache, which upserts it in a single transaction.
+
+Usage:
+    python scripts/refresh_instagram_cache.py [--base-url https://forkitt.com] [--token ...]
+                                              [--concurrency 3] [--limit 12] [--dry-run]
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone
+
+import requests
+
+INSTAGRAM_APP_ID = "936619743392459"
+UA = "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36"
+
+
+def fetch_handles(base_url: str, token: str) -> list[str]:
+    r = requests.get(
+        f"{base_url}/api/superadmin/restaurants",
+        headers={"Authorization": f"Bearer {token}"},
+        timeout=30,
+    )
+    r.raise_for_status()
+    handles = set()
+    for restaurant in r.json():
+        handle = (restaurant.get("instagram_handle") or "").strip().lstrip("@")
+        if handle and restaurant.get("is_active", True):
+            handles.add(handle)
+    return sorted(handles)
+
+
+def scrape_handle(session: requests.Session, handle: str, limit: int) -> list[dict]:
+    # Small jitter so parallel workers don't hit Instagram in lockstep.
+    time.sleep(random.uniform(0.2, 1.0))
+    r = session.get(
+        "https://i.instagram.com/api/v1/users/web_profile_info/",
+        params={"username": handle},
+        headers={"User-Agent": UA, "Accept": "application/json", "X-IG-App-ID": INSTAGRAM_APP_ID},
+        timeout=20,
+    )
+    r.raise_for_status()
+    user = (r.json().get("data") or {}).get("user") or {}
+    edges = ((user.get("edge_owner_to_timeline_media") or {}).get("edges") or [])[:limit]
+
+    posts = []
+    for e in edges:
+        node = e.get("node") or {}
+        shortcode = node.get("shortcode")
+        if not shortcode:
+            continue
+        caption_edges = (node.get("edge_media_to_caption") or {}).get("edges") or []
+        caption = ((caption_edges[0] or {}).get("node") or {}).get("text") if caption_edges else None
+        taken_at = node.get("taken_at_timestamp")
+        posts.append({
+            "id": str(node.get("id") or shortcode),
+            "shortcode": shortcode,
+            "permalink": f"https://www.instagram.com/p/{shortcode}/",
+            "media_url": node.get("display_url") or node.get("thumbnail_src"),
+            "caption": caption,
+            "timestamp": datetime.fromtimestamp(int(taken_at), tz=timezone.utc).isoformat() if taken_at else None,
+            "is_video": bool(node.get("is_video")),
+        })
+    return posts
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default=os.getenv("FORKITT_BASE_URL", "https://forkitt.com"))
+    parser.add_argument("--token", default=os.getenv("SUPER_ADMIN_TOKEN", ""))
+    parser.add_argument("--concurrency", type=int, default=3)
+    parser.add_argument("--limit", type=int, default=12)
+    parser.add_argument("--dry-run", action="store_true", help="Scrape only; print the batch instead of uploading")
+    args = parser.parse_args()
+    base_url = args.base_url.rstrip("/")
+
+    started = time.time()
+    print("==> Fetching restaurant list")
+    handles = fetch_handles(base_url, args.token)
+    print(f"    {len(handles)} handles")
+
+    batch: dict[str, list[dict]] = {}
+    session = requests.Session()
+    with ThreadPoolExecutor(max_workers=max(1, args.concurrency)) as pool:
+        futures = {pool.submit(scrape_handle, session, h, args.limit): h for h in handles}
+        for fut in as_completed(futures):
+            handle = futures[fut]
+            try:
+                posts = fut.result()
+            except Exception as e:
+                print(f"    @{handle}: failed ({e})")
+                continue
+            print(f"    @{handle}: {len(posts)} posts")
+            if posts:
+                batch[handle] = posts
+
+    if args.dry_run:
+        print(json.dumps(batch, indent=2))
+        return 0
+    if not batch:
+        print("==> Nothing to upload")
+        return 1
+
+    print(f"==> Uploading {len(batch)} handles")
+    r = requests.post(
+        f"{base_url}/api/superadmin/instagram/cache",
+        json={"handles": batch},
+        headers={"Authorization": f"Bearer {args.token}"},
+        timeout=60,
+    )
+    r.raise_for_status()
+    result = r.json()
+    print(f"    updated={len(result.get('updated', []))} skipped={len(result.get('skipped', []))}")
+    print(f"==> Done in {time.time() - started:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Regenerate the synthetic pages in this directory (deterministic, seeded).
+
+Each fixture mimics the shape one scraper strategy looks for on real Deliveroo / Just Eat
+pages, padded with unrelated markup and JSON so parse costs are in the same ballpark as
+live pages (~0.5-2MB). Real pages can be added alongside with
+`python scripts/bench_scrapers.py --capture URL --source deliveroo --name my_page`.
+
+Usage:
+    python scripts/scraper_fixtures/generate_synthetic.py
+"""
+
+import gzip
+import json
+import random
+from pathlib import Path
+
+HERE = Path(__file__).resolve().parent
+SEED = 1234
+
+WORDS = (
+    "chicken lamb paneer spicy garlic smoked crispy grilled house special fresh classic "
+    "sweet chilli lemon herb roasted vegan halloumi truffle loaded double cheese"
+).split()
+CATEGORIES = ["Starters", "Mains", "Burgers", "Sides", "Salads", "Desserts", "Drinks", "Kids", "Sauces", "Specials"]
+
+
+def _words(rng: random.Random, n: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(n))
+
+
+def _menu(rng: random.Random, n_items: int) -> list[dict]:
+    items, seen = [], set()
+    while len(items) < n_items:
+        name = _words(rng, rng.randint(2, 4)).title()
+        if name in seen:
+            continue
+        seen.add(name)
+        items.append({
+            "name": name,
+            "description": _words(rng, rng.randint(6, 18)).capitalize() + ".",
+            "price_pence": rng.randint(150, 2200),
+            "category": CATEGORIES[len(items) % len(CATEGORIES)],
+        })
+    return items
+
+
+def _noise_json(rng: random.Random, n: int) -> list[dict]:
+    """Unrelated Next.js state (tracking, layout, translations) with no price fields."""
+    return [
+        {
+            "id": f"blk-{i}",
+            "type": rng.choice(["banner", "layout", "tracking", "copy"]),
+            "props": {"text": _words(rng, 20), "children": [{"key": _words(rng, 2), "value": _words(rng, 8)}] * 3},
+        }
+        for i in range(n)
+    ]
+
+
+def _noise_html(rng: random.Random, n: int) -> str:
+    return "\n".join(
+        f'<div class="layout-{i % 7}"><a href="/area/{i}">{_words(rng, 4)}</a>'
+        f'<span class="meta">{_words(rng, 10)}</span></div>'
+        for i in range(n)
+    )
+
+
+def _page(head: str, body: str) -> str:
+    return f"<!DOCTYPE html><html><head><title>Menu</title>{head}</head><body>{body}</body></html>"
+
+
+def _next_data_script(data: dict) -> str:
+    return f'<script id="__NEXT_DATA__" type="application/json">{json.dumps(data)}</script>'
+
+
+def deliveroo_next_data(rng):
+    menu = _menu(rng, 140)
+    cats = [{"id": str(i), "name": c} for i, c in enumerate(CATEGORIES)]
+    items = [
+        {
+            "id": f"item-{i}",
+            "name": m["name"],
+            "description": m["description"],
+            "price": {"fractional": m["price_pence"], "currency_code": "GBP"},
+            "categoryId": str(CATEGORIES.index(m["category"])),
+            "image": {"url": f"https://img.example.com/menu/{i}.jpg?width={{w}}&height={{h}}"},
+        }
+        for i, m in enumerate(menu)
+    ]
+    # Modifier options (no categoryId) that the scraper must skip.
+    items += [{"id": f"mod-{i}", "name": f"Extra {w}", "price": {"fractional": 0}} for i, w in enumerate(WORDS)]
+    data = {"props": {"initialState": {
+        "menuPage": {"menu": {"metas": {"root": {"categories": cats, "items": items}}}},
+        "layout": _noise_json(rng, 2500),
+    }}}
+    return _page(_next_data_script(data), _noise_html(rng, 1500)), len(menu)
+
+
+def deliveroo_jsonld(rng):
+    menu = _menu(rng, 80)
+    sections = {}
+    for m in menu:
+        sections.setdefault(m["category"], []).append({
+            "@type": "MenuItem",
+            "name": m["name"],
+            "description": m["description"],
+            "offers": {"@type": "Offer", "price": f"{m['price_pence'] / 100:.2f}", "priceCurrency": "GBP"},
+        })
+    ld = {"@context": "https://schema.org", "@type": "Restaurant", "name": "Fixture Kitchen", "hasMenu": {
+        "@type": "Menu",
+        "hasMenuSection": [{"@type": "MenuSection", "name": k, "hasMenuItem": v} for k, v in sections.items()],
+    }}
+    next_data = {"props": {"initialState": {"layout": _noise_json(rng, 2000)}}}
+    head = _next_data_script(next_data) + f'<script type="application/ld+json">{json.dumps(ld)}</script>'
+    return _page(head, _noise_html(rng, 1500)), len(menu)
+
+
+def deliveroo_html(rng):
+    menu = _menu(rng, 60)
+    parts = []
+    for cat in CATEGORIES:
+        parts.append(f"<h2>{cat}</h2>")
+        for m in (x for x in menu if x["category"] == cat):
+            parts.append(
+                f'<div data-testid="menu-item"><h4>{m["name"]}</h4><p>{m["description"]}</p>'
+                f'<span>£{m["price_pence"] / 100:.2f}</span></div>'
+            )
+    return _page("", _noise_html(rng, 1500) + "".join(parts)), len(menu)
+
+
+def justeat_next_data(rng):
+    menu = _menu(rng, 120)
+    cats = [
+        {"name": c, "items": [{"name": m["name"], "description": m["description"], "price": m["price_pence"]}
+                              for m in menu if m["category"] == c]}
+        for c in CATEGORIES
+    ]
+    data = {"props": {"pageProps": {"menu": {"categories": cats}, "layout": _noise_json(rng, 2000)}}}
+    return _page(_next_data_script(data), _noise_html(rng, 1500)), len(menu)
+
+
+def justeat_deep(rng):
+    """Menu nested several levels down under an unexpected key: exercises _deep_find_categories."""
+    menu = _menu(rng, 120)
+    sections = [
+        {"title": c, "products": [{"title": m["name"], "subtitle": m["description"], "price": m["price_pence"]}
+                                  for m in menu if m["category"] == c]}
+        for c in CATEGORIES
+    ]
+    data = {"props": {"pageProps": {
+        "layout": _noise_json(rng, 2000),
+        "initialState": {"menuState": {"data": {"restaurant": {"menuSections": sections}}}},
+    }}}
+    return _page(_next_data_script(data), _noise_html(rng, 1500)), len(menu)
+
+
+def justeat_html(rng):
+    menu = _menu(rng, 60)
+    parts = []
+    for cat in CATEGORIES:
+        parts.append(f'<section data-test-id="menu-category-{cat.lower()}"><h2>{cat}</h2><ul>')
+        for m in (x for x in menu if x["category"] == cat):
+            parts.append(
+                f'<li class="c-menuItems-item"><h3 class="c-menuItems-name">{m["name"]}</h3>'
+                f'<p>{m["description"]}</p><span>£{m["price_pence"] / 100:.2f}</span></li>'
+            )
+        parts.append("</ul></section>")
+    return _page("", _noise_html(rng, 1500) + "".join(parts)), len(menu)
+
+
+FIXTURES = [
+    ("deliveroo_next_data", "deliveroo", deliveroo_next_data, "next_data"),
+    ("deliveroo_jsonld", "deliveroo", deliveroo_jsonld, "jsonld"),
+    ("deliveroo_html", "deliveroo", deliveroo_html, "html"),
+    ("justeat_next_data", "justeat", justeat_next_data, "next_data"),
+    ("justeat_deep", "justeat", justeat_deep, "next_data"),
+    ("justeat_html", "justeat", justeat_html, "html"),
+]
+
+
+def main() -> None:
+    manifest_path = HERE / "manifest.json"
+    manifest = json.loads(manifest_path.read_text()) if manifest_path.exists() else []
+    manifest = [m for m in manifest if not m.get("synthetic")]
+    for name, source, build, strategy in FIXTURES:
+        html, expected = build(random.Random(f"{SEED}-{name}"))
+        path = HERE / f"{name}.html.gz"
+        # mtime=0 keeps the gzip bytes stable across regenerations.
+        with gzip.GzipFile(path, "wb", mtime=0) as f:
+            f.write(html.encode("utf-8"))
+        manifest.append({
+            "name": name,
+            "file": path.name,
+            "source": source,
+            "synthetic": True,
+            "expected": {strategy: expected, "pipeline": expected},
+        })
+        print(f"{path.name}: {len(html) / 1024:.0f} KB, {expected} items via {strategy}")
+    manifest_path.write_text(json.dumps(sorted(manifest, key=lambda m: m["name"]), indent=2) + "\n")
+
+
+if __name__ == "__main__":
+    main()